@@ -0,0 +1,330 @@
+"""
+Account deletion: an immediate tombstone, then a resumable cascade.
+
+DELETE /api/profile/<id> only tombstones the user: it sets
+`deleted_at`, frees the username, drops the credentials and the
+discovery keys (`visible_to`, `rand`) and revokes every session. Every
+profile read filters on LIVE_PROFILE, so from then on the user is
+missing from the feed, random, likedby, saved pages and inbox sender
+names.
+
+Cleaning up everything else is a job in `account_deletions` (one
+document per user, `_id` = user id), worked through STEPS in bounded
+batches:
+
+    likes_given / likes_received   edges in `likes`, plus the other side's counters
+    legacy_liked                   the id in other users' old `liked` arrays
+    letters_sent / letters_received
+    seen, thumbnails               per-user documents
+    image                          the Cloudinary asset (via api/cloudinary_queue)
+    user                           the tombstone itself
+
+The job is written before the tombstone. A crash in between leaves a
+job for a live user, which run_cascade recognises and drops, never a
+tombstone without a job. After every batch the job records its step
+and counts, so a crashed run resumes at the step it was in. Counters of the users on the other
+side of a batch are recounted rather than decremented, and the batch's
+ids are saved before its documents are deleted. A batch that was cut
+short is therefore simply recounted on resume. A lease keeps two runners
+off the same job.
+
+The API starts the cascade on a background thread;
+`manage.py run_account_deletions` finishes jobs a restart interrupted.
+"""
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import PyMongoError
+
+from . import cloudinary_queue
+from .images import parse_cloudinary_url
+from .mongo import get_db
+from .profilecache import profile_cache
+from .sessions import bump_generation
+
+logger = logging.getLogger(__name__)
+
+# Condition every profile read adds, so tombstoned users never show up.
+LIVE_PROFILE = {"deleted_at": None}
+
+DELETION_BATCH = 500
+LEASE_SECONDS = 300
+
+STEPS = (
+    "likes_given",
+    "likes_received",
+    "legacy_liked",
+    "letters_sent",
+    "letters_received",
+    "seen",
+    "thumbnails",
+    "image",
+    "user",
+)
+
+_runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="account-deletion")
+
+
+def tombstone(db, uid):
+    """
+    Hides uid and queues its cascade. Returns the deletion job, or None if
+    there is no such user. Deleting an already deleted user returns the
+    existing job.
+    """
+    users = db["users"]
+    doc = users.find_one({"_id": uid, **LIVE_PROFILE}, {"image_url": 1, "image_public_id": 1})
+    if doc is None:
+        return db["account_deletions"].find_one({"_id": uid})
+
+    now = datetime.utcnow()
+    job = ensure_job(db, doc, now)
+    res = users.update_one(
+        {"_id": uid, **LIVE_PROFILE},
+        {
+            "$set": {"deleted_at": now, "updated_at": now, "username": f"deleted-{uid}"},
+            "$unset": {"password_hash": "", "email": "", "visible_to": "", "rand": ""},
+        },
+    )
+    if not res.modified_count:
+        # a concurrent delete got there first; it wrote the same job
+        return db["account_deletions"].find_one({"_id": uid})
+    bump_generation(users, uid)
+    return job
+
+
+def ensure_job(db, user_doc, now=None):
+    """The deletion job for user_doc, created on first call (only tombstone() calls this)."""
+    parsed = parse_cloudinary_url(user_doc.get("image_url"))
+    public_id = user_doc.get("image_public_id") or (parsed[2] if parsed else None)
+    db["account_deletions"].update_one(
+        {"_id": user_doc["_id"]},
+        {"$setOnInsert": {
+            "state": "pending",
+            "step": STEPS[0],
+            "counts": {},
+            "pending": None,
+            "image_public_id": public_id,
+            "requested_at": now or datetime.utcnow(),
+        }},
+        upsert=True,
+    )
+    return db["account_deletions"].find_one({"_id": user_doc["_id"]})
+
+
+def schedule(uid):
+    """Runs the cascade for uid on the background thread."""
+    _runner.submit(_run_logged, uid)
+
+
+def _run_logged(uid):
+    try:
+        run_cascade(get_db(), uid)
+    except PyMongoError:
+        logger.warning("account deletion of %s stopped; run_account_deletions resumes it", uid, exc_info=True)
+
+
+# ----------------------------
+# Counters on the other side
+# ----------------------------
+# counter -> (source collection, field holding the user id, extra match)
+_COUNTER_SOURCES = {
+    "likes_received": ("likes", "likee", {}),
+    "likes_given": ("likes", "liker", {}),
+    "unread_letters": ("letters", "receiver_id", {"read_at": None}),
+}
+
+
+def _recount(db, counter, ids):
+    """
+    Sets `counter` on each of ids from the source collection (idempotent):
+    one $group over the whole batch, then one bulk_write.
+    """
+    if not ids:
+        return
+    coll, field, match = _COUNTER_SOURCES[counter]
+    counts = {
+        d["_id"]: d["n"]
+        for d in db[coll].aggregate([
+            {"$match": {field: {"$in": list(ids)}, **match}},
+            {"$group": {"_id": f"${field}", "n": {"$sum": 1}}},
+        ])
+    }
+    now = datetime.utcnow()
+    ops = []
+    for x in ids:
+        update = {counter: counts.get(x, 0)}
+        if counter == "likes_given":
+            # likes_updated_at versions the likes list (conditional GET)
+            update["likes_updated_at"] = now
+        ops.append(UpdateOne({"_id": x}, {"$set": update}))
+    db["users"].bulk_write(ops, ordered=False)
+
+
+def _delete_batch(db, job, coll, ids, counter=None, others=()):
+    """Deletes ids from coll, recounting `counter` on `others` afterwards."""
+    if not ids:
+        return
+    others = list(dict.fromkeys(others))
+    if counter and others:
+        _save(db, job, {"pending": {"counter": counter, "ids": others}})
+    db[coll].delete_many({"_id": {"$in": ids}})
+    if counter and others:
+        _recount(db, counter, others)
+        _save(db, job, {"pending": None})
+
+
+# ----------------------------
+# Steps: each returns (documents handled, step finished)
+# ----------------------------
+def _likes_given(db, job, uid, batch):
+    edges = list(db["likes"].find({"liker": uid}, {"likee": 1}).limit(batch))
+    _delete_batch(db, job, "likes", [e["_id"] for e in edges], "likes_received", [e["likee"] for e in edges])
+    return len(edges), len(edges) < batch
+
+
+def _likes_received(db, job, uid, batch):
+    edges = list(db["likes"].find({"likee": uid}, {"liker": 1}).limit(batch))
+    _delete_batch(db, job, "likes", [e["_id"] for e in edges], "likes_given", [e["liker"] for e in edges])
+    return len(edges), len(edges) < batch
+
+
+def _legacy_liked(db, job, uid, batch):
+    # users.liked is unindexed and gone after migrate_likes --unset-arrays
+    members = {"$in": [uid, str(uid)]}
+    ids = [d["_id"] for d in db["users"].find({"liked": members}, {"_id": 1}).limit(batch)]
+    if ids:
+        db["users"].update_many({"_id": {"$in": ids}}, {"$pull": {"liked": members}})
+    return len(ids), len(ids) < batch
+
+
+def _letters_sent(db, job, uid, batch):
+    docs = list(db["letters"].find({"sender_id": uid}, {"receiver_id": 1, "read_at": 1}).limit(batch))
+    unread_for = [d["receiver_id"] for d in docs if d.get("read_at") is None]
+    _delete_batch(db, job, "letters", [d["_id"] for d in docs], "unread_letters", unread_for)
+    return len(docs), len(docs) < batch
+
+
+def _letters_received(db, job, uid, batch):
+    ids = [d["_id"] for d in db["letters"].find({"receiver_id": uid}, {"_id": 1}).limit(batch)]
+    _delete_batch(db, job, "letters", ids)
+    return len(ids), len(ids) < batch
+
+
+def _seen(db, job, uid, batch):
+    return db["seen"].delete_one({"_id": uid}).deleted_count, True
+
+
+def _thumbnails(db, job, uid, batch):
+    return db["image_thumbs"].delete_many({"user_id": uid}).deleted_count, True
+
+
+def _image(db, job, uid, batch):
+    public_id = job.get("image_public_id")
+    if not public_id:
+        return 0, True
+    cloudinary_queue.enqueue(db, public_id)
+    return 1, True
+
+
+def _user(db, job, uid, batch):
+    n = db["users"].delete_one({"_id": uid, "deleted_at": {"$ne": None}}).deleted_count
+    profile_cache().invalidate(uid)
+    return n, True
+
+
+_STEP_FUNCS = {
+    "likes_given": _likes_given,
+    "likes_received": _likes_received,
+    "legacy_liked": _legacy_liked,
+    "letters_sent": _letters_sent,
+    "letters_received": _letters_received,
+    "seen": _seen,
+    "thumbnails": _thumbnails,
+    "image": _image,
+    "user": _user,
+}
+
+
+# ----------------------------
+# Runner
+# ----------------------------
+def _save(db, job, fields, inc=None):
+    now = datetime.utcnow()
+    fields = {"updated_at": now, "leased_until": now + timedelta(seconds=LEASE_SECONDS), **fields}
+    update = {"$set": fields}
+    if inc:
+        update["$inc"] = inc
+    db["account_deletions"].update_one({"_id": job["_id"], "lease_owner": job["lease_owner"]}, update)
+    job.update(fields)
+
+
+def claim(db, uid, now=None):
+    """Leases uid's unfinished job to the caller; None if done or held elsewhere."""
+    now = now or datetime.utcnow()
+    owner = uuid.uuid4().hex
+    return db["account_deletions"].find_one_and_update(
+        {
+            "_id": uid,
+            "state": {"$ne": "done"},
+            "$or": [{"leased_until": None}, {"leased_until": {"$lte": now}}],
+        },
+        {"$set": {
+            "state": "running",
+            "lease_owner": owner,
+            "leased_until": now + timedelta(seconds=LEASE_SECONDS),
+        }},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def run_cascade(db, uid, batch_size=DELETION_BATCH):
+    """
+    Works uid's deletion job from its checkpoint to the end. Returns the
+    job, or None if it is finished or another runner holds it.
+    """
+    job = claim(db, uid)
+    if job is None:
+        return None
+
+    if db["users"].find_one({"_id": uid, **LIVE_PROFILE}, {"_id": 1}):
+        # the tombstone hasn't landed (yet): never touch a live user
+        _release_untombstoned(db, job)
+        return None
+
+    pending = job.get("pending")
+    if pending:
+        # interrupted between deleting a batch and recounting its counters
+        _recount(db, pending["counter"], pending["ids"])
+        _save(db, job, {"pending": None})
+
+    step = job.get("step") or STEPS[0]
+    while step is not None:
+        handled, finished = _STEP_FUNCS[step](db, job, uid, batch_size)
+        inc = {f"counts.{step}": handled} if handled else None
+        if finished:
+            i = STEPS.index(step) + 1
+            step = STEPS[i] if i < len(STEPS) else None
+        _save(db, job, {"step": step}, inc)
+
+    _save(db, job, {"state": "done", "finished_at": datetime.utcnow(), "leased_until": None})
+    return db["account_deletions"].find_one({"_id": uid})
+
+
+def _release_untombstoned(db, job):
+    """
+    Gives back a job whose user is still live. Within LEASE_SECONDS of the
+    request that is tombstone() between its two writes; after that, the
+    request died in between and the job is dropped.
+    """
+    if job["requested_at"] <= datetime.utcnow() - timedelta(seconds=LEASE_SECONDS):
+        db["account_deletions"].delete_one({"_id": job["_id"], "lease_owner": job["lease_owner"]})
+    else:
+        _save(db, job, {"state": "pending", "leased_until": None})
+
+
+def unfinished_jobs(db):
+    """Ids of users whose deletion job has not finished."""
+    return [d["_id"] for d in db["account_deletions"].find({"state": {"$ne": "done"}}, {"_id": 1})]
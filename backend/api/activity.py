@@ -0,0 +1,44 @@
+"""
+`last_active_at` on users, for the feed's sort=recently_active.
+
+Marking a user active on every authenticated request would turn reads
+into writes, so updates are coalesced: each worker remembers whom it
+marked in the last LAST_ACTIVE_RESOLUTION seconds and skips them, and
+the write itself is conditional on the stored value being that old, so
+other workers' touches don't stack up either. The write runs on a
+background thread; the request never waits for it.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from pymongo.errors import PyMongoError
+
+from .mongo import get_db
+from .ttlcache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_recent = TTLCache(settings.LAST_ACTIVE_RESOLUTION, max_size=50000)
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="last-active")
+
+
+def _write(uid):
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=settings.LAST_ACTIVE_RESOLUTION)
+    try:
+        get_db()["users"].update_one(
+            {"_id": uid, "$or": [{"last_active_at": {"$lt": cutoff}}, {"last_active_at": None}]},
+            {"$set": {"last_active_at": now}},
+        )
+    except PyMongoError:
+        logger.warning("could not update last_active_at for %s", uid, exc_info=True)
+
+
+def touch_active(uid):
+    """Marks uid active, at most once per LAST_ACTIVE_RESOLUTION per worker."""
+    if _recent.get(uid):
+        return
+    _recent.set(uid, True)
+    _writer.submit(_write, uid)
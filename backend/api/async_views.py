@@ -0,0 +1,202 @@
+"""
+Async versions of the I/O-bound endpoints, served under /api/async/.
+
+Same request/response contract as the DRF views in views.py, but plain
+Django async views on PyMongo's AsyncMongoClient, so under an ASGI
+server (procfile `asgi:` process) one worker keeps many Atlas round
+trips in flight instead of blocking a thread per request. Queries that
+don't depend on each other are issued together with asyncio.gather.
+"""
+import asyncio
+
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from . import likes as likes_store
+from .accounts import LIVE_PROFILE
+from .activity import touch_active
+from .images import athumbed_ids
+from .letters import INBOX_SORT, inbox_query, inbox_result
+from .mongo import get_async_db
+from .renderers import json_response
+from .seen import aload_seen
+from .sessions import averify_session
+from .views import (
+    FEED_SEEN_SCAN_ROUNDS,
+    SAFE_METHODS,
+    apply_feed_position,
+    feed_payload,
+    feed_position,
+    feed_query,
+    feed_result,
+    feed_sort_spec,
+    is_truthy,
+    oid,
+    parse_limit,
+    take_unseen,
+    unseen_result,
+)
+
+
+def _error(message, status):
+    return json_response({"error": message}, status=status)
+
+
+async def arequire_session(request, users, claimed_user_id):
+    """Async twin of views.require_session: returns (uid, None) or (None, error)."""
+    uid = oid(claimed_user_id)
+    if not uid:
+        return None, _error("Invalid user id", 400)
+
+    token = request.headers.get("X-Session-Token")
+    if not token:
+        return None, _error("Missing session token", 401)
+
+    if not await averify_session(users, uid, token, fresh=request.method not in SAFE_METHODS):
+        return None, _error("Invalid or expired session", 401)
+
+    touch_active(uid)  # never blocks: the write runs on its own thread
+    return uid, None
+
+
+async def _unseen_page(users, q, limit, seen, field, descending, projection):
+    """views._unseen_page on the async client."""
+    docs = []
+    last_scanned = None
+    batch_size = limit * 2
+    for _ in range(FEED_SEEN_SCAN_ROUNDS):
+        if last_scanned is not None:
+            apply_feed_position(q, field, descending, feed_position(field, last_scanned))
+        batch = await users.find(q, projection).sort(feed_sort_spec(field, descending)).limit(batch_size).to_list()
+        last_scanned = take_unseen(batch, seen, docs, limit) or last_scanned
+        if len(docs) == limit or len(batch) < batch_size:
+            break
+    return unseen_result(docs, batch, batch_size, last_scanned, field)
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+async def profiles_list(request):
+    """GET /api/async/allprofiles — same parameters as ProfilesListView, exclude_seen included."""
+    db = get_async_db()
+    users = db["users"]
+    params = request.GET
+
+    viewer_id = request.headers.get("X-User-Id") or params.get("viewer_id")
+    viewer_oid = oid(viewer_id) if viewer_id else None
+
+    # The visibility rule needs the viewer's gender before the feed
+    # query can be built; the seen set is read alongside it.
+    viewer_gender = seen = None
+    if viewer_oid:
+        viewer_doc, seen = await asyncio.gather(
+            users.find_one({"_id": viewer_oid}, {"gender": 1}),
+            aload_seen(db, viewer_oid) if is_truthy(params.get("exclude_seen")) else asyncio.sleep(0),
+        )
+        viewer_gender = (viewer_doc or {}).get("gender")
+
+    q, projection, field, descending, limit, hidden = feed_query(params, viewer_oid, viewer_gender)
+    if seen is None:
+        docs = await (
+            users.find(q, projection)
+            .sort(feed_sort_spec(field, descending))
+            .limit(limit + 1)
+            .to_list()
+        )
+        docs, next_cursor, has_more = feed_result(docs, limit, field)
+    else:
+        docs, next_cursor, has_more = await _unseen_page(users, q, limit, seen, field, descending, projection)
+    thumbed = await athumbed_ids(db, docs)
+    return json_response(feed_payload(docs, next_cursor, has_more, hidden, thumbed))
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST", "DELETE"])
+async def likes(request, user_id, profile_id=None):
+    """/api/async/likes/<user_id>[/<profile_id>] — same contract as LikesView."""
+    db = get_async_db()
+    users = db["users"]
+
+    if request.method == "GET":
+        uid = oid(user_id)
+        if not uid:
+            return json_response({"liked": []})
+        return json_response({"liked": [str(x) for x in await likes_store.aliked_ids(db, uid)]})
+
+    uid, err = await arequire_session(request, users, user_id)
+    if err:
+        return err
+
+    pid = oid(profile_id)
+    if not pid:
+        return _error("Invalid id", 400)
+
+    if request.method == "DELETE":
+        await likes_store.aremove_like(db, uid, pid)
+        return json_response({"ok": True})
+
+    if uid == pid:
+        return _error("Cannot like yourself", 400)
+
+    # aadd_like runs the write and the "did they like me back" check together
+    liked = await likes_store.aadd_like(db, uid, pid)
+    if liked is None:
+        return _error("Profile not found", 404)
+    _, is_match = liked
+    return json_response({"ok": True, "match": is_match})
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+async def inbox(request, user_id):
+    """GET /api/async/inbox/<user_id> — same contract as InboxView."""
+    db = get_async_db()
+    users = db["users"]
+    letters = db["letters"]
+
+    params = request.GET
+    limit = parse_limit(params.get("limit"), default=50, maximum=200)
+
+    # Read-only: fetch the letters while the session is being checked,
+    # and only hand them out if it turns out valid.
+    uid = oid(user_id)
+    letters_query = (
+        letters.find(inbox_query(uid, params.get("cursor"), is_truthy(params.get("unread_only"))))
+        .sort(INBOX_SORT)
+        .limit(limit + 1)
+        .to_list()
+        if uid else asyncio.sleep(0, result=[])
+    )
+    (uid, err), docs = await asyncio.gather(
+        arequire_session(request, users, user_id),
+        letters_query,
+    )
+    if err:
+        return err
+
+    docs, next_cursor, has_more = inbox_result(docs, limit)
+
+    sender_ids = list({d["sender_id"] for d in docs if d.get("sender_id")})
+    sender_map = {}
+    if sender_ids:
+        async for sp in users.find({"_id": {"$in": sender_ids}, **LIVE_PROFILE}, {"username": 1, "name": 1}):
+            sender_map[str(sp["_id"])] = sp.get("username") or sp.get("name") or "Unknown"
+
+    for d in docs:
+        d["sender_username"] = sender_map.get(str(d.get("sender_id")), "Unknown")
+
+    return json_response({"items": docs, "next_cursor": next_cursor, "has_more": has_more})
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+async def verify_session(request):
+    """GET /api/async/verify-session — same contract as VerifySessionView."""
+    users = get_async_db()["users"]
+
+    uid = oid(request.headers.get("X-User-Id"))
+    token = request.headers.get("X-Session-Token")
+    if not uid or not token or not await averify_session(users, uid, token):
+        return json_response({"valid": False}, status=401)
+
+    return json_response({"valid": True})
@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+from pymongo.errors import PyMongoError
+
+
+@register("mongo")
+def mongo_indexes_check(app_configs, **kwargs):
+    """
+    Startup check that the indexes declared in api/indexes.py exist.
+
+    Controlled by settings.MONGO_INDEX_CHECK: "off" (the DEBUG default,
+    no Mongo round trip), "warn" (drift is reported as warnings) or
+    "strict" (the production default: drift is an error, so runserver,
+    `manage.py check` and gunicorn's on_starting hook refuse to start).
+    """
+    mode = getattr(settings, "MONGO_INDEX_CHECK", "strict")
+    if mode not in {"warn", "strict"}:
+        return []
+
+    from .indexes import index_drift
+    from .mongo import get_db
+
+    strict = mode == "strict"
+    level = Error if strict else Warning
+    prefix = "api.E" if strict else "api.W"
+
+    try:
+        drift = index_drift(get_db())
+    except PyMongoError as e:
+        return [level(f"Could not check Mongo indexes: {e}", id=f"{prefix}001")]
+
+    # an index nobody declared slows writes but breaks nothing: only warn
+    return [
+        (Warning if problem == "extra" else level)(
+            f"Mongo index drift on {coll_name}.{name}: {problem}",
+            hint="Run `python manage.py ensure_indexes`.",
+            id="api.W002" if problem == "extra" else f"{prefix}002",
+        )
+        for coll_name, name, problem in drift
+    ]
+
+
+@register("mongo")
+def mongo_visibility_check(app_configs, **kwargs):
+    """
+    Startup check that every live profile has `visible_to`: signed-in
+    viewers only see profiles by it (api/visibility.py), so profiles
+    without it would silently drop out of their feed. Same
+    MONGO_INDEX_CHECK modes as the index check; `manage.py migrate_mongo`
+    (the procfile's release step) fills it in.
+    """
+    mode = getattr(settings, "MONGO_INDEX_CHECK", "strict")
+    if mode not in {"warn", "strict"}:
+        return []
+
+    from .accounts import LIVE_PROFILE
+    from .mongo import get_db
+
+    strict = mode == "strict"
+    level = Error if strict else Warning
+    prefix = "api.E" if strict else "api.W"
+
+    try:
+        missing = get_db()["users"].find_one({"visible_to": {"$exists": False}, **LIVE_PROFILE}, {"_id": 1})
+    except PyMongoError as e:
+        return [level(f"Could not check profile visibility: {e}", id=f"{prefix}001")]
+    if missing is None:
+        return []
+    return [level(
+        f"Profiles without visible_to (e.g. {missing['_id']}) are hidden from signed-in viewers",
+        hint="Run `python manage.py migrate_mongo` (or `manage.py backfill_visibility --missing-only`).",
+        id=f"{prefix}003",
+    )]
@@ -0,0 +1,138 @@
+"""
+Durable, batched Cloudinary deletions.
+
+CloudinaryDeleteView only records the public_id in `cloudinary_deletions`
+(the public_id is the _id, so a repeated request is a no-op) and returns.
+`manage.py drain_cloudinary_deletions` empties the queue in batches of up
+to 100 ids per Admin API delete_resources call. Ids that fail are
+retried with exponential backoff and parked as "failed" after
+MAX_ATTEMPTS, until the id is enqueued again. Batches are claimed with a lease, so several drainers (or
+a crashed one) never delete the same id twice at once.
+
+The deleter is injectable: anything callable as deleter(public_ids) ->
+{"deleted": {public_id: status}} works, e.g. StubDeleter for local runs.
+"""
+import uuid
+from datetime import datetime, timedelta
+
+BATCH_MAX = 100  # Admin API limit per delete_resources call
+MAX_ATTEMPTS = 8
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 6 * 60 * 60
+LEASE_SECONDS = 120
+
+# delete_resources statuses that mean the asset is gone
+DONE_STATUSES = {"deleted", "not_found"}
+
+
+def enqueue(db, public_id, now=None):
+    """
+    Queues public_id for deletion; returns False if it was already
+    pending. An id parked as "failed" is re-armed: a new request means
+    someone still wants it gone, so it gets a fresh set of attempts.
+    """
+    now = now or datetime.utcnow()
+    queue = db["cloudinary_deletions"]
+    fresh = {"state": "pending", "attempts": 0, "next_attempt_at": now}
+    rearmed = queue.update_one(
+        {"_id": public_id, "state": "failed"},
+        {"$set": fresh, "$unset": {"last_error": "", "lease_owner": "", "leased_until": ""}},
+    )
+    if rearmed.modified_count:
+        return True
+    res = queue.update_one(
+        {"_id": public_id},
+        {"$setOnInsert": {**fresh, "enqueued_at": now}},
+        upsert=True,
+    )
+    return res.upserted_id is not None
+
+
+def backoff(attempts):
+    return min(BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1)), BACKOFF_MAX_SECONDS)
+
+
+def cloudinary_deleter(public_ids):
+    import cloudinary.api
+
+    return cloudinary.api.delete_resources(public_ids, resource_type="image", type="upload")
+
+
+class StubDeleter:
+    """Local stand-in for the Admin API: records calls, deletes everything
+    except the ids in `fail` (reported as an error status)."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.calls = []
+
+    def __call__(self, public_ids):
+        self.calls.append(list(public_ids))
+        return {"deleted": {p: ("error" if p in self.fail else "deleted") for p in public_ids}}
+
+
+def claim_batch(queue, size, now, lease_seconds=LEASE_SECONDS):
+    """Leases up to `size` due ids to this caller and returns them."""
+    owner = uuid.uuid4().hex
+    due = {
+        "state": "pending",
+        "next_attempt_at": {"$lte": now},
+        "$or": [{"leased_until": None}, {"leased_until": {"$lte": now}}],
+    }
+    ids = [d["_id"] for d in queue.find(due, {"_id": 1}).sort("next_attempt_at", 1).limit(size)]
+    if not ids:
+        return []
+    queue.update_many(
+        {"_id": {"$in": ids}, **due},
+        {"$set": {"lease_owner": owner, "leased_until": now + timedelta(seconds=lease_seconds)}},
+    )
+    return [d["_id"] for d in queue.find({"_id": {"$in": ids}, "lease_owner": owner}, {"_id": 1})]
+
+
+def _retry(queue, ids, now, error):
+    for doc in queue.find({"_id": {"$in": ids}}, {"attempts": 1}):
+        attempts = doc.get("attempts", 0) + 1
+        update = {"attempts": attempts, "last_error": str(error)[:500], "leased_until": None}
+        if attempts >= MAX_ATTEMPTS:
+            update["state"] = "failed"
+        else:
+            update["next_attempt_at"] = now + timedelta(seconds=backoff(attempts))
+        queue.update_one({"_id": doc["_id"]}, {"$set": update})
+
+
+def drain_once(db, deleter=cloudinary_deleter, batch_size=BATCH_MAX, now=None):
+    """
+    Claims one batch and deletes it. Returns (deleted, retried) counts;
+    (0, 0) means nothing was due.
+    """
+    queue = db["cloudinary_deletions"]
+    now = now or datetime.utcnow()
+    ids = claim_batch(queue, min(batch_size, BATCH_MAX), now)
+    if not ids:
+        return 0, 0
+
+    try:
+        result = deleter(ids) or {}
+    except Exception as e:
+        _retry(queue, ids, now, e)
+        return 0, len(ids)
+
+    statuses = result.get("deleted") or {}
+    done = [p for p in ids if statuses.get(p) in DONE_STATUSES]
+    failed = [p for p in ids if p not in done]
+    if done:
+        queue.delete_many({"_id": {"$in": done}})
+    if failed:
+        _retry(queue, failed, now, "; ".join(f"{p}: {statuses.get(p, 'missing from response')}" for p in failed[:5]))
+    return len(done), len(failed)
+
+
+def drain(db, deleter=cloudinary_deleter, batch_size=BATCH_MAX, max_batches=None):
+    """Drains every due id; returns total (deleted, retried)."""
+    deleted = retried = batches = 0
+    while max_batches is None or batches < max_batches:
+        d, r = drain_once(db, deleter, batch_size)
+        if not d and not r:
+            break
+        deleted, retried, batches = deleted + d, retried + r, batches + 1
+    return deleted, retried
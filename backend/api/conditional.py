@@ -0,0 +1,69 @@
+"""
+HTTP conditional GET helpers (ETag / Last-Modified -> 304).
+
+Validators are built from version fields the API already maintains
+(users.updated_at, last_active_at, likes_given / likes_updated_at), so a
+view can answer If-None-Match / If-Modified-Since without serializing
+the body again. Validators must come from the same read as the body
+they describe: profile reads go through the profile cache, so they
+are built from the (possibly cached) documents being served.
+The matching itself is Django's get_conditional_response.
+"""
+import calendar
+import hashlib
+from datetime import datetime, timezone
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+PROFILE_CACHE_CONTROL = {"public": True, "no_cache": True}
+PRIVATE_CACHE_CONTROL = {"private": True, "no_cache": True}
+THUMB_CACHE_CONTROL = {"public": True, "max_age": 86400}
+
+
+def make_etag(*parts):
+    """Strong validator from the parts that identify one representation."""
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    return '"%s"' % hashlib.sha1(raw.encode()).hexdigest()[:32]
+
+
+def latest(*values):
+    """The newest of some (possibly missing) datetimes, or None."""
+    values = [v for v in values if isinstance(v, datetime)]
+    return max(values) if values else None
+
+
+def _timestamp(dt):
+    if dt is None:
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return calendar.timegm(dt.timetuple())
+
+
+def not_modified(request, etag, last_modified=None, cache_control=PRIVATE_CACHE_CONTROL):
+    """
+    A 304 response if the request's validators match, else None.
+    Only GET/HEAD are considered.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return None
+    response = get_conditional_response(request, etag=etag, last_modified=_timestamp(last_modified))
+    if response is not None:
+        _stamp(response, etag, last_modified, cache_control)
+    return response
+
+
+def with_validators(response, etag, last_modified=None, cache_control=PRIVATE_CACHE_CONTROL):
+    """Adds ETag / Last-Modified / Cache-Control to a 200 response."""
+    _stamp(response, etag, last_modified, cache_control)
+    return response
+
+
+def _stamp(response, etag, last_modified, cache_control):
+    if etag:
+        response["ETag"] = etag
+    ts = _timestamp(last_modified)
+    if ts is not None:
+        response["Last-Modified"] = http_date(ts)
+    patch_cache_control(response, **cache_control)
@@ -0,0 +1,85 @@
+"""
+Opaque keyset cursors.
+
+A cursor is the sort key of the last item on a page, e.g.
+(created_at, _id), packed into a short URL-safe string. Values are
+tagged so datetimes and ObjectIds survive the round trip. Anything
+malformed, or holding anything but scalars, decodes to None and the
+caller starts from the first page.
+"""
+import base64
+import json
+from datetime import datetime, timezone
+
+from bson import ObjectId
+
+
+def _pack(v):
+    if isinstance(v, ObjectId):
+        return {"o": str(v)}
+    if isinstance(v, datetime):
+        if v.tzinfo is not None:
+            v = v.astimezone(timezone.utc).replace(tzinfo=None)
+        return {"d": v.isoformat()}
+    return v
+
+
+def _unpack(v):
+    # decoded values go straight into Mongo filters: only scalars, so a
+    # crafted cursor can't smuggle in an operator like {"$ne": null}
+    if isinstance(v, dict) and len(v) == 1:
+        if isinstance(v.get("o"), str):
+            return ObjectId(v["o"])
+        if isinstance(v.get("d"), str):
+            return datetime.fromisoformat(v["d"])
+    if v is None or isinstance(v, (str, int, float)):
+        return v
+    raise ValueError(f"not a cursor value: {v!r}")
+
+
+def encode_cursor(*values):
+    raw = json.dumps([_pack(v) for v in values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, size):
+    """Returns a tuple of `size` values, or None for a missing/bad cursor."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list):
+            return None
+        values = [_unpack(v) for v in values]
+    except Exception:
+        return None
+    if len(values) != size:
+        return None
+    return tuple(values)
+
+
+def after(sort_field, tie_field, cursor_values, descending, nullable=False):
+    """
+    Keyset condition for "strictly after the cursor" on a
+    (sort_field, tie_field) ordering where both keys go the same way.
+
+    With nullable=True, documents where sort_field is null or missing are
+    placed where Mongo sorts them: before every value ascending, after
+    every value descending (range operators alone never match null).
+    """
+    value, tie = cursor_values
+    op = "$lt" if descending else "$gt"
+    if nullable and value is None:
+        branches = [{sort_field: None, tie_field: {op: tie}}]
+        if not descending:
+            branches.append({sort_field: {"$ne": None}})
+        return {"$or": branches}
+
+    branches = [
+        {sort_field: {op: value}},
+        {sort_field: value, tie_field: {op: tie}},
+    ]
+    if nullable and descending:
+        branches.append({sort_field: None})
+    return {"$or": branches}
@@ -0,0 +1,31 @@
+"""
+Password hashers whose cost comes from settings.PASSWORD_HASHING.
+
+Each keeps the algorithm name of the Django hasher it extends, so hashes
+already stored keep verifying. Django's must_update() compares a
+stored hash's parameters with these class attributes, so raising the
+cost (or switching the preferred algorithm) makes the next successful
+login rehash that user's password (api/passwords.py).
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+_cfg = settings.PASSWORD_HASHING
+
+
+class ConfiguredPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = _cfg["PBKDF2_ITERATIONS"] or PBKDF2PasswordHasher.iterations
+
+
+class ConfiguredArgon2PasswordHasher(Argon2PasswordHasher):
+    time_cost = _cfg["ARGON2_TIME_COST"]
+    memory_cost = _cfg["ARGON2_MEMORY_COST"]
+    parallelism = _cfg["ARGON2_PARALLELISM"]
+
+
+class ConfiguredScryptPasswordHasher(ScryptPasswordHasher):
+    work_factor = _cfg["SCRYPT_WORK_FACTOR"]
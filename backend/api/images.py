@@ -0,0 +1,247 @@
+"""
+Responsive image variants for profile photos.
+
+Profiles store the original upload (image_url, image_public_id). Cards
+and thumbnails only need a few dozen pixels, so every profile response
+also gets `image_variants`: per use (thumb, card, lightbox) a `src`, a
+`srcset` and `sizes`, ready for <img>. For Cloudinary images these are
+transformation URLs (resize + f_auto + q_auto, at 1x-3x DPR or at width
+buckets); computing them is string work only, no network calls.
+
+Images hosted anywhere else get square thumbnails made with Pillow by
+`manage.py build_thumbnails`, stored in the `image_thumbs` collection and
+served from /api/thumbs/<user id>/<size>. Only profiles that have them
+get /api/thumbs variants; the others (not built yet, or not on
+settings.IMAGE_HOSTS, which the thumbnailer alone fetches from, see
+trusted_image_url) get the original image_url for every variant, as
+before variants existed.
+"""
+import io
+import re
+from datetime import datetime
+from urllib.parse import quote, urlsplit
+
+from bson import Binary
+from django.conf import settings
+
+from .mongo import get_db
+
+# Fixed-size variants are squares at 1x..3x DPR (x descriptors); width
+# variants keep the aspect ratio and offer width buckets (w descriptors).
+IMAGE_VARIANTS = {
+    "thumb": {"size": 48, "dprs": (1, 2, 3)},
+    "card": {"size": 88, "dprs": (1, 2, 3)},
+    "lightbox": {"widths": (640, 960, 1280, 1920), "sizes": "(max-width: 700px) 100vw, 70vw"},
+}
+
+_CLOUDINARY_URL = re.compile(
+    r"^https?://res\.cloudinary\.com/(?P<cloud>[^/]+)/image/upload/"
+    r"(?:(?:[a-z]{1,3}_[^/]+)/)*(?:v(?P<version>\d+)/)?(?P<public_id>.+?)(?:\.[A-Za-z0-9]+)?$"
+)
+
+
+def parse_cloudinary_url(url):
+    """(cloud name, version or None, public_id) of a Cloudinary delivery URL, else None."""
+    m = _CLOUDINARY_URL.match(url or "")
+    if not m:
+        return None
+    return m.group("cloud"), m.group("version"), m.group("public_id")
+
+
+def _split(url):
+    """urlsplit(url) of an absolute http(s) URL without credentials, else None."""
+    try:
+        parts = urlsplit(url or "")
+        parts.port
+    except ValueError:
+        return None
+    if parts.scheme not in ("http", "https") or not parts.hostname or parts.username or parts.password:
+        return None
+    return parts
+
+
+def web_image_url(url):
+    """
+    True if url is an absolute http(s) URL without credentials: what a
+    browser may load as <img src>, so /api/thumbs can redirect to it.
+    """
+    return _split(url) is not None
+
+
+def trusted_image_url(url):
+    """
+    True if url is an https URL on one of settings.IMAGE_HOSTS, on the
+    default port and without credentials. Anything the server itself
+    downloads must pass this.
+    """
+    parts = _split(url)
+    return (
+        parts is not None
+        and parts.scheme == "https"
+        and parts.hostname in settings.IMAGE_HOSTS
+        and parts.port is None
+    )
+
+
+def cloudinary_url(cloud, public_id, transformation, version=None):
+    path = f"v{version}/{public_id}" if version else public_id
+    return f"https://res.cloudinary.com/{cloud}/image/upload/{transformation}/{quote(path, safe='/')}"
+
+
+def _cloudinary_variants(cloud, version, public_id):
+    out = {}
+    for name, spec in IMAGE_VARIANTS.items():
+        if "size" in spec:
+            px = spec["size"]
+            urls = [
+                (cloudinary_url(cloud, public_id, f"c_fill,g_auto,w_{px},h_{px},dpr_{d}.0,f_auto,q_auto", version), d)
+                for d in spec["dprs"]
+            ]
+            out[name] = {
+                "src": urls[0][0],
+                "srcset": ", ".join(f"{u} {d}x" for u, d in urls),
+                "sizes": f"{px}px",
+            }
+        else:
+            urls = [(cloudinary_url(cloud, public_id, f"c_limit,w_{w},f_auto,q_auto", version), w) for w in spec["widths"]]
+            out[name] = {
+                "src": urls[len(urls) // 2][0],
+                "srcset": ", ".join(f"{u} {w}w" for u, w in urls),
+                "sizes": spec["sizes"],
+            }
+    return out
+
+
+def fallback_sizes():
+    """Square thumbnail sizes (px) the Pillow fallback renders."""
+    return sorted({spec["size"] * d for spec in IMAGE_VARIANTS.values() if "size" in spec for d in spec["dprs"]})
+
+
+def _fallback_variants(user_id, image_url, base_url):
+    out = {}
+    for name, spec in IMAGE_VARIANTS.items():
+        if "size" in spec:
+            px = spec["size"]
+            urls = [(f"{base_url}/api/thumbs/{user_id}/{px * d}", d) for d in spec["dprs"]]
+            out[name] = {
+                "src": urls[0][0],
+                "srcset": ", ".join(f"{u} {d}x" for u, d in urls),
+                "sizes": f"{px}px",
+            }
+        else:
+            # no resizing service: the lightbox shows the original
+            out[name] = {"src": image_url, "srcset": "", "sizes": spec["sizes"]}
+    return out
+
+
+def _original_variants(image_url):
+    return {
+        name: {"src": image_url, "srcset": "", "sizes": spec.get("sizes") or f"{spec['size']}px"}
+        for name, spec in IMAGE_VARIANTS.items()
+    }
+
+
+def image_variants(doc, base_url=None, has_thumbs=False):
+    """
+    The `image_variants` dict for a profile document, or None without an
+    image. has_thumbs: build_thumbnails made thumbnails of its image_url.
+    """
+    image_url = doc.get("image_url")
+    if not image_url:
+        return None
+
+    parsed = parse_cloudinary_url(image_url)
+    if parsed:
+        cloud, version, public_id = parsed
+        return _cloudinary_variants(cloud, version, doc.get("image_public_id") or public_id)
+
+    if not has_thumbs:
+        return _original_variants(image_url)
+
+    base_url = settings.PUBLIC_API_BASE if base_url is None else base_url
+    return _fallback_variants(doc["_id"], image_url, base_url.rstrip("/"))
+
+
+def _thumbs_query(docs):
+    """
+    (filter, {user id: image_url}) for the thumbnails of docs' non-Cloudinary
+    images, or (None, {}) if there are none. One size is enough:
+    build_thumbnails stores them all at once.
+    """
+    wanted = {
+        d["_id"]: d["image_url"]
+        for d in docs
+        if d is not None and d.get("image_url") and not parse_cloudinary_url(d["image_url"])
+    }
+    if not wanted:
+        return None, {}
+    return {"user_id": {"$in": list(wanted)}, "size": fallback_sizes()[0]}, wanted
+
+
+def _current(thumbs, wanted):
+    return {t["user_id"] for t in thumbs if wanted.get(t["user_id"]) == t.get("source_url")}
+
+
+def thumbed_ids(db, docs):
+    """Ids among docs whose current image_url has local thumbnails."""
+    q, wanted = _thumbs_query(docs)
+    if q is None:
+        return set()
+    return _current(db["image_thumbs"].find(q, {"user_id": 1, "source_url": 1}), wanted)
+
+
+async def athumbed_ids(db, docs):
+    """thumbed_ids for an async (AsyncMongoClient) database."""
+    q, wanted = _thumbs_query(docs)
+    if q is None:
+        return set()
+    return _current(await db["image_thumbs"].find(q, {"user_id": 1, "source_url": 1}).to_list(), wanted)
+
+
+def add_image_variants(docs, base_url=None, thumbed=None):
+    """
+    Sets `image_variants` on each profile document (in place) and returns
+    them. `thumbed` is thumbed_ids(docs), looked up here when not given.
+    """
+    if thumbed is None:
+        thumbed = thumbed_ids(get_db(), docs)
+    for d in docs:
+        if d is not None and "image_url" in d:
+            d["image_variants"] = image_variants(d, base_url, d["_id"] in thumbed)
+    return docs
+
+
+# ----------------------------
+# Pillow fallback
+# ----------------------------
+def render_thumbnails(data, sizes):
+    """{size: webp bytes} of center-cropped squares from original image bytes."""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img).convert("RGB")
+        out = {}
+        for px in sizes:
+            thumb = ImageOps.fit(img, (px, px), method=Image.Resampling.LANCZOS)
+            buf = io.BytesIO()
+            thumb.save(buf, "WEBP", quality=80, method=4)
+            out[px] = buf.getvalue()
+    return out
+
+
+def store_thumbnails(db, user_id, source_url, thumbs):
+    now = datetime.utcnow()
+    coll = db["image_thumbs"]
+    for px, data in thumbs.items():
+        coll.replace_one(
+            {"_id": f"{user_id}:{px}"},
+            {
+                "user_id": user_id,
+                "size": px,
+                "content_type": "image/webp",
+                "data": Binary(data),
+                "source_url": source_url,
+                "created_at": now,
+            },
+            upsert=True,
+        )
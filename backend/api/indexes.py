@@ -0,0 +1,326 @@
+"""
+Index declarations for the Mongo collections the API queries.
+
+Keep every index a view relies on here, next to the query shape that
+needs it, so a new filter or sort never ships without its index.
+`manage.py ensure_indexes` builds what is missing, reports drift and
+explains QUERY_SHAPES to prove none of them falls back to a COLLSCAN.
+"""
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+
+# Every profile read also carries LIVE_PROFILE ({"deleted_at": None},
+# api/accounts.py). It is left out of the keys on purpose: a tombstone
+# loses visible_to and rand, so the equality / range on those already
+# skips it, and elsewhere the residual filter only drops the few
+# tombstones whose cascade hasn't finished yet.
+INDEXES = {
+    "users": [
+        # SignUpView / LoginView / ResetPasswordView, and the 409 path in
+        # ProfileView.put.
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        # Visibility in the feed and random pick: one equality on the
+        # multikey visible_to list (api/visibility.py).
+        IndexModel([("visible_to", ASCENDING), ("_id", ASCENDING)], name="visible_to_id"),
+        # RandomProfileView: range pick on the random key, alone and
+        # behind the visible_to equality.
+        IndexModel([("rand", ASCENDING)], name="rand"),
+        IndexModel([("visible_to", ASCENDING), ("rand", ASCENDING)], name="visible_to_rand"),
+        # Feed filters (ProfilesListView). Equality / $in fields first,
+        # then the _id sort key, then the age range (ESR order), so a
+        # filtered page is an index walk instead of a scan + discard.
+        IndexModel(
+            [("city", ASCENDING), ("gender", ASCENDING), ("_id", ASCENDING), ("age", ASCENDING)],
+            name="feed_city_gender",
+        ),
+        IndexModel(
+            [("orientation", ASCENDING), ("looking_for", ASCENDING), ("_id", ASCENDING), ("age", ASCENDING)],
+            name="feed_orientation_looking_for",
+        ),
+        IndexModel(
+            [("romantic_orientation", ASCENDING), ("_id", ASCENDING), ("age", ASCENDING)],
+            name="feed_romantic_orientation",
+        ),
+        # The same three behind the visible_to equality, for a signed-in
+        # viewer (whose feed always carries it).
+        IndexModel(
+            [("visible_to", ASCENDING), ("city", ASCENDING), ("gender", ASCENDING), ("_id", ASCENDING),
+             ("age", ASCENDING)],
+            name="visible_to_city_gender",
+        ),
+        IndexModel(
+            [("visible_to", ASCENDING), ("orientation", ASCENDING), ("looking_for", ASCENDING),
+             ("_id", ASCENDING), ("age", ASCENDING)],
+            name="visible_to_orientation_looking_for",
+        ),
+        IndexModel(
+            [("visible_to", ASCENDING), ("romantic_orientation", ASCENDING), ("_id", ASCENDING),
+             ("age", ASCENDING)],
+            name="visible_to_romantic_orientation",
+        ),
+        # Feed ?sort= orders other than _id (newest walks the _id / visible_to_id
+        # indexes backwards): sort key then the _id tie-breaker, alone and
+        # behind the visible_to equality.
+        IndexModel([("last_active_at", DESCENDING), ("_id", DESCENDING)], name="feed_recently_active"),
+        IndexModel(
+            [("visible_to", ASCENDING), ("last_active_at", DESCENDING), ("_id", DESCENDING)],
+            name="visible_to_recently_active",
+        ),
+        IndexModel([("age", ASCENDING), ("_id", ASCENDING)], name="feed_age"),
+        IndexModel([("visible_to", ASCENDING), ("age", ASCENDING), ("_id", ASCENDING)], name="visible_to_age"),
+    ],
+    "account_deletions": [
+        # run_account_deletions: unfinished jobs (api/accounts.py).
+        IndexModel([("state", ASCENDING)], name="state"),
+    ],
+    "likes": [
+        # One edge per (liker, likee); also serves "my saves" in save order
+        # via the forward index below and the match existence check.
+        IndexModel([("liker", ASCENDING), ("likee", ASCENDING)], name="liker_likee_unique", unique=True),
+        # likee is the keyset tie-breaker for saved-profile pages.
+        IndexModel(
+            [("liker", ASCENDING), ("created_at", ASCENDING), ("likee", ASCENDING)],
+            name="saved",
+        ),
+        # Reverse edge: who liked me, newest first (LikedByView).
+        # liker is the keyset tie-breaker and makes ids-only reads covered.
+        IndexModel(
+            [("likee", ASCENDING), ("created_at", DESCENDING), ("liker", DESCENDING)],
+            name="liked_by",
+        ),
+    ],
+    "letters": [
+        # InboxView: newest letters for a receiver, _id as keyset tie-breaker.
+        IndexModel(
+            [("receiver_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="inbox",
+        ),
+        # InboxView ?unread_only=1, and the one-off unread_letters backfill
+        # count ({"receiver_id": uid, "read_at": None}).
+        IndexModel(
+            [("receiver_id", ASCENDING), ("read_at", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="unread",
+        ),
+        # WriteLatterView: one letter per (sender, receiver), enforced by
+        # the server instead of a read-then-insert.
+        IndexModel(
+            [("sender_id", ASCENDING), ("receiver_id", ASCENDING)],
+            name="sender_receiver_unique",
+            unique=True,
+        ),
+    ],
+    "image_thumbs": [
+        # build_thumbnails freshness check and the thumbnail reset in
+        # ProfileView.put; /api/thumbs reads by _id ("<user id>:<size>").
+        IndexModel([("user_id", ASCENDING), ("source_url", ASCENDING)], name="user_source"),
+    ],
+    "cloudinary_deletions": [
+        # drain_cloudinary_deletions: due ids oldest first (api/cloudinary_queue.py).
+        IndexModel([("state", ASCENDING), ("next_attempt_at", ASCENDING)], name="state_next_attempt"),
+    ],
+    "seen": [
+        # Seen sets are read by _id; this only expires them (api/seen.py).
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+
+# Representative query of every view, with placeholder values. Each entry
+# is (name, collection, filter, sort or None).
+_SAMPLE_ID = ObjectId("000000000000000000000000")
+# what feed_page / random / the profile reads add to every users query
+_LIVE = {"deleted_at": None}
+_VISIBLE = {"visible_to": "Woman", **_LIVE}
+
+
+def _age(bounds):
+    """build_feed_filters' age clause."""
+    return {"$and": [{"$or": [{"age": bounds}, {"age": None}]}]}
+
+
+QUERY_SHAPES = [
+    ("require_session", "users", {"_id": _SAMPLE_ID}, None),
+    ("signup/login username", "users", {"username": "sample"}, None),
+    ("saved ids", "likes", {"liker": _SAMPLE_ID}, [("created_at", ASCENDING)]),
+    ("likedby ids", "likes", {"likee": _SAMPLE_ID}, [("created_at", DESCENDING)]),
+    (
+        "likedby page",
+        "likes",
+        {"likee": _SAMPLE_ID, "$or": [
+            {"created_at": {"$lt": _SAMPLE_ID.generation_time}},
+            {"created_at": _SAMPLE_ID.generation_time, "liker": {"$lt": _SAMPLE_ID}},
+        ]},
+        [("created_at", DESCENDING), ("liker", DESCENDING)],
+    ),
+    ("match check", "likes", {"liker": _SAMPLE_ID, "likee": _SAMPLE_ID}, None),
+    ("profilessaved", "users", {"_id": {"$in": [_SAMPLE_ID]}, **_LIVE}, None),
+    ("live profile", "users", {"_id": _SAMPLE_ID, **_LIVE}, None),
+    ("feed anonymous", "users", {**_LIVE, "_id": {"$gt": _SAMPLE_ID}}, [("_id", ASCENDING)]),
+    (
+        "feed city+gender anonymous",
+        "users",
+        {"city": {"$in": ["a", "b"]}, "gender": "Woman", **_age({"$gte": 18}), **_LIVE},
+        [("_id", ASCENDING)],
+    ),
+    ("feed", "users", {**_VISIBLE, "_id": {"$gt": _SAMPLE_ID, "$ne": _SAMPLE_ID}}, [("_id", ASCENDING)]),
+    (
+        "feed city+gender",
+        "users",
+        {"city": "gush-dan", "gender": "Woman", **_age({"$gte": 18}), **_VISIBLE, "_id": {"$ne": _SAMPLE_ID}},
+        [("_id", ASCENDING)],
+    ),
+    (
+        "feed orientation",
+        "users",
+        {"orientation": "Ace", **_age({"$lte": 40}), **_VISIBLE, "_id": {"$ne": _SAMPLE_ID}},
+        [("_id", ASCENDING)],
+    ),
+    (
+        "feed romantic_orientation",
+        "users",
+        {"romantic_orientation": "Aromantic", **_VISIBLE, "_id": {"$ne": _SAMPLE_ID}},
+        [("_id", ASCENDING)],
+    ),
+    ("feed newest", "users", {**_VISIBLE, "_id": {"$lt": _SAMPLE_ID, "$ne": _SAMPLE_ID}}, [("_id", DESCENDING)]),
+    (
+        "feed recently_active",
+        "users",
+        {**_VISIBLE, "_id": {"$ne": _SAMPLE_ID}, "$or": [
+            {"last_active_at": {"$lt": _SAMPLE_ID.generation_time}},
+            {"last_active_at": _SAMPLE_ID.generation_time, "_id": {"$lt": _SAMPLE_ID}},
+            {"last_active_at": None},
+        ]},
+        [("last_active_at", DESCENDING), ("_id", DESCENDING)],
+    ),
+    (
+        "feed age_asc",
+        "users",
+        {**_VISIBLE, "$or": [{"age": {"$gt": 30}}, {"age": 30, "_id": {"$gt": _SAMPLE_ID}}]},
+        [("age", ASCENDING), ("_id", ASCENDING)],
+    ),
+    (
+        "feed age_asc anonymous",
+        "users",
+        {**_LIVE, "$or": [{"age": {"$gt": 30}}, {"age": 30, "_id": {"$gt": _SAMPLE_ID}}]},
+        [("age", ASCENDING), ("_id", ASCENDING)],
+    ),
+    ("random pick", "users", {**_LIVE, "_id": {"$ne": _SAMPLE_ID}, "rand": {"$gte": 0.5}}, [("rand", ASCENDING)]),
+    (
+        "random pick visibility",
+        "users",
+        {**_VISIBLE, "_id": {"$ne": _SAMPLE_ID}, "rand": {"$gte": 0.5}},
+        [("rand", ASCENDING)],
+    ),
+    ("inbox", "letters", {"receiver_id": _SAMPLE_ID}, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    (
+        "inbox unread page",
+        "letters",
+        {"receiver_id": _SAMPLE_ID, "read_at": None},
+        [("created_at", DESCENDING), ("_id", DESCENDING)],
+    ),
+    ("writelatter dedupe", "letters", {"sender_id": _SAMPLE_ID, "receiver_id": _SAMPLE_ID}, None),
+    ("letter by id", "letters", {"_id": _SAMPLE_ID}, None),
+    ("unread count", "letters", {"receiver_id": _SAMPLE_ID, "read_at": None}, None),
+    ("seen set", "seen", {"_id": _SAMPLE_ID}, None),
+    ("thumbnails of user", "image_thumbs", {"user_id": _SAMPLE_ID}, None),
+    ("unfinished account deletions", "account_deletions", {"state": {"$ne": "done"}}, None),
+    (
+        "due cloudinary deletions",
+        "cloudinary_deletions",
+        {"state": "pending", "next_attempt_at": {"$lte": datetime(2000, 1, 1)}},
+        [("next_attempt_at", ASCENDING)],
+    ),
+]
+
+
+def _spec(model):
+    doc = model.document
+    return list(doc["key"].items()), bool(doc.get("unique"))
+
+
+def index_drift(db):
+    """
+    Compares declared indexes with what the server has.
+
+    Returns a list of (collection, index name, problem) tuples; problem is
+    "missing", "extra" or a description of a key/option mismatch. The
+    implicit _id_ index is ignored.
+    """
+    drift = []
+    for coll_name, models in INDEXES.items():
+        actual = db[coll_name].index_information()
+        declared = {m.document["name"]: _spec(m) for m in models}
+
+        for name, (keys, unique) in declared.items():
+            info = actual.get(name)
+            if info is None:
+                drift.append((coll_name, name, "missing"))
+                continue
+            actual_keys = [(k, v) for k, v in info["key"]]
+            if actual_keys != keys:
+                drift.append((coll_name, name, f"keys {actual_keys} != declared {keys}"))
+            if bool(info.get("unique")) != unique:
+                drift.append((coll_name, name, f"unique={bool(info.get('unique'))} != declared unique={unique}"))
+
+        for name in actual:
+            if name != "_id_" and name not in declared:
+                drift.append((coll_name, name, "extra"))
+    return drift
+
+
+def ensure_indexes(db):
+    """
+    Builds every declared index that does not exist yet.
+
+    Indexes are created one at a time with background=True, so one that
+    cannot be built (e.g. a unique index over duplicate data) doesn't stop
+    the others. Returns (created names, [(name, error)]).
+    """
+    created, failed = [], []
+    for coll_name, models in INDEXES.items():
+        coll = db[coll_name]
+        existing = set(coll.index_information())
+        for model in models:
+            doc = model.document
+            name = doc["name"]
+            if name in existing:
+                continue
+            options = {k: v for k, v in doc.items() if k != "key"}
+            try:
+                coll.create_index(list(doc["key"].items()), background=True, **options)
+                created.append(f"{coll_name}.{name}")
+            except OperationFailure as e:
+                failed.append((f"{coll_name}.{name}", str(e)))
+    return created, failed
+
+
+def _stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for v in plan.values():
+            yield from _stages(v)
+    elif isinstance(plan, list):
+        for v in plan:
+            yield from _stages(v)
+
+
+def explain_shapes(db):
+    """
+    Runs explain() on every entry of QUERY_SHAPES.
+
+    Returns a list of (name, winning plan stages, uses_collscan).
+    """
+    out = []
+    for name, coll_name, filt, sort in QUERY_SHAPES:
+        cursor = db[coll_name].find(filt)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        stages = list(_stages(plan))
+        out.append((name, stages, "COLLSCAN" in stages))
+    return out
@@ -0,0 +1,72 @@
+"""
+Letters: inbox paging and the maintained unread counter.
+
+Every user carries `unread_letters`, moved with an atomic $inc on each
+send / read / delete that changes the number of unread letters, so
+"anything new?" is answered from the user document instead of a count
+over `letters`.
+
+The $inc only applies once the counter exists. Users from before it get
+it computed from `letters` on their first unread_count() and kept up to
+date from then on; an unconditional $inc would create it at +1 / -1
+next to letters it never counted, and nothing would correct that.
+"""
+from .cursors import after, decode_cursor, encode_cursor
+
+
+def bump_unread(db, receiver_id, delta):
+    db["users"].update_one(
+        {"_id": receiver_id, "unread_letters": {"$exists": True}},
+        {"$inc": {"unread_letters": delta}},
+    )
+
+
+def unread_count(db, uid, user_doc=None):
+    """
+    The user's unread letter count. Uses `user_doc["unread_letters"]` when
+    the caller already loaded it; users from before the counter existed
+    get it computed once from the (receiver_id, read_at) index and stored.
+    """
+    if user_doc is None:
+        user_doc = db["users"].find_one({"_id": uid}, {"unread_letters": 1}) or {}
+    if user_doc.get("unread_letters") is not None:
+        return max(0, int(user_doc["unread_letters"]))
+
+    n = db["letters"].count_documents({"receiver_id": uid, "read_at": None})
+    db["users"].update_one(
+        {"_id": uid, "unread_letters": {"$exists": False}},
+        {"$set": {"unread_letters": n}},
+    )
+    return n
+
+
+INBOX_SORT = [("created_at", -1), ("_id", -1)]
+
+
+def inbox_query(uid, cursor=None, unread_only=False):
+    """Filter for uid's inbox page after `cursor` (read in INBOX_SORT order)."""
+    q = {"receiver_id": uid}
+    if unread_only:
+        q["read_at"] = None
+    position = decode_cursor(cursor, 2)
+    if position:
+        q.update(after("created_at", "_id", position, descending=True))
+    return q
+
+
+def inbox_result(docs, limit):
+    """(letters, next_cursor, has_more) from the up to limit + 1 letters read."""
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = encode_cursor(docs[-1]["created_at"], docs[-1]["_id"]) if (has_more and docs) else None
+    return docs, next_cursor, has_more
+
+
+def inbox_page(db, uid, limit, cursor=None, unread_only=False):
+    """
+    One page of uid's letters, newest first, keyset-paged on
+    (created_at, _id). Returns (letters, next_cursor, has_more).
+    The async inbox runs the same inbox_query / inbox_result.
+    """
+    docs = list(db["letters"].find(inbox_query(uid, cursor, unread_only)).sort(INBOX_SORT).limit(limit + 1))
+    return inbox_result(docs, limit)
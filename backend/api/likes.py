@@ -0,0 +1,219 @@
+"""
+Likes as an edge collection.
+
+One document per like in `likes`: {liker, likee, created_at}, unique on
+(liker, likee). The forward index (liker, created_at) serves "who did I
+save", the reverse index (likee, created_at) serves "who liked me", and
+a match is a single indexed existence check on the reverse edge. Each
+user carries maintained `likes_given` / `likes_received` counters, so
+counts never need a scan.
+
+This replaces the old `users.liked` array (see `manage.py migrate_likes`
+for the one-off move); the API keeps returning the same shapes.
+"""
+import asyncio
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from .accounts import LIVE_PROFILE
+from .cursors import after, decode_cursor, encode_cursor
+
+
+def _counter_ops(liker, likee, delta, now):
+    return [
+        UpdateOne({"_id": liker}, {"$inc": {"likes_given": delta}, "$set": {"likes_updated_at": now}}),
+        UpdateOne({"_id": likee}, {"$inc": {"likes_received": delta}}),
+    ]
+
+
+def _both_live(liker, likee):
+    return {"_id": {"$in": [liker, likee]}, **LIVE_PROFILE}
+
+
+def add_like(db, liker, likee):
+    """
+    Records liker -> likee. Idempotent: counters only move when the edge
+    is new. Returns (created, is_match), or None without writing anything
+    if either user is gone or tombstoned (api/accounts.py), so no edge
+    or counter lands on an account being deleted.
+    """
+    if db["users"].count_documents(_both_live(liker, likee)) < 2:
+        return None
+
+    now = datetime.utcnow()
+    res = db["likes"].update_one(
+        {"liker": liker, "likee": likee},
+        {"$setOnInsert": {"created_at": now}},
+        upsert=True,
+    )
+    created = res.upserted_id is not None
+    if created:
+        db["users"].bulk_write(_counter_ops(liker, likee, 1, now), ordered=False)
+
+    return created, is_match(db, liker, likee)
+
+
+def remove_like(db, liker, likee):
+    """Deletes liker -> likee if present. Returns True if an edge was removed."""
+    res = db["likes"].delete_one({"liker": liker, "likee": likee})
+    if res.deleted_count:
+        db["users"].bulk_write(_counter_ops(liker, likee, -1, datetime.utcnow()), ordered=False)
+    return bool(res.deleted_count)
+
+
+def is_match(db, liker, likee):
+    """True if likee has liked liker back (one indexed lookup)."""
+    return db["likes"].find_one({"liker": likee, "likee": liker}, {"_id": 1}) is not None
+
+
+def liked_ids(db, uid):
+    """Ids uid has liked, oldest save first (the old array order)."""
+    cur = db["likes"].find({"liker": uid}, {"likee": 1, "_id": 0}).sort("created_at", 1)
+    return [d["likee"] for d in cur]
+
+
+def liked_by_ids(db, uid):
+    """Ids of users who liked uid, newest first."""
+    cur = db["likes"].find({"likee": uid}, {"liker": 1, "_id": 0}).sort("created_at", -1)
+    return [d["liker"] for d in cur]
+
+
+def liked_by_page(db, uid, limit, cursor=None):
+    """
+    One page of the users who liked uid, newest like first, keyset-paged
+    on (created_at, liker) over the reverse index.
+    Returns (liker ids, next_cursor, has_more).
+    """
+    q = {"likee": uid}
+    after_values = decode_cursor(cursor, 2)
+    if after_values:
+        q.update(after("created_at", "liker", after_values, descending=True))
+
+    edges = list(
+        db["likes"].find(q, {"liker": 1, "created_at": 1, "_id": 0})
+        .sort([("created_at", -1), ("liker", -1)])
+        .limit(limit + 1)
+    )
+    has_more = len(edges) > limit
+    edges = edges[:limit]
+    next_cursor = encode_cursor(edges[-1]["created_at"], edges[-1]["liker"]) if (has_more and edges) else None
+    return [e["liker"] for e in edges], next_cursor, has_more
+
+
+# Edges read per hydration round trip, and how many rounds one request
+# may spend looking for filter matches before returning a short page.
+SAVED_SCAN_BATCH = 100
+SAVED_MAX_SCAN_ROUNDS = 10
+
+
+def saved_page(db, uid, limit, cursor=None, profile_filter=None, matches_only=False, projection=None, load=None):
+    """
+    One page of the profiles uid saved, in save order (oldest first),
+    keyset-paged on (created_at, likee) over the forward index.
+
+    Edges are read in bounded batches; each batch is hydrated with a
+    single `$in` query (plus `profile_filter`, and for matches_only one
+    reverse-edge `$in` lookup) and put back into save order in memory.
+    Filtered pages keep scanning until they hold `limit` profiles or
+    SAVED_MAX_SCAN_ROUNDS batches were read, so one request stays bounded;
+    the cursor always points at the last edge scanned. Unfiltered batches
+    are hydrated through `load(ids) -> {_id: doc}` when given (the
+    profile cache).
+    Returns (profile docs, next_cursor, has_more).
+    """
+    users = db["users"]
+    likes = db["likes"]
+    position = decode_cursor(cursor, 2)
+
+    out = []
+    has_more = False
+    batch_size = limit + 1 if not (profile_filter or matches_only) else max(limit + 1, SAVED_SCAN_BATCH)
+
+    for _ in range(SAVED_MAX_SCAN_ROUNDS):
+        q = {"liker": uid}
+        if position:
+            q.update(after("created_at", "likee", position, descending=False))
+        edges = list(
+            likes.find(q, {"likee": 1, "created_at": 1, "_id": 0})
+            .sort([("created_at", 1), ("likee", 1)])
+            .limit(batch_size)
+        )
+        if not edges:
+            has_more = False
+            break
+
+        ids = [e["likee"] for e in edges]
+        if load is not None and not profile_filter:
+            by_id = load(ids)
+        else:
+            hq = {"_id": {"$in": ids}, **LIVE_PROFILE}
+            hq.update(profile_filter or {})
+            by_id = {d["_id"]: d for d in users.find(hq, projection)}
+        if matches_only and by_id:
+            mutual = {d["liker"] for d in likes.find({"liker": {"$in": list(by_id)}, "likee": uid}, {"liker": 1})}
+            by_id = {k: v for k, v in by_id.items() if k in mutual}
+
+        for e in edges:
+            position = (e["created_at"], e["likee"])
+            doc = by_id.get(e["likee"])
+            if doc is not None:
+                out.append(doc)
+            if len(out) == limit:
+                break
+
+        # more edges remain if this batch was full or we stopped inside it
+        has_more = len(edges) == batch_size or position != (edges[-1]["created_at"], edges[-1]["likee"])
+        if len(out) == limit or not has_more:
+            break
+
+    next_cursor = encode_cursor(*position) if (has_more and position) else None
+    return out, next_cursor, has_more
+
+
+def liked_by_count(db, uid):
+    """How many users liked uid: the maintained counter, else an index count."""
+    doc = db["users"].find_one({"_id": uid}, {"likes_received": 1})
+    if doc and doc.get("likes_received") is not None:
+        return max(0, int(doc["likes_received"]))
+    return db["likes"].count_documents({"likee": uid})
+
+
+# ----------------------------
+# Async twins (AsyncMongoClient database)
+# ----------------------------
+async def aadd_like(db, liker, likee):
+    if await db["users"].count_documents(_both_live(liker, likee)) < 2:
+        return None
+
+    now = datetime.utcnow()
+    # the reverse-edge check doesn't depend on our write: run both at once
+    res, match = await asyncio.gather(
+        db["likes"].update_one(
+            {"liker": liker, "likee": likee},
+            {"$setOnInsert": {"created_at": now}},
+            upsert=True,
+        ),
+        ais_match(db, liker, likee),
+    )
+    created = res.upserted_id is not None
+    if created:
+        await db["users"].bulk_write(_counter_ops(liker, likee, 1, now), ordered=False)
+
+    return created, match
+
+
+async def aremove_like(db, liker, likee):
+    res = await db["likes"].delete_one({"liker": liker, "likee": likee})
+    if res.deleted_count:
+        await db["users"].bulk_write(_counter_ops(liker, likee, -1, datetime.utcnow()), ordered=False)
+    return bool(res.deleted_count)
+
+
+async def ais_match(db, liker, likee):
+    return await db["likes"].find_one({"liker": likee, "likee": liker}, {"_id": 1}) is not None
+
+
+async def aliked_ids(db, uid):
+    cur = db["likes"].find({"liker": uid}, {"likee": 1, "_id": 0}).sort("created_at", 1)
+    return [d["likee"] async for d in cur]
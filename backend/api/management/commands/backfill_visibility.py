@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.mongo import get_db
+from api.visibility import backfill_visibility, visibility_drift
+
+
+class Command(BaseCommand):
+    help = (
+        "Normalizes `preference` and writes the derived `visible_to` list "
+        "on every profile, in _id-ordered batches. With --check, only "
+        "reports profiles whose visible_to disagrees with their preference."
+    )
+    # what fills in the visible_to the mongo visibility check asks for
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--missing-only", action="store_true", help="Only profiles without visible_to.")
+        parser.add_argument("--check", action="store_true", help="Report drift, change nothing.")
+        parser.add_argument("--limit", type=int, default=20, help="Drifted profiles to list with --check.")
+
+    def handle(self, *args, **options):
+        users = get_db()["users"]
+
+        if options["check"]:
+            drift = list(visibility_drift(users, limit=options["limit"]))
+            for _id, stored, expected in drift:
+                self.stdout.write(f"  {_id}: visible_to={stored!r}, expected {expected!r}")
+            if drift:
+                raise CommandError(
+                    f"{len(drift)} profile(s) with inconsistent visible_to "
+                    f"(listing at most {options['limit']}); run backfill_visibility"
+                )
+            self.stdout.write(self.style.SUCCESS("visible_to is consistent with preference"))
+            return
+
+        started = time.monotonic()
+        changed = backfill_visibility(
+            users,
+            batch_size=max(1, options["batch_size"]),
+            only_missing=options["missing_only"],
+            on_batch=lambda last, n: self.stdout.write(f"  through _id {last}: {n} updated"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"{changed} profiles updated in {time.monotonic() - started:.1f}s"))
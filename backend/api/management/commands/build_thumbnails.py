@@ -0,0 +1,110 @@
+import time
+import urllib.request
+
+from django.core.management.base import BaseCommand
+
+from api.images import (
+    fallback_sizes,
+    parse_cloudinary_url,
+    render_thumbnails,
+    store_thumbnails,
+    trusted_image_url,
+)
+from api.mongo import get_db
+
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+
+class _TrustedRedirects(urllib.request.HTTPRedirectHandler):
+    """Follows a redirect only if it stays on settings.IMAGE_HOSTS."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        if not trusted_image_url(newurl):
+            raise ValueError(f"redirect to untrusted URL {newurl!r}")
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+# no file://, ftp:// or data: handlers: https (and http for the handler
+# chain) only, each URL checked by trusted_image_url first
+_opener = urllib.request.OpenerDirector()
+for _handler in (
+    urllib.request.HTTPHandler(),
+    urllib.request.HTTPSHandler(),
+    urllib.request.HTTPDefaultErrorHandler(),
+    urllib.request.HTTPErrorProcessor(),
+    _TrustedRedirects(),
+):
+    _opener.add_handler(_handler)
+
+
+def download(url, timeout):
+    """The image at url, which must be https on settings.IMAGE_HOSTS."""
+    if not trusted_image_url(url):
+        raise ValueError("not an https URL on IMAGE_HOSTS")
+    req = urllib.request.Request(url, headers={"User-Agent": "acedating-thumbnailer"})
+    with _opener.open(req, timeout=timeout) as resp:
+        data = resp.read(MAX_IMAGE_BYTES + 1)
+    if len(data) > MAX_IMAGE_BYTES:
+        raise ValueError("image too large")
+    return data
+
+
+class Command(BaseCommand):
+    help = (
+        "Makes square WebP thumbnails (api.images.fallback_sizes) with Pillow "
+        "for profile photos that are not hosted on Cloudinary, stored in "
+        "`image_thumbs` and served from /api/thumbs/<user id>/<size>. "
+        "Profiles whose thumbnails match their current image_url are skipped, "
+        "and so are images not served over https from settings.IMAGE_HOSTS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--force", action="store_true", help="Rebuild existing thumbnails.")
+        parser.add_argument("--timeout", type=float, default=15.0, help="Download timeout in seconds.")
+
+    def handle(self, *args, **options):
+        db = get_db()
+        users = db["users"]
+        thumbs = db["image_thumbs"]
+        sizes = fallback_sizes()
+        batch_size = max(1, options["batch_size"])
+
+        q = {"image_url": {"$nin": [None, ""], "$not": {"$regex": r"^https?://res\.cloudinary\.com/"}}}
+        last = None
+        built = skipped = untrusted = failed = 0
+        started = time.monotonic()
+
+        while True:
+            page = dict(q)
+            if last is not None:
+                page["_id"] = {"$gt": last}
+            docs = list(users.find(page, {"image_url": 1}).sort("_id", 1).limit(batch_size))
+            if not docs:
+                break
+            last = docs[-1]["_id"]
+
+            for d in docs:
+                url = d["image_url"]
+                if parse_cloudinary_url(url):
+                    continue
+                if not trusted_image_url(url):
+                    # never fetch client-supplied URLs off the allow-list
+                    untrusted += 1
+                    continue
+                if not options["force"]:
+                    have = thumbs.count_documents({"user_id": d["_id"], "source_url": url})
+                    if have >= len(sizes):
+                        skipped += 1
+                        continue
+                try:
+                    store_thumbnails(db, d["_id"], url, render_thumbnails(download(url, options["timeout"]), sizes))
+                    built += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"  {d['_id']}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{built} built, {skipped} up to date, {untrusted} not on IMAGE_HOSTS, {failed} failed "
+            f"in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.cloudinary_queue import BATCH_MAX, StubDeleter, cloudinary_deleter, drain
+from api.mongo import get_db
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes the Cloudinary assets queued in `cloudinary_deletions` by "
+        "/api/cloudinary/delete, up to 100 public_ids per delete_resources "
+        "call. Failed ids are retried with exponential backoff. With --loop "
+        "it keeps polling (the `cloudinary` procfile worker)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_MAX)
+        parser.add_argument("--loop", action="store_true", help="Keep draining until interrupted.")
+        parser.add_argument("--interval", type=float, default=10.0, help="Seconds between polls with --loop.")
+        parser.add_argument("--stub", action="store_true", help="Use a local stub instead of the Admin API.")
+
+    def handle(self, *args, **options):
+        db = get_db()
+        deleter = StubDeleter() if options["stub"] else cloudinary_deleter
+        batch_size = max(1, min(options["batch_size"], BATCH_MAX))
+
+        while True:
+            started = time.monotonic()
+            deleted, retried = drain(db, deleter, batch_size)
+            if deleted or retried or not options["loop"]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{deleted} deleted, {retried} to retry in {time.monotonic() - started:.1f}s"
+                ))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.indexes import ensure_indexes, explain_shapes, index_drift
+from api.mongo import get_db
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the Mongo indexes declared in api/indexes.py, reports drift "
+        "between declared and actual indexes, and explains every view's "
+        "query shape to make sure none of them does a COLLSCAN."
+    )
+    # this is what fixes the drift the strict index check reports
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report drift and plans; don't build anything.",
+        )
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help="Exit with an error on missing / mismatched indexes, failed builds or any COLLSCAN.",
+        )
+        parser.add_argument(
+            "--no-explain",
+            action="store_true",
+            help="Skip the explain() pass.",
+        )
+
+    def handle(self, *args, **options):
+        db = get_db()
+        problems = 0
+
+        if not options["check"]:
+            created, failed = ensure_indexes(db)
+            for name in created:
+                self.stdout.write(self.style.SUCCESS(f"created {name}"))
+            for name, error in failed:
+                self.stdout.write(self.style.ERROR(f"failed  {name}: {error}"))
+            problems += len(failed)
+
+        drift = index_drift(db)
+        for coll_name, name, problem in drift:
+            self.stdout.write(self.style.WARNING(f"drift   {coll_name}.{name}: {problem}"))
+        # undeclared extra indexes are reported, but don't fail --strict
+        problems += sum(1 for _, _, problem in drift if problem != "extra")
+
+        if not options["no_explain"]:
+            for name, stages, collscan in explain_shapes(db):
+                line = f"plan    {name}: {' > '.join(stages) or '?'}"
+                if collscan:
+                    self.stdout.write(self.style.ERROR(line + "  <-- COLLSCAN"))
+                    problems += 1
+                else:
+                    self.stdout.write(line)
+
+        if problems and options["strict"]:
+            raise CommandError(f"{problems} index problem(s) found")
+
+        if not problems:
+            self.stdout.write(self.style.SUCCESS("indexes OK"))
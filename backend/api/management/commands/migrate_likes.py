@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+
+from api.mongo import get_db
+from api.views import oid
+
+STATE_ID = "likes_from_arrays"
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves likes from the embedded users.liked arrays into the `likes` "
+        "edge collection, in _id-ordered batches with a checkpoint so an "
+        "interrupted run resumes where it stopped. Then recomputes the "
+        "likes_given / likes_received counters."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Users per batch.")
+        parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint.")
+        parser.add_argument(
+            "--unset-arrays",
+            action="store_true",
+            help="Remove users.liked once a user's edges are written.",
+        )
+        parser.add_argument("--skip-recount", action="store_true", help="Don't recompute counters.")
+
+    def handle(self, *args, **options):
+        db = get_db()
+        users = db["users"]
+        likes = db["likes"]
+        state = db["migration_state"]
+        batch_size = max(1, options["batch_size"])
+
+        checkpoint = None if options["restart"] else (state.find_one({"_id": STATE_ID}) or {}).get("last_id")
+        if checkpoint:
+            self.stdout.write(f"resuming after _id {checkpoint}")
+
+        users_done = edges_done = 0
+        while True:
+            q = {"liked": {"$exists": True}}
+            if checkpoint:
+                q["_id"] = {"$gt": checkpoint}
+            batch = list(users.find(q, {"liked": 1, "updated_at": 1}).sort("_id", 1).limit(batch_size))
+            if not batch:
+                break
+
+            ops = []
+            for u in batch:
+                raw = u.get("liked") or []
+                # Legacy likes have no timestamp: space them 1ms apart,
+                # ending at the user's last update, so save order (array
+                # order) is kept and they sort before any new like.
+                base = u.get("updated_at") or datetime.utcnow()
+                for i, x in enumerate(raw):
+                    likee = oid(x)
+                    if not likee or likee == u["_id"]:
+                        continue
+                    ops.append(UpdateOne(
+                        {"liker": u["_id"], "likee": likee},
+                        {"$setOnInsert": {"created_at": base - timedelta(milliseconds=len(raw) - i)}},
+                        upsert=True,
+                    ))
+            if ops:
+                likes.bulk_write(ops, ordered=False)
+
+            if options["unset_arrays"]:
+                users.update_many({"_id": {"$in": [u["_id"] for u in batch]}}, {"$unset": {"liked": ""}})
+
+            checkpoint = batch[-1]["_id"]
+            state.update_one({"_id": STATE_ID}, {"$set": {"last_id": checkpoint, "updated_at": datetime.utcnow()}}, upsert=True)
+            users_done += len(batch)
+            edges_done += len(ops)
+            self.stdout.write(f"batch up to {checkpoint}: {len(batch)} users, {len(ops)} edges")
+
+        self.stdout.write(self.style.SUCCESS(f"edges done: {users_done} users, {edges_done} edges upserted"))
+
+        if not options["skip_recount"]:
+            self.recount(users, likes, batch_size)
+
+        state.update_one({"_id": STATE_ID}, {"$set": {"completed_at": datetime.utcnow()}}, upsert=True)
+
+    def recount(self, users, likes, batch_size):
+        """Sets likes_given / likes_received from the edges, batch by batch."""
+        last = None
+        total = 0
+        while True:
+            q = {"_id": {"$gt": last}} if last else {}
+            ids = [d["_id"] for d in users.find(q, {"_id": 1}).sort("_id", 1).limit(batch_size)]
+            if not ids:
+                break
+
+            given = {d["_id"]: d["n"] for d in likes.aggregate([
+                {"$match": {"liker": {"$in": ids}}},
+                {"$group": {"_id": "$liker", "n": {"$sum": 1}}},
+            ])}
+            received = {d["_id"]: d["n"] for d in likes.aggregate([
+                {"$match": {"likee": {"$in": ids}}},
+                {"$group": {"_id": "$likee", "n": {"$sum": 1}}},
+            ])}
+            users.bulk_write([
+                UpdateOne({"_id": i}, {"$set": {"likes_given": given.get(i, 0), "likes_received": received.get(i, 0)}})
+                for i in ids
+            ], ordered=False)
+
+            last = ids[-1]
+            total += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(f"counters recomputed for {total} users"))
@@ -0,0 +1,84 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.mongo import get_db
+from api.mongomigrate import DEFAULT_BATCH_SIZE, discover, mark_applied, run, status
+
+
+class Command(BaseCommand):
+    help = (
+        "Applies the pending data migrations in api/mongo_migrations in "
+        "order, in _id-ordered batches, recording progress in "
+        "`mongo_migrations` so an interrupted run resumes where it stopped. "
+        "Pass a migration name to run only that one."
+    )
+    # what fills in the visible_to the mongo visibility check asks for
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", nargs="?", help="Only this migration (e.g. 0001_preference_arrays).")
+        parser.add_argument("--list", action="store_true", help="Show every migration and its state.")
+        parser.add_argument("--dry-run", action="store_true", help="Count what would change, write nothing.")
+        parser.add_argument("--fake", action="store_true", help="Record as applied without running.")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--sleep", type=float, default=0.0, help="Seconds to pause between batches.")
+        parser.add_argument("--max-rate", type=float, default=None, help="At most this many documents per second.")
+
+    def handle(self, *args, **options):
+        db = get_db()
+        migrations = discover()
+        records = status(db)
+
+        if options["list"]:
+            for name, migration in migrations.items():
+                rec = records.get(name) or {}
+                state = rec.get("state", "pending")
+                progress = f" (through _id {rec['last_id']})" if state == "running" and rec.get("last_id") else ""
+                self.stdout.write(f"  [{state}] {name}{progress}  {migration.description}")
+            return
+
+        if options["name"]:
+            if options["name"] not in migrations:
+                raise CommandError(f"Unknown migration {options['name']!r}")
+            names = [options["name"]]
+        else:
+            names = [n for n in migrations if (records.get(n) or {}).get("state") != "applied"]
+
+        if not names:
+            self.stdout.write(self.style.SUCCESS("No migrations to apply"))
+            return
+
+        for name in names:
+            if options["fake"]:
+                mark_applied(db, name)
+                self.stdout.write(self.style.SUCCESS(f"{name}: marked as applied"))
+                continue
+
+            rec = records.get(name) or {}
+            if rec.get("state") == "applied":
+                self.stdout.write(f"{name}: already applied")
+                continue
+            resume = f", resuming after _id {rec['last_id']}" if rec.get("last_id") else ""
+            self.stdout.write(f"{name}{' (dry run)' if options['dry_run'] else ''}{resume}")
+
+            totals = run(
+                db,
+                name,
+                migrations[name],
+                batch_size=max(1, options["batch_size"]),
+                dry_run=options["dry_run"],
+                sleep=max(0.0, options["sleep"]),
+                max_rate=options["max_rate"],
+                on_batch=self._report,
+            )
+            verb = "would change" if options["dry_run"] else "changed"
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: {totals['scanned']} scanned, {totals['changed']} {verb} "
+                f"in {totals['batches']} batches, {totals['seconds']:.1f}s"
+            ))
+
+    def _report(self, r):
+        rate = f"{r['docs_per_s']:.0f} docs/s" if r["docs_per_s"] else "-"
+        self.stdout.write(
+            f"  batch {r['batch']}: {r['scanned']} scanned, {r['changed']} changed, "
+            f"through _id {r['last_id']} ({r['seconds'] * 1000:.0f} ms, {rate})"
+        )
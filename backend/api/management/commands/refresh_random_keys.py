@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+
+from api.mongo import get_db
+from api.randomkey import new_random_key
+
+
+class Command(BaseCommand):
+    help = (
+        "Draws a fresh `rand` key for every profile (or only the ones "
+        "missing it), in _id-ordered batches. Run it periodically, e.g. "
+        "nightly, so random picks don't keep favouring the same profiles."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--missing-only", action="store_true", help="Only backfill profiles without a key.")
+        parser.add_argument("--sleep", type=float, default=0.0, help="Seconds to pause between batches.")
+
+    def handle(self, *args, **options):
+        users = get_db()["users"]
+        batch_size = max(1, options["batch_size"])
+
+        base = {"rand": {"$exists": False}} if options["missing_only"] else {}
+        last = None
+        total = 0
+        started = time.monotonic()
+
+        while True:
+            q = dict(base)
+            if last is not None:
+                q["_id"] = {"$gt": last}
+            ids = [d["_id"] for d in users.find(q, {"_id": 1}).sort("_id", 1).limit(batch_size)]
+            if not ids:
+                break
+
+            users.bulk_write(
+                [UpdateOne({"_id": i}, {"$set": {"rand": new_random_key()}}) for i in ids],
+                ordered=False,
+            )
+            last = ids[-1]
+            total += len(ids)
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"{total} random keys set in {time.monotonic() - started:.1f}s"))
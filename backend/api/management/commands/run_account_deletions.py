@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.accounts import DELETION_BATCH, run_cascade, unfinished_jobs
+from api.mongo import get_db
+from api.views import oid
+
+
+class Command(BaseCommand):
+    help = (
+        "Finishes account deletions (DELETE /api/profile/<id>) whose "
+        "background cascade was interrupted, resuming each from its last "
+        "checkpoint. Jobs another runner is working on are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user-id", help="Only this user's deletion.")
+        parser.add_argument("--batch-size", type=int, default=DELETION_BATCH)
+        parser.add_argument("--loop", action="store_true", help="Keep checking until interrupted.")
+        parser.add_argument("--interval", type=float, default=60.0, help="Seconds between checks with --loop.")
+
+    def handle(self, *args, **options):
+        db = get_db()
+        batch_size = max(1, options["batch_size"])
+
+        only = None
+        if options["user_id"]:
+            only = oid(options["user_id"])
+            if not only:
+                raise CommandError("Invalid --user-id")
+
+        while True:
+            started = time.monotonic()
+            ids = [only] if only else unfinished_jobs(db)
+            finished = busy = 0
+            for uid in ids:
+                job = run_cascade(db, uid, batch_size)
+                if job is None:
+                    busy += 1
+                    continue
+                finished += 1
+                counts = ", ".join(f"{k} {v}" for k, v in (job.get("counts") or {}).items())
+                self.stdout.write(f"  {uid}: {counts or 'nothing to remove'}")
+
+            if ids or not options["loop"]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{finished} finished, {busy} done or held by another runner "
+                    f"in {time.monotonic() - started:.1f}s"
+                ))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,40 @@
+import getpass
+from datetime import datetime
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+
+from api.mongo import get_db
+from api.sessions import bump_generation
+from api.views import oid
+
+
+class Command(BaseCommand):
+    help = (
+        "Sets a user's password (by _id or username) and signs them out "
+        "everywhere. Prompts for the password unless --password is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("user", help="User _id or username.")
+        parser.add_argument("--password", help="New password (prompted for if omitted).")
+
+    def handle(self, *args, **options):
+        users = get_db()["users"]
+
+        uid = oid(options["user"])
+        q = {"_id": uid} if uid else {"username": options["user"]}
+        user = users.find_one(q, {"_id": 1})
+        if not user:
+            raise CommandError(f"No user {options['user']!r}")
+
+        password = options["password"] or getpass.getpass("New password: ")
+        if len(password) < 6:
+            raise CommandError("Password must be at least 6 characters")
+
+        users.update_one(
+            {"_id": user["_id"]},
+            {"$set": {"password_hash": make_password(password), "updated_at": datetime.utcnow()}},
+        )
+        bump_generation(users, user["_id"])
+        self.stdout.write(self.style.SUCCESS(f"Password updated for {user['_id']}"))
@@ -0,0 +1,45 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .mongo import start_command_count, stop_command_count
+
+
+class MongoCommandCountMiddleware:
+    """
+    Counts the Mongo commands each request sends.
+
+    The per-command breakdown is left on `request.mongo_commands` and the
+    total is returned in the X-Mongo-Commands response header, so tests
+    and load runs can assert that an endpoint's round trips go down.
+    Works under both WSGI and ASGI (async views count their async-client
+    commands too).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start_command_count()
+        try:
+            response = self.get_response(request)
+        finally:
+            request.mongo_commands = stop_command_count()
+        return self._finish(request, response)
+
+    async def __acall__(self, request):
+        start_command_count()
+        try:
+            response = await self.get_response(request)
+        finally:
+            request.mongo_commands = stop_command_count()
+        return self._finish(request, response)
+
+    def _finish(self, request, response):
+        response["X-Mongo-Commands"] = str(sum(request.mongo_commands.values()))
+        return response
@@ -1,28 +1,260 @@
+import asyncio
 import os
-from pymongo import MongoClient
+import threading
+from contextvars import ContextVar
 
+from django.conf import settings
+from pymongo import AsyncMongoClient, MongoClient, monitoring
+
+
+# ----------------------------
+# Per-request command counting
+# ----------------------------
+# Holds a {command name: count} dict while a request is being served
+# (see api.middleware.MongoCommandCountMiddleware); None everywhere else,
+# so background monitor traffic (hello/ping) is never counted.
+_command_counts = ContextVar("mongo_command_counts", default=None)
+
+
+class _CommandCounter(monitoring.CommandListener):
+    def started(self, event):
+        counts = _command_counts.get()
+        if counts is not None:
+            counts[event.command_name] = counts.get(event.command_name, 0) + 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+_command_counter = _CommandCounter()
+
+
+def start_command_count():
+    """Starts counting Mongo commands for the current request/context."""
+    counts = {}
+    _command_counts.set(counts)
+    return counts
+
+
+def stop_command_count():
+    """Stops counting and returns the {command name: count} dict."""
+    counts = _command_counts.get()
+    _command_counts.set(None)
+    return counts or {}
+
+
+# ----------------------------
+# Connection pool metrics
+# ----------------------------
+class _PoolStats(monitoring.ConnectionPoolListener):
+    """
+    Live pool numbers for this process: open / in-use connections and
+    checkout wait times, to size gunicorn workers against the Atlas
+    connection limit (workers x maxPoolSize must stay under it).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.open = 0
+            self.in_use = 0
+            self.max_in_use = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.wait_total_ms = 0.0
+            self.wait_max_ms = 0.0
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "open": self.open,
+                "in_use": self.in_use,
+                "max_in_use": self.max_in_use,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "wait_avg_ms": round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max_ms, 3),
+            }
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open = max(0, self.open - 1)
+
+    def connection_checked_out(self, event):
+        # event.duration (seconds) covers the whole checkout, including
+        # the time spent queued for a free connection.
+        wait_ms = (getattr(event, "duration", 0) or 0) * 1000
+        with self._lock:
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self.checkouts += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+_pool_stats = _PoolStats()
+
+
+# ----------------------------
+# Client lifecycle
+# ----------------------------
 _client = None
+_client_pid = None
+_lock = threading.Lock()
+
+
+def client_options():
+    """MongoClient keyword arguments built from settings.MONGO (resolved once)."""
+    cfg = settings.MONGO
+    options = {
+        "maxPoolSize": cfg["MAX_POOL_SIZE"],
+        "minPoolSize": cfg["MIN_POOL_SIZE"],
+        "maxIdleTimeMS": cfg["MAX_IDLE_TIME_MS"],
+        "waitQueueTimeoutMS": cfg["WAIT_QUEUE_TIMEOUT_MS"],
+        "serverSelectionTimeoutMS": cfg["SERVER_SELECTION_TIMEOUT_MS"],
+        "retryReads": cfg["RETRY_READS"],
+        "retryWrites": cfg["RETRY_WRITES"],
+        "appname": cfg["APP_NAME"],
+        "event_listeners": [_command_counter, _pool_stats],
+    }
+    if cfg["COMPRESSORS"]:
+        options["compressors"] = cfg["COMPRESSORS"]
+    return options
+
+
+def connect(ping=True):
+    """
+    (Re)creates this process's client and optionally warms it up.
+
+    Called from gunicorn's post_fork hook (gunicorn.conf.py) so every
+    worker owns a client created after the fork, with a connection
+    already open before the first request.
+    """
+    global _client, _client_pid
+
+    with _lock:
+        if _client is not None and _client_pid != os.getpid():
+            # inherited from the parent: its sockets and monitor threads
+            # don't belong to us, so just drop the reference
+            _client = None
+        if _client is None:
+            _pool_stats.reset()
+            _client = MongoClient(settings.MONGO["URI"], **client_options())
+            _client_pid = os.getpid()
+        client = _client
+
+    if ping:
+        client.admin.command("ping")
+    return client
+
+
+def use_client(client):
+    """
+    Installs an already built client (e.g. mongomock's) as this process's
+    client; bench/loadtest.py --mongomock runs the API in-process on it.
+    """
+    global _client, _client_pid
+    with _lock:
+        _client = client
+        _client_pid = os.getpid()
+
+
+def get_client():
+    if _client is None or _client_pid != os.getpid():
+        return connect(ping=False)
+    return _client
+
 
 def get_db():
-    global _client
-
-    # support both env naming styles
-    uri = (
-        os.getenv("MONGO_URI")
-        or os.getenv("MONGODB_URI")
-        or "mongodb://localhost:27017"
-    )
-    db_name = (
-        os.getenv("DB_NAME")
-        or os.getenv("MONGODB_DB")
-        or "ace_dating_db"
-    )
-
-    # DEBUG prints (remove later)
-    print("Mongo URI:", uri)
-    print("Mongo DB:", db_name)
-
-    if _client is None:
-        _client = MongoClient(uri, serverSelectionTimeoutMS=5000)
-
-    return _client[db_name]
\ No newline at end of file
+    return get_client()[settings.MONGO["DB_NAME"]]
+
+
+def close():
+    global _client, _client_pid
+    with _lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
+
+
+def pool_stats():
+    """This process's pool metrics plus the configured limits."""
+    cfg = settings.MONGO
+    out = _pool_stats.snapshot()
+    out.update({
+        "pid": os.getpid(),
+        "max_pool_size": cfg["MAX_POOL_SIZE"],
+        "wait_queue_timeout_ms": cfg["WAIT_QUEUE_TIMEOUT_MS"],
+    })
+    return out
+
+
+# ----------------------------
+# Async client (api/async_views.py)
+# ----------------------------
+# An AsyncMongoClient belongs to the event loop it first ran on. The
+# async views are only mounted in the ASGI process (config/asgi.py sets
+# SERVE_ASYNC_VIEWS), where each worker runs a single loop, so this is
+# one client per process. Under WSGI, async_to_sync would start a fresh
+# loop per request and every request would need (and leak) a client of
+# its own, which is why the WSGI urlconf doesn't have these routes.
+_async_client = None
+_async_client_pid = None
+_async_client_loop = None
+
+
+def get_async_client():
+    global _async_client, _async_client_pid, _async_client_loop
+
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_pid != os.getpid():
+        _async_client = AsyncMongoClient(settings.MONGO["URI"], **client_options())
+        _async_client_pid = os.getpid()
+        _async_client_loop = loop
+    elif _async_client_loop is not loop:
+        raise RuntimeError(
+            "the async Mongo client is bound to this worker's event loop; "
+            "serve api/async_views.py from the ASGI process only"
+        )
+    return _async_client
+
+
+def get_async_db():
+    return get_async_client()[settings.MONGO["DB_NAME"]]
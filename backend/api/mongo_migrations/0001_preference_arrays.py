@@ -0,0 +1,27 @@
+"""
+Legacy scalar `preference` ("", "Any", "Woman", None, missing) -> the
+list format, with `visible_to` written alongside as on every other
+preference write. Ported from the old api/dbcommands.py script.
+"""
+from datetime import datetime
+
+from api.mongomigrate import BatchMigration
+from api.profilecache import profile_cache
+from api.visibility import preference_fields
+
+
+class Migration(BatchMigration):
+    description = "preference: legacy scalars to lists (plus visible_to)"
+    collection = "users"
+    query = {"preference": {"$not": {"$type": "array"}}}
+    projection = {"preference": 1}
+
+    def transform(self, doc):
+        return {"$set": {**preference_fields(doc.get("preference")), "updated_at": datetime.utcnow()}}
+
+    def guard(self, doc):
+        # None also matches a missing field
+        return {"preference": doc.get("preference")}
+
+    def after_batch(self, db, changed_ids):
+        profile_cache().invalidate(*changed_ids)
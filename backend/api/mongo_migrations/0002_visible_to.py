@@ -0,0 +1,31 @@
+"""
+`visible_to` for every live profile written before it existed. Signed-in
+viewers only match profiles by visible_to (api/visibility.py), so until
+this has run those profiles are missing from their feed, random and
+liked-by; the mongo system check refuses to serve while any remain.
+"""
+from datetime import datetime
+
+from api.mongomigrate import BatchMigration
+from api.profilecache import profile_cache
+from api.visibility import preference_fields
+
+
+class Migration(BatchMigration):
+    description = "visible_to for profiles from before it existed"
+    collection = "users"
+    # tombstoned profiles lose visible_to on purpose (api/accounts.py)
+    query = {"visible_to": {"$exists": False}, "deleted_at": None}
+    projection = {"preference": 1}
+
+    def transform(self, doc):
+        fields = preference_fields(doc.get("preference"))
+        if fields["preference"] != doc.get("preference"):
+            fields["updated_at"] = datetime.utcnow()
+        return {"$set": fields}
+
+    def guard(self, doc):
+        return {"visible_to": {"$exists": False}, "preference": doc.get("preference")}
+
+    def after_batch(self, db, changed_ids):
+        profile_cache().invalidate(*changed_ids)
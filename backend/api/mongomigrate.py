@@ -0,0 +1,163 @@
+"""
+Versioned, resumable data migrations for the Mongo collections.
+
+A migration is a module in api/mongo_migrations named like
+`0001_preference_arrays.py` with a `Migration` class (a BatchMigration
+subclass). Migrations run in name order, and each one is recorded in
+the `mongo_migrations` collection under its name:
+
+    {_id: "0001_preference_arrays", state: "running" | "applied",
+     last_id, scanned, changed, batches, started_at, applied_at}
+
+A migration walks its collection in _id order, `batch_size` documents at
+a time. Every changed document becomes one UpdateOne in a single
+unordered bulk_write per batch. The filter of that UpdateOne pins the
+values the change was computed from, so a concurrent write from the API
+wins instead of being overwritten. After each batch the last _id is
+checkpointed, so an interrupted run continues from there on the next
+`manage.py migrate_mongo`. A dry run reads and counts but writes
+nothing, not even the checkpoint.
+
+To protect production latency, `sleep` pauses between batches and
+`max_rate` caps documents per second.
+"""
+import importlib
+import pkgutil
+import time
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+MIGRATIONS_PACKAGE = "api.mongo_migrations"
+DEFAULT_BATCH_SIZE = 500
+
+
+class BatchMigration:
+    """
+    Subclasses set `collection`, optionally `query` / `projection`, and
+    implement `transform`.
+    """
+
+    collection = "users"
+    # documents the migration looks at (the _id range is added per batch)
+    query = {}
+    # fields transform() and guard() need; None loads whole documents
+    projection = None
+    description = ""
+
+    def transform(self, doc):
+        """The update document for doc ({"$set": ...}), or None to leave it."""
+        raise NotImplementedError
+
+    def guard(self, doc):
+        """Extra filter so the update only applies to doc as it was read."""
+        return {}
+
+    def after_batch(self, db, changed_ids):
+        """Hook after a batch was written (e.g. cache invalidation)."""
+
+
+def discover():
+    """{name: Migration instance} of every module in api/mongo_migrations, in name order."""
+    package = importlib.import_module(MIGRATIONS_PACKAGE)
+    found = {}
+    for info in sorted(pkgutil.iter_modules(package.__path__), key=lambda m: m.name):
+        if info.name.startswith("_"):
+            continue
+        module = importlib.import_module(f"{MIGRATIONS_PACKAGE}.{info.name}")
+        found[info.name] = module.Migration()
+    return found
+
+
+def status(db):
+    """{name: record} of the migrations recorded in `mongo_migrations`."""
+    return {d["_id"]: d for d in db["mongo_migrations"].find()}
+
+
+def mark_applied(db, name):
+    """Records name as applied without running it (--fake)."""
+    now = datetime.utcnow()
+    db["mongo_migrations"].update_one(
+        {"_id": name},
+        {"$set": {"state": "applied", "applied_at": now, "faked": True}, "$setOnInsert": {"started_at": now}},
+        upsert=True,
+    )
+
+
+def run(db, name, migration, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, sleep=0.0, max_rate=None, on_batch=None):
+    """
+    Applies one migration from its checkpoint. on_batch(report) gets a
+    dict per batch: batch, last_id, scanned, changed, seconds, docs_per_s.
+    Returns the totals {scanned, changed, batches, seconds}.
+    """
+    records = db["mongo_migrations"]
+    coll = db[migration.collection]
+    record = records.find_one({"_id": name}) or {}
+    if record.get("state") == "applied":
+        return {"scanned": 0, "changed": 0, "batches": 0, "seconds": 0.0}
+
+    if not dry_run:
+        records.update_one(
+            {"_id": name},
+            {"$set": {"state": "running", "batch_size": batch_size},
+             "$setOnInsert": {"started_at": datetime.utcnow(), "scanned": 0, "changed": 0, "batches": 0}},
+            upsert=True,
+        )
+
+    last = record.get("last_id")
+    totals = {"scanned": 0, "changed": 0, "batches": 0}
+    started = time.monotonic()
+
+    while True:
+        batch_started = time.monotonic()
+        q = dict(migration.query)
+        if last is not None:
+            q["_id"] = {"$gt": last}
+        docs = list(coll.find(q, migration.projection).sort("_id", 1).limit(batch_size))
+        if not docs:
+            break
+
+        ops, ids = [], []
+        for d in docs:
+            update = migration.transform(d)
+            if update:
+                ops.append(UpdateOne({"_id": d["_id"], **migration.guard(d)}, update))
+                ids.append(d["_id"])
+
+        changed = len(ops)
+        if ops and not dry_run:
+            changed = coll.bulk_write(ops, ordered=False).modified_count
+            migration.after_batch(db, ids)
+
+        last = docs[-1]["_id"]
+        if not dry_run:
+            records.update_one(
+                {"_id": name},
+                {"$set": {"last_id": last, "updated_at": datetime.utcnow()},
+                 "$inc": {"scanned": len(docs), "changed": changed, "batches": 1}},
+            )
+
+        totals["scanned"] += len(docs)
+        totals["changed"] += changed
+        totals["batches"] += 1
+        seconds = time.monotonic() - batch_started
+        if on_batch:
+            on_batch({
+                "batch": totals["batches"],
+                "last_id": last,
+                "scanned": len(docs),
+                "changed": changed,
+                "seconds": seconds,
+                "docs_per_s": len(docs) / seconds if seconds else None,
+            })
+
+        pause = sleep
+        if max_rate:
+            pause = max(pause, len(docs) / max_rate - seconds)
+        if pause > 0:
+            time.sleep(pause)
+
+    if not dry_run:
+        records.update_one({"_id": name}, {"$set": {"state": "applied", "applied_at": datetime.utcnow()}})
+    totals["seconds"] = time.monotonic() - started
+    return totals
@@ -0,0 +1,26 @@
+"""
+Compatibility patch for running the API on mongomock (the test suite and
+bench/loadtest.py --mongomock). Never imported by the server itself.
+
+pymongo 4.9+ passes sort= to the bulk builder for UpdateOne / ReplaceOne;
+mongomock 4.3 doesn't accept it yet, so every bulk_write (likes counters,
+recounts, backfills) fails with a TypeError. Nothing in the API sorts
+inside a bulk write, so dropping the argument is safe.
+"""
+import mongomock.collection
+
+
+def _without_sort(fn):
+    def wrapper(*args, sort=None, **kwargs):
+        return fn(*args, **kwargs)
+    wrapper.drops_sort = True
+    return wrapper
+
+
+def patch_mongomock():
+    """Makes mongomock's bulk builder accept (and ignore) sort=. Idempotent."""
+    builder = mongomock.collection.BulkOperationBuilder
+    for name in ("add_update", "add_replace"):
+        fn = getattr(builder, name)
+        if not getattr(fn, "drops_sort", False) and "sort" not in fn.__code__.co_varnames:
+            setattr(builder, name, _without_sort(fn))
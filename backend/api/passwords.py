@@ -0,0 +1,209 @@
+"""
+Password hashing off the request thread.
+
+make_password / check_password cost hundreds of milliseconds of CPU.
+Inline, a burst of logins takes every core and every worker thread, and
+feed requests queue behind it. Here they run in a small process pool
+per web worker (PASSWORD_HASHING["WORKERS"] processes), which caps the
+CPU logins can take. The request thread only waits on a future, so
+with threaded gunicorn workers (GUNICORN_THREADS) the worker keeps
+serving other requests meanwhile.
+
+The pool is bounded. At most PASSWORD_HASHING["MAX_PENDING"] hashes are
+in flight per worker, and a request that cannot get a slot within
+QUEUE_TIMEOUT seconds raises HashingBusy (the views answer 503). Time
+spent waiting for a slot and for a pool process, and the hash time
+itself, are kept for /api/metrics/passwords.
+
+verify_password also reports whether the stored hash is outdated
+(another preferred algorithm or weaker parameters, see api/hashers.py).
+LoginView then has it rehashed in the background.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+class HashingBusy(Exception):
+    """No hashing slot became free within QUEUE_TIMEOUT."""
+
+
+# ----------------------------
+# Run inside the pool processes
+# ----------------------------
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+def _make(password):
+    from django.contrib.auth.hashers import make_password
+
+    started = time.time()
+    return make_password(password), started
+
+
+def _verify(password, encoded):
+    from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher
+
+    started = time.time()
+    if not encoded or not check_password(password, encoded):
+        return (False, False), started
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return (True, False), started
+    preferred = get_hasher("default")
+    return (True, hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)), started
+
+
+# ----------------------------
+# Pool and metrics (per web worker)
+# ----------------------------
+class _Stats:
+    def __init__(self, size=1000):
+        self.lock = threading.Lock()
+        self.queue_ms = deque(maxlen=size)
+        self.hash_ms = deque(maxlen=size)
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.in_flight = 0
+
+    def record(self, queue_ms, hash_ms):
+        with self.lock:
+            self.queue_ms.append(queue_ms)
+            self.hash_ms.append(hash_ms)
+            self.completed += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "in_flight": self.in_flight,
+                "queue_ms": _summary(self.queue_ms),
+                "hash_ms": _summary(self.hash_ms),
+            }
+
+
+def _summary(values):
+    if not values:
+        return None
+    s = sorted(values)
+
+    def pct(p):
+        return round(s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))], 1)
+
+    return {"p50": pct(50), "p95": pct(95), "p99": pct(99), "max": round(s[-1], 1)}
+
+
+_stats = _Stats()
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_slots = None
+_rehasher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="password-rehash")
+
+
+def _get_pool():
+    """This process's pool, built on first use (so after gunicorn's fork)."""
+    global _pool, _pool_pid, _slots
+    if _pool is not None and _pool_pid == os.getpid():
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            cfg = settings.PASSWORD_HASHING
+            # spawn, not fork: the web worker already runs Mongo client threads
+            _pool = ProcessPoolExecutor(
+                max_workers=cfg["WORKERS"],
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            _slots = threading.BoundedSemaphore(cfg["MAX_PENDING"])
+            _pool_pid = os.getpid()
+    return _pool
+
+
+def _run(fn, *args):
+    pool = _get_pool()
+    cfg = settings.PASSWORD_HASHING
+
+    waited = time.time()
+    if not _slots.acquire(timeout=cfg["QUEUE_TIMEOUT"]):
+        with _stats.lock:
+            _stats.rejected += 1
+        raise HashingBusy()
+    with _stats.lock:
+        _stats.in_flight += 1
+    try:
+        result, started = pool.submit(fn, *args).result()
+    finally:
+        with _stats.lock:
+            _stats.in_flight -= 1
+        _slots.release()
+
+    done = time.time()
+    _stats.record((started - waited) * 1000, (done - started) * 1000)
+    return result
+
+
+def hash_password(password):
+    """make_password(password), computed in the hashing pool."""
+    return _run(_make, password)
+
+
+def verify_password(password, encoded):
+    """(valid, needs_rehash) for password against a stored hash."""
+    return _run(_verify, password, encoded)
+
+
+def rehash_later(users, uid, password, old_hash):
+    """
+    Replaces uid's outdated hash in the background. The update is
+    conditional on the old hash, so a password change in between wins.
+    """
+    def rehash():
+        try:
+            new_hash = hash_password(password)
+            res = users.update_one({"_id": uid, "password_hash": old_hash}, {"$set": {"password_hash": new_hash}})
+            if res.modified_count:
+                with _stats.lock:
+                    _stats.rehashed += 1
+        except (HashingBusy, PyMongoError):
+            # next login tries again
+            logger.warning("could not rehash password of %s", uid, exc_info=True)
+
+    _rehasher.submit(rehash)
+
+
+def shutdown():
+    """Stops this process's pool (gunicorn worker_exit)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def hashing_stats():
+    cfg = settings.PASSWORD_HASHING
+    out = _stats.snapshot()
+    out.update({
+        "pid": os.getpid(),
+        "algorithm": cfg["ALGORITHM"],
+        "workers": cfg["WORKERS"],
+        "max_pending": cfg["MAX_PENDING"],
+    })
+    return out
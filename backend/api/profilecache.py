@@ -0,0 +1,192 @@
+"""
+Read-through cache of public profile documents, keyed by _id.
+
+Profiles are read far more often than they change (profile page, saved
+lists, likedby, inbox sender names), always with the same public
+projection. get_many() serves what it can from the cache and loads the
+rest with one `$in` query; ProfileView.put, signup and profile deletion
+call invalidate().
+
+Backends (settings.PROFILE_CACHE["BACKEND"]):
+  "local"  - in-process LRU with a TTL, per worker (the default)
+  "django" - a Django cache alias (settings.CACHES), e.g. Redis or
+             memcached on a unix socket, shared by every gunicorn worker
+  "none"   - no caching, every read goes to Mongo
+Entries also expire after TTL seconds, which bounds how stale a profile
+can get on a worker that missed an invalidation.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class LocalLRUBackend:
+    """Thread-safe in-process LRU with a per-entry TTL."""
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        out = {}
+        with self._lock:
+            for k in keys:
+                hit = self._data.get(k)
+                if hit is None:
+                    continue
+                value, expires_at = hit
+                if expires_at <= now:
+                    del self._data[k]
+                    continue
+                self._data.move_to_end(k)
+                out[k] = value
+        return out
+
+    def set_many(self, items):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for k, v in items.items():
+                self._data[k] = (v, expires_at)
+                self._data.move_to_end(k)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete_many(self, keys):
+        with self._lock:
+            for k in keys:
+                self._data.pop(k, None)
+
+    def size(self):
+        return len(self._data)
+
+
+class DjangoCacheBackend:
+    """A Django cache alias; shared across processes when the cache is."""
+
+    def __init__(self, alias, ttl):
+        from django.core.cache import caches
+
+        self.cache = caches[alias]
+        self.ttl = ttl
+        self.evictions = None  # tracked by the cache server, not us
+
+    def get_many(self, keys):
+        return self.cache.get_many(keys)
+
+    def set_many(self, items):
+        self.cache.set_many(items, timeout=self.ttl)
+
+    def delete_many(self, keys):
+        self.cache.delete_many(keys)
+
+    def size(self):
+        return None
+
+
+class NullBackend:
+    evictions = 0
+
+    def get_many(self, keys):
+        return {}
+
+    def set_many(self, items):
+        pass
+
+    def delete_many(self, keys):
+        pass
+
+    def size(self):
+        return 0
+
+
+class ProfileCache:
+    KEY_PREFIX = "profile:"
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _key(self, _id):
+        return f"{self.KEY_PREFIX}{_id}"
+
+    def get_many(self, ids, load):
+        """
+        {_id: profile doc} for the ids that exist. `load(missing ids)`
+        returns an iterable of docs for whatever wasn't cached; those are
+        stored for next time. Returned docs are copies, safe to modify.
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+
+        cached = self.backend.get_many([self._key(i) for i in ids])
+        out = {}
+        missing = []
+        for i in ids:
+            doc = cached.get(self._key(i))
+            if doc is None:
+                missing.append(i)
+            else:
+                out[i] = dict(doc)
+
+        if missing:
+            loaded = {d["_id"]: d for d in load(missing)}
+            if loaded:
+                self.backend.set_many({self._key(k): v for k, v in loaded.items()})
+            out.update({k: dict(v) for k, v in loaded.items()})
+
+        with self._lock:
+            self.hits += len(ids) - len(missing)
+            self.misses += len(missing)
+        return out
+
+    def get(self, _id, load):
+        return self.get_many([_id], load).get(_id)
+
+    def invalidate(self, *ids):
+        self.backend.delete_many([self._key(i) for i in ids])
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "evictions": self.backend.evictions,
+            "entries": self.backend.size(),
+        }
+
+
+def _build():
+    conf = settings.PROFILE_CACHE
+    kind = conf.get("BACKEND", "local")
+    ttl = conf.get("TTL", 60)
+    if kind == "none":
+        return ProfileCache(NullBackend())
+    if kind == "django":
+        return ProfileCache(DjangoCacheBackend(conf.get("ALIAS", "profiles"), ttl))
+    return ProfileCache(LocalLRUBackend(ttl, conf.get("MAX_ENTRIES", 5000)))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def profile_cache():
+    """The process-wide ProfileCache, built from settings on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = _build()
+    return _cache
@@ -0,0 +1,44 @@
+"""
+Random profile picks over an indexed random key.
+
+Every profile carries `rand`, a uniform float in [0, 1). A pick draws a
+point r and takes the first eligible profile with rand >= r (wrapping to
+the smallest rand if nothing is above r). Both are single index range
+scans with limit 1, so the cost is O(log n) whatever filter is in front,
+unlike `$match` + `$sample`, which scans and sorts the whole eligible
+set. Keys are re-drawn periodically (`manage.py refresh_random_keys`) so
+profiles sitting after large gaps don't stay favoured.
+"""
+import random
+
+
+def new_random_key():
+    return random.random()
+
+
+def pick_random(users, query, projection=None, r=None):
+    """
+    One random document matching `query` (None if nothing matches or no
+    document has a key yet).
+    """
+    r = new_random_key() if r is None else r
+    for bound in ({"$gte": r}, {"$lt": r}):
+        q = dict(query)
+        q["rand"] = bound
+        docs = list(users.find(q, projection).sort("rand", 1).limit(1))
+        if docs:
+            return docs[0]
+    return None
+
+
+def sample_random(users, query, projection=None):
+    """The `$match` + `$sample` pick: used until keys are backfilled, and
+    as the baseline in bench/random_pick.py."""
+    pipeline = []
+    if query:
+        pipeline.append({"$match": query})
+    pipeline.append({"$sample": {"size": 1}})
+    if projection:
+        pipeline.append({"$project": projection})
+    docs = list(users.aggregate(pipeline))
+    return docs[0] if docs else None
@@ -0,0 +1,99 @@
+"""
+JSON rendering for Mongo documents.
+
+Views hand documents straight to the response; ObjectId, datetime and
+the other BSON types are converted while encoding, in one pass, instead
+of a Python-level serialize_mongo() copy of every document followed by
+a second encode in DRF's JSONRenderer. orjson does the encoding when it
+is installed (it is in requirements.txt); otherwise the stdlib json
+module is used with the same conversions, so output is identical.
+
+Naive datetimes (what PyMongo returns) are UTC and rendered with an
+explicit +00:00 offset, like serialize_mongo did.
+"""
+import json
+from collections.abc import Mapping
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from uuid import UUID
+
+from bson import Binary, Decimal128, ObjectId
+from django.db.models.query import QuerySet
+from django.http import HttpResponse
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def bson_default(value):
+    """
+    Converts the BSON / Python types JSON can't encode natively: the
+    BSON ones, plus what DRF's JSONEncoder handles (lazy translation
+    strings, dates and times, Decimal, UUID, QuerySets, other iterables),
+    converted the way it does.
+    """
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.isoformat()
+    if isinstance(value, Promise):
+        return force_str(value)
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return str(value.total_seconds())
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Binary):
+        return value.hex()
+    if isinstance(value, bytes):
+        return value.decode()
+    if isinstance(value, QuerySet):
+        return list(value)
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, Mapping):
+        return dict(value)
+    if hasattr(value, "__iter__"):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+    def dumps(data):
+        return orjson.dumps(data, default=bson_default, option=_OPTIONS)
+
+else:
+    def dumps(data):
+        return json.dumps(data, default=bson_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+class MongoJSONRenderer(BaseRenderer):
+    """DRF renderer for responses that contain raw Mongo documents."""
+
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return dumps(data)
+
+
+def json_response(data, status=200):
+    """JsonResponse equivalent for the plain Django (async) views."""
+    return HttpResponse(dumps(data), status=status, content_type="application/json")
@@ -0,0 +1,102 @@
+"""
+Per-viewer "already seen" set.
+
+Each viewer gets a fixed-size Bloom filter over the profile ids they were
+shown, stored as one small binary blob in the `seen` collection:
+{_id: viewer id, bits, count, v, expires_at}. 4 KB holds ~3000 profiles
+at a ~1% false-positive rate no matter how many profiles exist, and a
+membership test is a few hashes in memory. A false positive only means
+an unseen profile is skipped once in a while.
+
+The set expires SEEN_TTL_DAYS after it was started (TTL index on
+expires_at), starts over once it holds SEEN_CAPACITY ids, and can be
+reset explicitly.
+"""
+import hashlib
+from datetime import datetime, timedelta
+
+from bson import Binary
+from django.conf import settings
+
+SEEN_BITS = 32768  # 4 KB
+SEEN_HASHES = 7
+SEEN_CAPACITY = 3000
+
+
+class SeenFilter:
+    def __init__(self, bits=None, count=0):
+        self.bits = bytearray(bits) if bits else bytearray(SEEN_BITS // 8)
+        self.count = count
+
+    def _positions(self, oid):
+        # double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(oid.binary, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % SEEN_BITS for i in range(SEEN_HASHES)]
+
+    def add(self, oid):
+        for p in self._positions(oid):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, oid):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(oid))
+
+
+_SEEN_FIELDS = {"bits": 1, "count": 1, "expires_at": 1}
+
+
+def _seen_filter(doc):
+    if not doc or (doc.get("expires_at") and doc["expires_at"] <= datetime.utcnow()):
+        return None
+    return SeenFilter(doc.get("bits"), doc.get("count", 0))
+
+
+def load_seen(db, uid):
+    """The viewer's SeenFilter, or None if they have none (or it expired)."""
+    return _seen_filter(db["seen"].find_one({"_id": uid}, _SEEN_FIELDS))
+
+
+async def aload_seen(db, uid):
+    """load_seen for an async (AsyncMongoClient) database."""
+    return _seen_filter(await db["seen"].find_one({"_id": uid}, _SEEN_FIELDS))
+
+
+def record_seen(db, uid, profile_ids, retries=5):
+    """
+    Adds profile_ids to uid's set. Read-modify-write guarded by a version
+    field, retried if two requests for the same viewer race.
+    Returns the number of ids in the set afterwards.
+    """
+    seen = db["seen"]
+    for _ in range(retries):
+        now = datetime.utcnow()
+        doc = seen.find_one({"_id": uid}) or {}
+        expired = doc.get("expires_at") and doc["expires_at"] <= now
+        fresh = not doc or expired or doc.get("count", 0) >= SEEN_CAPACITY
+
+        f = SeenFilter() if fresh else SeenFilter(doc.get("bits"), doc.get("count", 0))
+        for pid in profile_ids:
+            if pid not in f:
+                f.add(pid)
+
+        update = {"bits": Binary(bytes(f.bits)), "count": f.count, "updated_at": now}
+        if fresh:
+            update["expires_at"] = now + timedelta(days=settings.SEEN_TTL_DAYS)
+
+        if not doc:
+            update["v"] = 1
+            res = seen.update_one({"_id": uid}, {"$setOnInsert": update}, upsert=True)
+            if res.upserted_id is not None:
+                return f.count
+            continue
+
+        res = seen.update_one({"_id": uid, "v": doc.get("v")}, {"$set": update, "$inc": {"v": 1}})
+        if res.modified_count:
+            return f.count
+    raise RuntimeError("seen set kept changing underneath us")
+
+
+def reset_seen(db, uid):
+    db["seen"].delete_one({"_id": uid})
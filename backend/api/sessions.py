@@ -0,0 +1,174 @@
+"""
+Stateless signed session tokens.
+
+A token is "v1.<user id>.<issued at>.<expires at>.<generation>.<signature>",
+signed with an HMAC of the project SECRET_KEY. Checking one is pure CPU:
+signature, expiry and user id need no database. The only thing that
+needs Mongo is the per-user `token_generation` counter, which is bumped
+on logout / password reset to revoke every token issued before it; that
+lookup goes through a small in-process TTL cache.
+
+Because nothing per-token is stored on the user, any number of devices
+can hold a valid token at the same time. Tokens from before this format
+(plain uuid4 in users.session_token) are still accepted until the user
+logs in again: LoginView unsets session_token on every successful login,
+as do logout and password reset (bump_generation).
+"""
+import time
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .ttlcache import TTLCache
+
+TOKEN_VERSION = "v1"
+_SALT = "api.sessions.token"
+
+
+def _sign(payload):
+    return salted_hmac(_SALT, payload, algorithm="sha256").hexdigest()
+
+
+def issue_token(user_id, generation=0, now=None):
+    """Returns a signed token for user_id valid for SESSION_TOKEN_MAX_AGE."""
+    iat = int(now if now is not None else time.time())
+    exp = iat + settings.SESSION_TOKEN_MAX_AGE
+    payload = f"{TOKEN_VERSION}.{user_id}.{iat}.{exp}.{int(generation)}"
+    return f"{payload}.{_sign(payload)}"
+
+
+def decode_token(token, now=None):
+    """
+    Validates signature and expiry of a signed token.
+
+    Returns {"uid", "iat", "exp", "gen"} (uid as a hex string) or None for
+    anything malformed, forged or expired. Never touches the database.
+    """
+    if not isinstance(token, str) or not token.startswith(TOKEN_VERSION + "."):
+        return None
+
+    payload, _, sig = token.rpartition(".")
+    if not constant_time_compare(sig, _sign(payload)):
+        return None
+
+    try:
+        _, uid, iat, exp, gen = payload.split(".")
+        iat, exp, gen = int(iat), int(exp), int(gen)
+    except ValueError:
+        return None
+
+    if exp <= (now if now is not None else time.time()):
+        return None
+
+    return {"uid": uid, "iat": iat, "exp": exp, "gen": gen}
+
+
+# user id -> token_generation
+_generations = TTLCache(settings.SESSION_GENERATION_CACHE_TTL)
+_GENERATION_FIELDS = {"token_generation": 1, "deleted_at": 1}
+
+
+def current_generation(users, uid, min_generation=0, fresh=False):
+    """
+    Returns the user's token_generation, or None if the user is gone
+    (deleted or tombstoned).
+
+    Served from the TTL cache unless the cached value is older than
+    min_generation (a token issued after a bump we haven't seen yet) or
+    `fresh` asks for the stored value.
+    """
+    cached = None if fresh else _generations.get(uid)
+    if cached is not None and cached >= min_generation:
+        return cached
+
+    return _remember_generation(uid, users.find_one({"_id": uid}, _GENERATION_FIELDS))
+
+
+async def acurrent_generation(users, uid, min_generation=0, fresh=False):
+    """current_generation for an async (AsyncMongoClient) collection."""
+    cached = None if fresh else _generations.get(uid)
+    if cached is not None and cached >= min_generation:
+        return cached
+
+    return _remember_generation(uid, await users.find_one({"_id": uid}, _GENERATION_FIELDS))
+
+
+def _remember_generation(uid, doc):
+    if not doc or doc.get("deleted_at") is not None:
+        _generations.invalidate(uid)
+        return None
+
+    gen = int(doc.get("token_generation") or 0)
+    _generations.set(uid, gen)
+    return gen
+
+
+def bump_generation(users, uid):
+    """
+    Revokes every token issued for uid so far (logout / password reset /
+    account deletion).
+
+    Other worker processes notice within SESSION_GENERATION_CACHE_TTL,
+    except for writes: those verify with fresh=True, which skips the
+    cache, so a revoked or deleted user cannot change anything meanwhile.
+    """
+    users.update_one({"_id": uid}, {"$inc": {"token_generation": 1}, "$unset": {"session_token": ""}})
+    _generations.invalidate(uid)
+
+
+def verify_session_doc(doc, uid, token):
+    """
+    Like verify_session, but checks against an already loaded user
+    document (projected with token_generation and session_token), so a
+    view that needs the caller's document anyway pays no extra query.
+    """
+    if not token or not doc:
+        return False
+
+    if not token.startswith(TOKEN_VERSION + "."):
+        return doc.get("session_token") == token
+
+    claims = decode_token(token)
+    if not claims or claims["uid"] != str(uid):
+        return False
+
+    gen = int(doc.get("token_generation") or 0)
+    _generations.set(uid, gen)
+    return claims["gen"] == gen
+
+
+def verify_session(users, uid, token, fresh=False):
+    """
+    True if token is a valid session for uid (an ObjectId). fresh=True
+    checks the stored generation instead of the per-worker cache (for
+    requests that write).
+    """
+    if not token:
+        return False
+
+    if not token.startswith(TOKEN_VERSION + "."):
+        # legacy uuid token stored on the user document
+        user = users.find_one({"_id": uid}, {"session_token": 1})
+        return bool(user and user.get("session_token") == token)
+
+    claims = decode_token(token)
+    if not claims or claims["uid"] != str(uid):
+        return False
+
+    return current_generation(users, uid, min_generation=claims["gen"], fresh=fresh) == claims["gen"]
+
+
+async def averify_session(users, uid, token, fresh=False):
+    """verify_session for an async (AsyncMongoClient) collection."""
+    if not token:
+        return False
+
+    if not token.startswith(TOKEN_VERSION + "."):
+        user = await users.find_one({"_id": uid}, {"session_token": 1})
+        return bool(user and user.get("session_token") == token)
+
+    claims = decode_token(token)
+    if not claims or claims["uid"] != str(uid):
+        return False
+
+    return await acurrent_generation(users, uid, min_generation=claims["gen"], fresh=fresh) == claims["gen"]
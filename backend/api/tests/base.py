@@ -0,0 +1,81 @@
+from concurrent.futures import Future
+from unittest import mock
+
+import mongomock
+from bson import ObjectId
+from django.test import SimpleTestCase
+
+from api import accounts, activity, mongo, profilecache, sessions
+from api.mongomock_compat import patch_mongomock
+
+patch_mongomock()
+
+
+class InlineExecutor:
+    """Runs submitted work at once, so background writes land inside the test."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+class MongoTestCase(SimpleTestCase):
+    """Runs each test against a fresh in-memory mongomock database."""
+
+    def setUp(self):
+        mongo.use_client(mongomock.MongoClient())
+        self.addCleanup(mongo.close)
+        self.db = mongo.get_db()
+        # the generation cache is per process: start every test cold
+        sessions._generations = sessions.TTLCache(60)
+        profilecache._cache = None
+        for patcher in (
+            mock.patch.object(activity, "_writer", InlineExecutor()),
+            mock.patch.object(accounts, "_runner", InlineExecutor()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def make_user(self, **fields):
+        doc = {"username": f"user-{ObjectId()}", "deleted_at": None, "likes_given": 0, "likes_received": 0, **fields}
+        return self.db["users"].insert_one(doc).inserted_id
+
+
+class AsyncCursor:
+    """The slice of AsyncCursor the async views use, over a mongomock cursor."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self.cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, n):
+        self.cursor.limit(n)
+        return self
+
+    async def to_list(self, length=None):
+        return list(self.cursor)
+
+
+class AsyncCollection:
+    def __init__(self, coll):
+        self.coll = coll
+
+    def find(self, *args, **kwargs):
+        return AsyncCursor(self.coll.find(*args, **kwargs))
+
+    async def find_one(self, *args, **kwargs):
+        return self.coll.find_one(*args, **kwargs)
+
+
+class AsyncDatabase:
+    """Read-only async view of a mongomock database, for api/async_views.py."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __getitem__(self, name):
+        return AsyncCollection(self.db[name])
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from api import accounts, sessions
+from api.letters import bump_unread
+from api.likes import add_like
+
+from .base import MongoTestCase
+
+
+# ----------------------------
+# Account deletion
+# ----------------------------
+class DeletionCascadeTests(MongoTestCase):
+    def like(self, liker, likee):
+        self.assertEqual(add_like(self.db, liker, likee)[0], True)
+
+    def letter(self, sender, receiver, read=False):
+        self.db["letters"].insert_one({
+            "sender_id": sender,
+            "receiver_id": receiver,
+            "created_at": datetime.utcnow(),
+            "read_at": datetime.utcnow() if read else None,
+        })
+        if not read:
+            bump_unread(self.db, receiver, 1)
+
+    def user(self, uid):
+        return self.db["users"].find_one({"_id": uid})
+
+    def test_cascade(self):
+        gone = self.make_user(image_url="https://res.cloudinary.com/demo/image/upload/v1/faces/a.jpg")
+        a, b = self.make_user(unread_letters=0), self.make_user(unread_letters=0)
+        self.like(gone, a)
+        self.like(a, gone)
+        self.like(b, gone)
+        self.like(a, b)
+        self.letter(gone, a)
+        self.letter(gone, a, read=True)
+        self.letter(gone, b)
+        self.letter(a, gone)
+        self.letter(b, a)
+
+        job = accounts.tombstone(self.db, gone)
+        self.assertEqual(job["state"], "pending")
+        self.assertIsNotNone(self.user(gone)["deleted_at"])
+        self.assertIsNone(add_like(self.db, a, gone))
+
+        job = accounts.run_cascade(self.db, gone, batch_size=1)
+        self.assertEqual(job["state"], "done")
+        self.assertIsNone(self.user(gone))
+        self.assertEqual(self.db["likes"].count_documents({"$or": [{"liker": gone}, {"likee": gone}]}), 0)
+        self.assertEqual(self.db["letters"].count_documents({"$or": [{"sender_id": gone}, {"receiver_id": gone}]}), 0)
+
+        for uid in (a, b):
+            doc = self.user(uid)
+            self.assertEqual(doc["likes_given"], self.db["likes"].count_documents({"liker": uid}))
+            self.assertEqual(doc["likes_received"], self.db["likes"].count_documents({"likee": uid}))
+            self.assertEqual(doc["unread_letters"], self.db["letters"].count_documents({"receiver_id": uid, "read_at": None}))
+        self.assertEqual(self.user(a)["unread_letters"], 1)
+        self.assertEqual(self.db["cloudinary_deletions"].count_documents({}), 1)
+
+        self.assertEqual(accounts.unfinished_jobs(self.db), [])
+        self.assertIsNone(accounts.run_cascade(self.db, gone))
+
+    def test_resumes_an_interrupted_recount(self):
+        gone, a = self.make_user(), self.make_user()
+        self.like(gone, a)
+        accounts.tombstone(self.db, gone)
+
+        # died after deleting the edge, before recounting a's counter
+        self.db["likes"].delete_many({"liker": gone})
+        self.db["account_deletions"].update_one(
+            {"_id": gone}, {"$set": {"pending": {"counter": "likes_received", "ids": [a]}}}
+        )
+        self.assertEqual(accounts.unfinished_jobs(self.db), [gone])
+
+        accounts.run_cascade(self.db, gone)
+        self.assertEqual(self.user(a)["likes_received"], 0)
+
+    def test_tombstone_revokes_sessions(self):
+        users = self.db["users"]
+        uid = self.make_user()
+        token = sessions.issue_token(uid)
+        self.assertTrue(sessions.verify_session(users, uid, token))
+        accounts.tombstone(self.db, uid)
+        self.assertFalse(sessions.verify_session(users, uid, token))
+
+    def test_tombstone_twice_returns_the_same_job(self):
+        uid = self.make_user()
+        first = accounts.tombstone(self.db, uid)
+        self.assertEqual(accounts.tombstone(self.db, uid)["requested_at"], first["requested_at"])
+        self.assertIsNone(accounts.tombstone(self.db, ObjectId()))
+
+    def test_never_deletes_a_live_user(self):
+        uid = self.make_user()
+        accounts.ensure_job(self.db, self.user(uid))
+
+        # fresh job: tombstone() may still be between its writes, keep it
+        self.assertIsNone(accounts.run_cascade(self.db, uid))
+        self.assertIsNotNone(self.user(uid))
+        self.assertEqual(self.db["account_deletions"].find_one({"_id": uid})["state"], "pending")
+
+        # stale job: the request died before tombstoning, drop it
+        self.db["account_deletions"].update_one(
+            {"_id": uid}, {"$set": {"requested_at": datetime.utcnow() - timedelta(hours=1)}}
+        )
+        self.assertIsNone(accounts.run_cascade(self.db, uid))
+        self.assertIsNotNone(self.user(uid))
+        self.assertIsNone(self.db["account_deletions"].find_one({"_id": uid}))
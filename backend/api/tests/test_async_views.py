@@ -0,0 +1,54 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.test import AsyncRequestFactory
+
+from api import async_views
+from api.seen import record_seen
+
+from .base import AsyncDatabase, MongoTestCase
+
+
+class AsyncFeedTests(MongoTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(async_views, "get_async_db", lambda: AsyncDatabase(self.db))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def feed(self, query, viewer=None):
+        headers = {"X-User-Id": str(viewer)} if viewer else {}
+        request = AsyncRequestFactory().get(f"/api/async/allprofiles?{query}", headers=headers)
+        response = asyncio.run(async_views.profiles_list(request))
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def sync_feed(self, query, viewer=None):
+        headers = {"X-User-Id": str(viewer)} if viewer else {}
+        return self.client.get(f"/api/allprofiles?{query}", headers=headers).json()
+
+    def test_same_page_as_the_sync_feed(self):
+        for age in (30, 20, 40, 25):
+            self.make_user(age=age)
+        for query in ("limit=2", "limit=3&sort=age_desc", "fields=full"):
+            with self.subTest(query=query):
+                self.assertEqual(self.feed(query), self.sync_feed(query))
+
+    def test_exclude_seen(self):
+        viewer = self.make_user()
+        others = [self.make_user() for _ in range(6)]
+        record_seen(self.db, viewer, others[:4])
+
+        page = self.feed("exclude_seen=1&limit=2", viewer)
+        self.assertEqual([p["_id"] for p in page["items"]], [str(others[4]), str(others[5])])
+        self.assertFalse(page["has_more"])
+
+        # limit=1 scans two at a time: several rounds, then a cursor
+        page = self.feed("exclude_seen=1&limit=1", viewer)
+        self.assertEqual([p["_id"] for p in page["items"]], [str(others[4])])
+        page = self.feed(f"exclude_seen=1&limit=1&cursor={page['next_cursor']}", viewer)
+        self.assertEqual([p["_id"] for p in page["items"]], [str(others[5])])
+
+        self.assertEqual(self.feed("exclude_seen=1", viewer), self.sync_feed("exclude_seen=1", viewer))
+        self.assertEqual(len(self.feed("", viewer)["items"]), 6)
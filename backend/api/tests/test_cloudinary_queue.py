@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from api import cloudinary_queue
+from api.cloudinary_queue import MAX_ATTEMPTS, StubDeleter, drain, drain_once, enqueue
+
+from .base import MongoTestCase
+
+
+class CloudinaryQueueTests(MongoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.queue = self.db["cloudinary_deletions"]
+
+    def test_drain_in_batches(self):
+        for i in range(5):
+            self.assertTrue(enqueue(self.db, f"img-{i}"))
+        self.assertFalse(enqueue(self.db, "img-0"))
+
+        deleter = StubDeleter()
+        self.assertEqual(drain(self.db, deleter, batch_size=2), (5, 0))
+        self.assertEqual([len(call) for call in deleter.calls], [2, 2, 1])
+        self.assertEqual(self.queue.count_documents({}), 0)
+
+    def test_failures_back_off_then_park(self):
+        enqueue(self.db, "ok")
+        enqueue(self.db, "broken")
+        deleter = StubDeleter(fail={"broken"})
+
+        self.assertEqual(drain(self.db, deleter), (1, 1))
+        doc = self.queue.find_one({"_id": "broken"})
+        self.assertEqual((doc["state"], doc["attempts"]), ("pending", 1))
+        self.assertIn("broken: error", doc["last_error"])
+        # not due again until its backoff has passed
+        self.assertEqual(drain(self.db, deleter), (0, 0))
+
+        now = datetime.utcnow()
+        for _ in range(MAX_ATTEMPTS - 1):
+            now += timedelta(seconds=cloudinary_queue.BACKOFF_MAX_SECONDS)
+            self.assertEqual(drain_once(self.db, deleter, now=now), (0, 1))
+        doc = self.queue.find_one({"_id": "broken"})
+        self.assertEqual((doc["state"], doc["attempts"]), ("failed", MAX_ATTEMPTS))
+        self.assertEqual(drain_once(self.db, deleter, now=now + timedelta(days=1)), (0, 0))
+
+    def test_enqueue_rearms_failed(self):
+        enqueue(self.db, "broken")
+        self.queue.update_one(
+            {"_id": "broken"},
+            {"$set": {"state": "failed", "attempts": MAX_ATTEMPTS, "last_error": "boom", "leased_until": None}},
+        )
+
+        self.assertTrue(enqueue(self.db, "broken"))
+        doc = self.queue.find_one({"_id": "broken"})
+        self.assertEqual((doc["state"], doc["attempts"]), ("pending", 0))
+        self.assertNotIn("last_error", doc)
+
+        deleter = StubDeleter()
+        self.assertEqual(drain(self.db, deleter), (1, 0))
+        self.assertEqual(deleter.calls, [["broken"]])
+        self.assertIsNone(self.queue.find_one({"_id": "broken"}))
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+from api import likes
+from api.profilecache import profile_cache
+
+from .base import MongoTestCase
+
+T0 = datetime(2026, 1, 1)
+
+
+class ConditionalGetTests(MongoTestCase):
+    def revalidate(self, path, etag):
+        return self.client.get(path, headers={"If-None-Match": etag})
+
+    def touch(self, uid, when):
+        """A write behind the API's back: the profile cache still has the old version."""
+        self.db["users"].update_one({"_id": uid}, {"$set": {"updated_at": when, "name": "changed"}})
+
+    def test_profile(self):
+        uid = self.make_user(name="Ada", updated_at=T0)
+        path = f"/api/profile/{uid}"
+        first = self.client.get(path)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("Last-Modified", first)
+
+        self.assertEqual(self.revalidate(path, first["ETag"]).status_code, 304)
+
+        # 304s follow the body being served, cached or not
+        self.touch(uid, T0 + timedelta(hours=1))
+        self.assertEqual(self.revalidate(path, first["ETag"]).status_code, 304)
+
+        profile_cache().invalidate(uid)
+        fresh = self.revalidate(path, first["ETag"])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(fresh.json()["name"], "changed")
+        self.assertEqual(self.revalidate(path, fresh["ETag"]).status_code, 304)
+
+    def test_saved_page(self):
+        uid = self.make_user()
+        saved = [self.make_user(updated_at=T0) for _ in range(2)]
+        for pid in saved:
+            likes.add_like(self.db, uid, pid)
+        path = f"/api/profilessaved/{uid}"
+
+        first = self.client.get(path)
+        self.assertEqual(len(first.json()["items"]), 2)
+        self.assertEqual(self.revalidate(path, first["ETag"]).status_code, 304)
+
+        self.touch(saved[0], T0 + timedelta(hours=1))
+        self.assertEqual(self.revalidate(path, first["ETag"]).status_code, 304)
+        profile_cache().invalidate(saved[0])
+        changed = self.revalidate(path, first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(self.revalidate(path, changed["ETag"]).status_code, 304)
+
+        likes.remove_like(self.db, uid, saved[1])
+        self.assertEqual(self.revalidate(path, changed["ETag"]).status_code, 200)
+
+    def test_liked_ids(self):
+        uid = self.make_user()
+        path = f"/api/likes/{uid}"
+        first = self.client.get(path)
+        self.assertEqual(self.revalidate(path, first["ETag"]).status_code, 304)
+
+        likes.add_like(self.db, uid, self.make_user())
+        second = self.revalidate(path, first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(len(second.json()["liked"]), 1)
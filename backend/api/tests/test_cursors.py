@@ -0,0 +1,82 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from django.http import QueryDict
+
+from api.cursors import after, decode_cursor, encode_cursor
+from api.views import feed_page
+
+from .base import MongoTestCase
+
+
+def raw_cursor(values):
+    """A cursor with arbitrary JSON in it, as a client could craft one."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+# ----------------------------
+# Cursors
+# ----------------------------
+class CursorTests(MongoTestCase):
+    def test_round_trip(self):
+        when, oid = datetime(2026, 3, 1, 12, 30, 15, 250000), ObjectId()
+        self.assertEqual(decode_cursor(encode_cursor(when, oid), 2), (when, oid))
+        self.assertEqual(decode_cursor(encode_cursor(None, 7, "x"), 3), (None, 7, "x"))
+
+    def test_aware_datetimes_are_stored_as_utc(self):
+        when = datetime(2026, 3, 1, 14, 0, tzinfo=timezone(timedelta(hours=2)))
+        self.assertEqual(decode_cursor(encode_cursor(when), 1), (datetime(2026, 3, 1, 12, 0),))
+
+    def test_bad_cursors(self):
+        good = encode_cursor(1, 2)
+        for cursor in (None, "", "!!!", "bm90IGpzb24", good[:-3]):
+            self.assertIsNone(decode_cursor(cursor, 2))
+        self.assertIsNone(decode_cursor(good, 3))
+
+    def test_rejects_operators(self):
+        for values in (
+            [{"$ne": None}, {"o": str(ObjectId())}],
+            [1, {"$gt": ""}],
+            [{"o": {"$ne": None}}, 1],
+            [{"d": 5}, 1],
+            [{"o": str(ObjectId()), "$ne": None}, 1],
+            [[1], 2],
+            {"a": 1, "b": 2},
+        ):
+            with self.subTest(values=values):
+                self.assertIsNone(decode_cursor(raw_cursor(values), 2))
+
+    def test_feed_ignores_a_crafted_cursor(self):
+        for age in (20, 30, 40):
+            self.make_user(age=age)
+        cursor = raw_cursor([{"$ne": None}, {"o": str(ObjectId())}])
+        page = feed_page(self.db["users"], QueryDict(f"sort=age_asc&cursor={cursor}"))
+        self.assertEqual(len(page["items"]), 3)
+
+    def page_through(self, descending, page_size=2):
+        """All docs, read page by page with after() on a nullable sort key."""
+        coll = self.db["items"]
+        direction = -1 if descending else 1
+        seen, position = [], None
+        while True:
+            q = after("score", "_id", position, descending, nullable=True) if position else {}
+            page = list(coll.find(q).sort([("score", direction), ("_id", direction)]).limit(page_size))
+            if not page:
+                return seen
+            seen.extend(d["_id"] for d in page)
+            position = (page[-1].get("score"), page[-1]["_id"])
+
+    def test_after_with_nulls(self):
+        coll = self.db["items"]
+        for score in (3, None, 1, 3, None, 2, 1):
+            coll.insert_one({"score": score} if score is not None else {})
+        coll.insert_one({"score": None})
+
+        for descending in (False, True):
+            direction = -1 if descending else 1
+            expected = [d["_id"] for d in coll.find().sort([("score", direction), ("_id", direction)])]
+            for page_size in (1, 2, 3):
+                with self.subTest(descending=descending, page_size=page_size):
+                    self.assertEqual(self.page_through(descending, page_size), expected)
@@ -0,0 +1,46 @@
+from django.http import QueryDict
+
+from api.views import build_feed_filters
+
+from .base import MongoTestCase
+
+
+class BuildFeedFiltersTests(MongoTestCase):
+    def test_multi_values(self):
+        q = build_feed_filters(QueryDict("city=haifa&city[]=eilat&city=haifa,jerusalem&gender=Woman&orientation="))
+        self.assertEqual(q, {"city": {"$in": ["haifa", "jerusalem", "eilat"]}, "gender": "Woman"})
+
+    def test_age_range_keeps_profiles_without_an_age(self):
+        q = build_feed_filters(QueryDict("age_min=20&age_max=abc"))
+        self.assertEqual(q, {"$and": [{"$or": [{"age": {"$gte": 20}}, {"age": None}]}]})
+        self.assertEqual(build_feed_filters(QueryDict("age_min=&age_max=x")), {})
+
+
+class FeedFilterTests(MongoTestCase):
+    def feed(self, query):
+        return self.client.get("/api/allprofiles?" + query).json()
+
+    def test_filters_are_applied_in_the_query(self):
+        match = self.make_user(city="haifa", gender="Woman", age=30)
+        ageless = self.make_user(city="eilat", gender="Woman")
+        self.make_user(city="haifa", gender="Man", age=30)
+        self.make_user(city="haifa", gender="Woman", age=50)
+        self.make_user(city="tel-aviv", gender="Woman", age=30)
+
+        items = self.feed("city=haifa,eilat&gender=Woman&age_min=25&age_max=40")["items"]
+        self.assertEqual([p["_id"] for p in items], [str(match), str(ageless)])
+
+    def test_cursor_keeps_the_age_filter(self):
+        expected = [str(self.make_user(age=age)) for age in (20, None, 21, 22)]
+        self.make_user(age=60)
+        self.make_user(age=70)
+
+        seen = []
+        query = "age_max=30&limit=1"
+        while True:
+            page = self.feed(query)
+            seen += [p["_id"] for p in page["items"]]
+            if not page["has_more"]:
+                break
+            query = "age_max=30&limit=1&cursor=" + page["next_cursor"]
+        self.assertEqual(seen, expected)
@@ -0,0 +1,100 @@
+from bson import Binary
+from django.test import SimpleTestCase, override_settings
+
+from api.images import fallback_sizes, image_variants, trusted_image_url, web_image_url
+
+from .base import MongoTestCase
+
+CLOUDINARY = "https://res.cloudinary.com/demo/image/upload/v1/faces/a.jpg"
+ELSEWHERE = "https://photos.example.com/me.jpg"
+
+
+@override_settings(IMAGE_HOSTS=["res.cloudinary.com"])
+class TrustedImageUrlTests(SimpleTestCase):
+    def test_allowed(self):
+        self.assertTrue(trusted_image_url("https://res.cloudinary.com/demo/image/upload/a.jpg"))
+
+    def test_rejected(self):
+        for url in (
+            None,
+            "",
+            "/media/a.jpg",
+            "http://res.cloudinary.com/a.jpg",
+            "file:///etc/passwd",
+            "https://evil.example/a.jpg",
+            "https://res.cloudinary.com.evil.example/a.jpg",
+            "https://res.cloudinary.com:8443/a.jpg",
+            "https://user:pw@res.cloudinary.com/a.jpg",
+            "https://res.cloudinary.com:bad/a.jpg",
+        ):
+            with self.subTest(url=url):
+                self.assertFalse(trusted_image_url(url))
+
+    def test_web_image_url(self):
+        self.assertTrue(web_image_url(ELSEWHERE))
+        self.assertTrue(web_image_url("http://photos.example.com:8080/me.jpg"))
+        for url in (None, "/me.jpg", "javascript:alert(1)", "file:///etc/passwd", "https://u:p@example.com/a.jpg"):
+            with self.subTest(url=url):
+                self.assertFalse(web_image_url(url))
+
+
+@override_settings(PUBLIC_API_BASE="")
+class ImageVariantTests(MongoTestCase):
+    def build_thumbs(self, uid, url):
+        for px in fallback_sizes():
+            self.db["image_thumbs"].insert_one({
+                "_id": f"{uid}:{px}",
+                "user_id": uid,
+                "size": px,
+                "content_type": "image/webp",
+                "data": Binary(b"webp"),
+                "source_url": url,
+            })
+
+    def card(self, uid):
+        items = self.client.get("/api/allprofiles").json()["items"]
+        return next(p for p in items if p["_id"] == str(uid))
+
+    def test_cloudinary_variants(self):
+        v = image_variants({"_id": 1, "image_url": CLOUDINARY})
+        self.assertIn("/image/upload/c_fill,g_auto,w_88,h_88,dpr_1.0,f_auto,q_auto/v1/faces/a", v["card"]["src"])
+
+    def test_photo_elsewhere_renders_the_original(self):
+        uid = self.make_user(image_url=ELSEWHERE)
+        variants = self.card(uid)["image_variants"]
+        for name in ("thumb", "card", "lightbox"):
+            self.assertEqual(variants[name]["src"], ELSEWHERE)
+            self.assertEqual(variants[name]["srcset"], "")
+
+        profile = self.client.get(f"/api/profile/{uid}").json()
+        self.assertEqual(profile["image_variants"]["card"]["src"], ELSEWHERE)
+
+    def test_photo_elsewhere_with_thumbnails(self):
+        uid = self.make_user(image_url=ELSEWHERE)
+        self.build_thumbs(uid, ELSEWHERE)
+        variants = self.card(uid)["image_variants"]
+        self.assertEqual(variants["card"]["src"], f"/api/thumbs/{uid}/88")
+        self.assertEqual(variants["lightbox"]["src"], ELSEWHERE)
+
+        # thumbnails of an earlier photo don't count
+        self.db["users"].update_one({"_id": uid}, {"$set": {"image_url": "https://photos.example.com/new.jpg"}})
+        self.assertEqual(self.card(uid)["image_variants"]["card"]["src"], "https://photos.example.com/new.jpg")
+
+    def test_thumbnail_view(self):
+        uid = self.make_user(image_url=ELSEWHERE)
+        response = self.client.get(f"/api/thumbs/{uid}/88")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response["Location"], ELSEWHERE)
+
+        self.build_thumbs(uid, ELSEWHERE)
+        response = self.client.get(f"/api/thumbs/{uid}/88")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"webp")
+
+    def test_thumbnail_view_refuses(self):
+        script = self.make_user(image_url="javascript:alert(1)")
+        self.assertEqual(self.client.get(f"/api/thumbs/{script}/88").status_code, 404)
+
+        gone = self.make_user(image_url=ELSEWHERE, deleted_at=1)
+        self.build_thumbs(gone, ELSEWHERE)
+        self.assertEqual(self.client.get(f"/api/thumbs/{gone}/88").status_code, 404)
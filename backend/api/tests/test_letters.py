@@ -0,0 +1,71 @@
+from datetime import datetime
+
+from bson import ObjectId
+
+from api.letters import bump_unread, inbox_page, unread_count
+
+from .base import MongoTestCase
+
+
+# ----------------------------
+# Unread letters counter
+# ----------------------------
+class UnreadCounterTests(MongoTestCase):
+    def send(self, receiver, read=False):
+        self.db["letters"].insert_one({
+            "sender_id": ObjectId(),
+            "receiver_id": receiver,
+            "created_at": datetime.utcnow(),
+            "read_at": datetime.utcnow() if read else None,
+        })
+
+    def stored(self, uid):
+        return self.db["users"].find_one({"_id": uid}).get("unread_letters")
+
+    def test_new_user_counts_from_zero(self):
+        uid = self.make_user(unread_letters=0)
+        self.send(uid)
+        bump_unread(self.db, uid, 1)
+        self.assertEqual(unread_count(self.db, uid), 1)
+
+    def test_bump_leaves_users_without_the_counter_alone(self):
+        uid = self.make_user()
+        self.send(uid)
+        self.send(uid)
+        bump_unread(self.db, uid, 1)
+        self.assertIsNone(self.stored(uid))
+
+        # computed once from letters, maintained from then on
+        self.assertEqual(unread_count(self.db, uid), 2)
+        self.assertEqual(self.stored(uid), 2)
+        self.send(uid)
+        bump_unread(self.db, uid, 1)
+        self.assertEqual(unread_count(self.db, uid), 3)
+
+    def test_read_letters_are_not_counted(self):
+        uid = self.make_user()
+        self.send(uid, read=True)
+        self.send(uid)
+        self.assertEqual(unread_count(self.db, uid), 1)
+
+    def test_uses_the_loaded_document(self):
+        uid = self.make_user(unread_letters=4)
+        self.assertEqual(unread_count(self.db, uid, {"unread_letters": 5}), 5)
+        self.assertEqual(unread_count(self.db, uid, {"unread_letters": -1}), 0)
+
+
+class InboxPageTests(MongoTestCase):
+    def test_pages_newest_first(self):
+        uid = self.make_user()
+        when = datetime(2026, 1, 1)
+        ids = [
+            self.db["letters"].insert_one({"receiver_id": uid, "created_at": when, "read_at": None}).inserted_id
+            for _ in range(5)
+        ]
+        read, cursor = [], None
+        while True:
+            docs, cursor, has_more = inbox_page(self.db, uid, 2, cursor)
+            read.extend(d["_id"] for d in docs)
+            if not has_more:
+                break
+        self.assertEqual(read, ids[::-1])
@@ -0,0 +1,79 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from api import likes
+
+from .base import MongoTestCase
+
+
+class LikesEdgeTests(MongoTestCase):
+    def counters(self, uid):
+        doc = self.db["users"].find_one({"_id": uid})
+        return doc["likes_given"], doc["likes_received"]
+
+    def test_add_and_remove_are_idempotent(self):
+        a, b = self.make_user(), self.make_user()
+        self.assertEqual(likes.add_like(self.db, a, b), (True, False))
+        self.assertEqual(likes.add_like(self.db, a, b), (False, False))
+        self.assertEqual((self.counters(a), self.counters(b)), ((1, 0), (0, 1)))
+
+        self.assertTrue(likes.remove_like(self.db, a, b))
+        self.assertFalse(likes.remove_like(self.db, a, b))
+        self.assertEqual((self.counters(a), self.counters(b)), ((0, 0), (0, 0)))
+
+    def test_match(self):
+        a, b = self.make_user(), self.make_user()
+        likes.add_like(self.db, a, b)
+        self.assertEqual(likes.add_like(self.db, b, a), (True, True))
+        self.assertTrue(likes.is_match(self.db, a, b))
+
+    def test_no_like_on_a_tombstone(self):
+        a, gone = self.make_user(), self.make_user(deleted_at=1)
+        self.assertIsNone(likes.add_like(self.db, a, gone))
+        self.assertEqual(self.db["likes"].count_documents({}), 0)
+        self.assertEqual(self.counters(a), (0, 0))
+
+    def test_order(self):
+        a, b, c, d = (self.make_user() for _ in range(4))
+        likes.add_like(self.db, a, b)
+        likes.add_like(self.db, a, c)
+        likes.add_like(self.db, d, b)
+        self.assertEqual(likes.liked_ids(self.db, a), [b, c])
+        self.assertEqual(set(likes.liked_by_ids(self.db, b)), {a, d})
+
+
+class MigrateLikesTests(MongoTestCase):
+    def migrate(self, *args):
+        call_command("migrate_likes", *args, stdout=StringIO())
+
+    def test_arrays_become_edges(self):
+        b, c = self.make_user(), self.make_user()
+        a = self.make_user(liked=[str(b), str(c), "not-an-id"])
+        self.make_user(liked=[str(b)])
+        self.db["users"].update_one({"_id": b}, {"$set": {"liked": [str(a), str(b)]}})  # b liked itself
+
+        self.migrate("--batch-size", "1")
+        self.assertEqual(likes.liked_ids(self.db, a), [b, c])
+        self.assertEqual(likes.liked_ids(self.db, b), [a])
+        self.assertTrue(likes.is_match(self.db, a, b))
+        doc = self.db["users"].find_one({"_id": b})
+        self.assertEqual((doc["likes_given"], doc["likes_received"]), (1, 2))
+        self.assertIn("liked", doc)
+
+        # rerunning with --restart writes nothing new, and can drop the arrays
+        self.migrate("--restart", "--unset-arrays")
+        self.assertEqual(self.db["likes"].count_documents({}), 4)
+        self.assertEqual(self.db["users"].count_documents({"liked": {"$exists": True}}), 0)
+
+    def test_resumes_from_checkpoint(self):
+        b = self.make_user()
+        first = self.make_user(liked=[str(b)])
+        self.migrate("--skip-recount")
+        self.make_user(liked=[str(first)])
+        self.db["likes"].delete_many({"liker": first})
+
+        # only users after the checkpoint are read again
+        self.migrate()
+        self.assertEqual(self.db["likes"].count_documents({"liker": first}), 0)
+        self.assertEqual(self.db["users"].find_one({"_id": first})["likes_received"], 1)
@@ -0,0 +1,21 @@
+from django.test import override_settings
+
+from .base import MongoTestCase
+
+
+class MetricsAccessTests(MongoTestCase):
+    path = "/api/metrics/mongo"
+
+    @override_settings(DEBUG=False, METRICS_TOKEN="")
+    def test_hidden_without_a_token(self):
+        self.assertEqual(self.client.get(self.path).status_code, 404)
+
+    @override_settings(DEBUG=False, METRICS_TOKEN="s3cret")
+    def test_token(self):
+        self.assertEqual(self.client.get(self.path).status_code, 404)
+        self.assertEqual(self.client.get(self.path, HTTP_X_METRICS_TOKEN="wrong").status_code, 404)
+        self.assertEqual(self.client.get(self.path, HTTP_X_METRICS_TOKEN="s3cret").status_code, 200)
+
+    @override_settings(DEBUG=True, METRICS_TOKEN="")
+    def test_open_in_debug(self):
+        self.assertEqual(self.client.get(self.path).status_code, 200)
@@ -0,0 +1,98 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from api import mongomigrate
+from api.mongomigrate import BatchMigration
+
+from .base import MongoTestCase
+
+
+class Tag(BatchMigration):
+    """Sets tagged=True on every user, in batches."""
+
+    query = {"tagged": {"$exists": False}}
+    projection = {"name": 1}
+
+    def __init__(self, fail_on_batch=None, db=None):
+        self.fail_on_batch = fail_on_batch
+        self.db = db
+        self.batches = 0
+
+    def transform(self, doc):
+        if doc.get("name") == "raced" and self.db is not None:
+            # the API renames the user between our read and our write
+            self.db["users"].update_one({"_id": doc["_id"]}, {"$set": {"name": "renamed"}})
+        return {"$set": {"tagged": True}}
+
+    def guard(self, doc):
+        return {"name": doc.get("name")}
+
+    def after_batch(self, db, changed_ids):
+        self.batches += 1
+        if self.batches == self.fail_on_batch:
+            raise RuntimeError("interrupted")
+
+
+class BatchMigrationTests(MongoTestCase):
+    def record(self, name="tag"):
+        return self.db["mongo_migrations"].find_one({"_id": name})
+
+    def test_resumes_after_interruption(self):
+        ids = [self.make_user(name=f"u{i}") for i in range(5)]
+        with self.assertRaises(RuntimeError):
+            mongomigrate.run(self.db, "tag", Tag(fail_on_batch=2), batch_size=2)
+        self.assertEqual((self.record()["state"], self.record()["last_id"]), ("running", ids[1]))
+
+        # picks up after the last checkpoint; the interrupted batch was
+        # already written, so the query no longer matches it
+        totals = mongomigrate.run(self.db, "tag", Tag(), batch_size=2)
+        self.assertEqual((totals["scanned"], totals["batches"]), (1, 1))
+        self.assertEqual(self.db["users"].count_documents({"tagged": True}), 5)
+        self.assertEqual(self.record()["state"], "applied")
+        self.assertEqual(mongomigrate.run(self.db, "tag", Tag())["scanned"], 0)
+
+    def test_concurrent_write_wins(self):
+        kept = self.make_user(name="raced")
+        self.make_user(name="other")
+        totals = mongomigrate.run(self.db, "tag", Tag(db=self.db))
+        self.assertEqual(totals["changed"], 1)
+        self.assertNotIn("tagged", self.db["users"].find_one({"_id": kept}))
+
+    def test_dry_run_writes_nothing(self):
+        self.make_user(name="a")
+        totals = mongomigrate.run(self.db, "tag", Tag(), dry_run=True)
+        self.assertEqual((totals["scanned"], totals["changed"]), (1, 1))
+        self.assertEqual(self.db["users"].count_documents({"tagged": True}), 0)
+        self.assertIsNone(self.record())
+
+
+class MigrateMongoCommandTests(MongoTestCase):
+    def migrate(self, *args):
+        out = StringIO()
+        call_command("migrate_mongo", *args, stdout=out)
+        return out.getvalue()
+
+    def test_applies_pending_in_order(self):
+        uid = self.make_user(preference="Woman")
+        self.assertIn("[pending] 0001_preference_arrays", self.migrate("--list"))
+
+        out = self.migrate("--batch-size", "1")
+        self.assertLess(out.index("0001_preference_arrays"), out.index("0002_visible_to"))
+        doc = self.db["users"].find_one({"_id": uid})
+        self.assertEqual((doc["preference"], doc["visible_to"]), (["Woman"], ["Woman"]))
+        self.assertEqual(
+            {r["_id"]: r["state"] for r in self.db["mongo_migrations"].find()},
+            {"0001_preference_arrays": "applied", "0002_visible_to": "applied"},
+        )
+        self.assertIn("No migrations to apply", self.migrate())
+
+    def test_dry_run_and_fake(self):
+        uid = self.make_user(preference="Woman")
+        self.assertIn("1 would change", self.migrate("0001_preference_arrays", "--dry-run"))
+        self.assertEqual(self.db["users"].find_one({"_id": uid})["preference"], "Woman")
+
+        self.migrate("0001_preference_arrays", "--fake")
+        self.assertIn("[applied] 0001_preference_arrays", self.migrate("--list"))
+        self.assertIn("already applied", self.migrate("0001_preference_arrays"))
+        self.assertEqual(self.db["users"].find_one({"_id": uid})["preference"], "Woman")
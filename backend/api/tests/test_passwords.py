@@ -0,0 +1,66 @@
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.test import override_settings
+
+from api import passwords
+from api.passwords import HashingBusy, hash_password, verify_password
+
+from .base import MongoTestCase
+
+
+class HashingPoolTests(MongoTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        passwords.shutdown()
+        super().tearDownClass()
+
+    def test_hash_and_verify(self):
+        encoded = hash_password("correct horse")
+        self.assertTrue(encoded.startswith("pbkdf2_sha256$1000$"))
+        self.assertEqual(verify_password("correct horse", encoded), (True, False))
+        self.assertEqual(verify_password("wrong", encoded), (False, False))
+        self.assertEqual(verify_password("anything", ""), (False, False))
+
+    def test_outdated_hash_needs_rehash(self):
+        encoded = make_password("pw", hasher=PBKDF2PasswordHasher())
+        self.assertEqual(verify_password("pw", encoded), (True, True))
+
+    def full_pool(self):
+        """Takes the worker's only hashing slot until the test ends."""
+        passwords._get_pool()
+        slots = threading.BoundedSemaphore(1)
+        slots.acquire()
+        patcher = mock.patch.object(passwords, "_slots", slots)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        fast = override_settings(PASSWORD_HASHING={**settings.PASSWORD_HASHING, "QUEUE_TIMEOUT": 0.01})
+        fast.enable()
+        self.addCleanup(fast.disable)
+
+    def test_busy(self):
+        self.full_pool()
+        rejected = passwords.hashing_stats()["rejected"]
+        with self.assertRaises(HashingBusy):
+            hash_password("pw")
+        self.assertEqual(passwords.hashing_stats()["rejected"], rejected + 1)
+
+    def test_busy_login_is_503(self):
+        self.make_user(username="ada", password_hash=make_password("pw"))
+        self.full_pool()
+        for path, body in (
+            ("/api/login", {"username": "ada", "password": "pw"}),
+            ("/api/signup", {"username": "bob", "password": "secret-pw", "age": 30, "gender": "Man"}),
+        ):
+            with self.subTest(path=path):
+                response = self.client.post(path, body, content_type="application/json")
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(response["Retry-After"], "2")
+
+    @override_settings(DEBUG=False, METRICS_TOKEN="s3cret")
+    def test_stats_need_the_metrics_token(self):
+        self.assertEqual(self.client.get("/api/metrics/passwords").status_code, 404)
+        response = self.client.get("/api/metrics/passwords", HTTP_X_METRICS_TOKEN="s3cret")
+        self.assertEqual(response.json()["algorithm"], "pbkdf2")
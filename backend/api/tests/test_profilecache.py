@@ -0,0 +1,51 @@
+from django.test import override_settings
+
+from api import sessions
+from api.profilecache import profile_cache
+from api.visibility import backfill_visibility
+
+from .base import MongoTestCase
+
+
+class ProfileCacheTests(MongoTestCase):
+    def get(self, uid):
+        return self.client.get(f"/api/profile/{uid}").json()
+
+    def test_reads_are_cached(self):
+        uid = self.make_user(name="Ada")
+        self.get(uid)
+        # a write behind the API's back isn't seen until the entry goes
+        self.db["users"].update_one({"_id": uid}, {"$set": {"name": "Grace"}})
+        self.assertEqual(self.get(uid)["name"], "Ada")
+        self.assertEqual(profile_cache().stats()["hits"], 1)
+
+    def test_profile_update_invalidates(self):
+        uid = self.make_user(name="Ada")
+        self.get(uid)
+        response = self.client.put(
+            f"/api/profile/{uid}",
+            {"name": "Grace"},
+            content_type="application/json",
+            HTTP_X_SESSION_TOKEN=sessions.issue_token(uid),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get(uid)["name"], "Grace")
+
+    def test_backfill_invalidates(self):
+        uid = self.make_user(preference="Woman")
+        self.get(uid)
+        backfill_visibility(self.db["users"])
+        self.assertEqual(self.get(uid)["preference"], ["Woman"])
+
+    def test_deleted_profile_is_gone(self):
+        uid = self.make_user()
+        self.get(uid)
+        response = self.client.delete(f"/api/profile/{uid}", HTTP_X_SESSION_TOKEN=sessions.issue_token(uid))
+        self.assertIn(response.status_code, (200, 202, 204))
+        self.assertEqual(self.client.get(f"/api/profile/{uid}").status_code, 404)
+
+    @override_settings(DEBUG=False, METRICS_TOKEN="s3cret")
+    def test_stats_need_the_metrics_token(self):
+        self.assertEqual(self.client.get("/api/metrics/cache").status_code, 404)
+        response = self.client.get("/api/metrics/cache", HTTP_X_METRICS_TOKEN="s3cret")
+        self.assertEqual(response.json()["backend"], "LocalLRUBackend")
@@ -0,0 +1,81 @@
+import json
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from uuid import UUID
+
+from bson import Binary, Decimal128, ObjectId
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import MongoJSONRenderer, bson_default
+
+
+def serialize_mongo(doc):
+    """What the views did before MongoJSONRenderer (baseline api/views.py)."""
+    out = {}
+    for k, v in doc.items():
+        if isinstance(v, ObjectId):
+            out[k] = str(v)
+        elif isinstance(v, datetime):
+            if v.tzinfo is None:
+                v = v.replace(tzinfo=timezone.utc)
+            out[k] = v.isoformat()
+        else:
+            out[k] = v
+    return out
+
+
+def stdlib_render(data):
+    """The renderer's fallback path, for when orjson isn't installed."""
+    return json.dumps(data, default=bson_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def fresh(data):
+    return {**data, "gen": (i * 2 for i in range(3))}
+
+
+class RendererParityTests(SimpleTestCase):
+    def assertSameJSON(self, data, expected):
+        for rendered in (MongoJSONRenderer().render(data), stdlib_render(data)):
+            self.assertEqual(json.loads(rendered), json.loads(expected))
+
+    def test_matches_drf(self):
+        data = fresh({
+            "error": gettext_lazy("Profile not found"),
+            "nested": {"messages": [gettext_lazy("a"), "b"]},
+            "price": Decimal("12.50"),
+            "id": UUID("12345678-1234-5678-1234-567812345678"),
+            "took": timedelta(minutes=1, seconds=30),
+            "day": date(2026, 3, 1),
+            "at": time(12, 30),
+            "pair": (1, 2),
+            "tags": {"solo"},
+            "raw": b"bytes",
+            "text": "שלום",
+            "n": None,
+            "ok": True,
+            "f": 1.5,
+        })
+        expected = JSONRenderer().render(data)
+        for rendered in (MongoJSONRenderer().render(fresh(data)), stdlib_render(fresh(data))):
+            self.assertEqual(json.loads(rendered), json.loads(expected))
+
+    def test_mongo_documents_match_the_old_serialize_mongo(self):
+        doc = {
+            "_id": ObjectId(),
+            "created_at": datetime(2026, 3, 1, 12, 0, 0, 123000),
+            "aware": datetime(2026, 3, 1, 14, 0, tzinfo=timezone(timedelta(hours=2))),
+            "name": "Ada",
+            "age": 30,
+        }
+        self.assertSameJSON(doc, JSONRenderer().render(serialize_mongo(doc)))
+        self.assertSameJSON([doc], JSONRenderer().render([serialize_mongo(doc)]))
+
+    def test_bson_types(self):
+        data = {"d": Decimal128("1.10"), "b": Binary(b"\x01\xff")}
+        self.assertSameJSON(data, b'{"d": "1.10", "b": "01ff"}')
+
+    def test_unknown_types_still_fail(self):
+        with self.assertRaises(TypeError):
+            MongoJSONRenderer().render({"x": object()})
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from api import likes
+
+from .base import MongoTestCase
+
+T0 = datetime(2026, 1, 1)
+
+
+class SavedPageTests(MongoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.uid = self.make_user()
+
+    def save(self, *profiles):
+        for pid in profiles:
+            n = self.db["likes"].count_documents({"liker": self.uid})
+            self.db["likes"].insert_one({"liker": self.uid, "likee": pid, "created_at": T0 + timedelta(minutes=n)})
+
+    def pages(self, limit, **kwargs):
+        """Every page's ids, following next_cursor to the end."""
+        pages, cursor = [], None
+        while True:
+            docs, cursor, has_more = likes.saved_page(self.db, self.uid, limit, cursor=cursor, **kwargs)
+            pages.append([d["_id"] for d in docs])
+            if not has_more:
+                self.assertIsNone(cursor)
+                return pages
+
+    def test_save_order_across_pages(self):
+        saved = [self.make_user() for _ in range(5)]
+        self.save(*reversed(saved))
+        self.assertEqual(self.pages(2), [saved[4:2:-1], saved[2:0:-1], saved[:1]])
+
+    def test_skips_tombstones(self):
+        live, gone = self.make_user(), self.make_user(deleted_at=1)
+        self.save(gone, live)
+        self.assertEqual(self.pages(5), [[live]])
+
+    def test_filtered_pages_keep_scanning(self):
+        women = []
+        for i in range(12):
+            pid = self.make_user(gender="Woman" if i % 4 == 3 else "Man")
+            self.save(pid)
+            if i % 4 == 3:
+                women.append(pid)
+        with mock.patch.object(likes, "SAVED_SCAN_BATCH", 3):
+            pages = self.pages(2, profile_filter={"gender": "Woman"})
+        self.assertEqual(pages, [women[:2], women[2:]])
+
+    def test_scan_is_bounded(self):
+        self.save(*[self.make_user(gender="Man") for _ in range(6)])
+        self.save(self.make_user(gender="Woman"))
+        with mock.patch.multiple(likes, SAVED_SCAN_BATCH=2, SAVED_MAX_SCAN_ROUNDS=2):
+            docs, cursor, has_more = likes.saved_page(self.db, self.uid, 1, profile_filter={"gender": "Woman"})
+        # a short page, but the cursor moved past what was scanned
+        self.assertEqual((docs, has_more), ([], True))
+        self.assertEqual(len(self.pages(1, profile_filter={"gender": "Woman"})[-1]), 1)
+
+    def test_matches_only(self):
+        mutual, one_way = self.make_user(), self.make_user()
+        self.save(one_way, mutual)
+        self.db["likes"].insert_one({"liker": mutual, "likee": self.uid, "created_at": T0})
+        self.assertEqual(self.pages(5, matches_only=True), [[mutual]])
+
+    def test_load_hydrates_unfiltered_pages(self):
+        saved = [self.make_user() for _ in range(2)]
+        self.save(*saved)
+        load = mock.Mock(side_effect=lambda ids: {i: {"_id": i} for i in ids})
+        self.assertEqual(self.pages(5, load=load), [saved])
+        load.assert_called_once_with(saved)
+
+        self.assertEqual(self.pages(5, load=load, profile_filter={"deleted_at": None}), [saved])
+        load.assert_called_once()
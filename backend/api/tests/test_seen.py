@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from bson import ObjectId
+
+from api import seen, sessions
+from api.seen import SEEN_CAPACITY, SeenFilter, load_seen, record_seen
+
+from .base import MongoTestCase
+
+
+class SeenFilterTests(MongoTestCase):
+    def test_false_positive_rate_at_capacity(self):
+        f = SeenFilter()
+        shown = [ObjectId() for _ in range(SEEN_CAPACITY)]
+        for pid in shown:
+            f.add(pid)
+        self.assertTrue(all(pid in f for pid in shown))  # never a false negative
+
+        others = [ObjectId() for _ in range(20000)]
+        rate = sum(pid in f for pid in others) / len(others)
+        self.assertLess(rate, 0.02)
+
+    def test_survives_a_round_trip(self):
+        uid, pids = ObjectId(), [ObjectId() for _ in range(3)]
+        self.assertIsNone(load_seen(self.db, uid))
+        self.assertEqual(record_seen(self.db, uid, pids[:2]), 2)
+        self.assertEqual(record_seen(self.db, uid, pids[1:]), 3)
+
+        f = load_seen(self.db, uid)
+        self.assertEqual(f.count, 3)
+        self.assertTrue(all(pid in f for pid in pids))
+
+    def test_expires(self):
+        uid, pid = ObjectId(), ObjectId()
+        record_seen(self.db, uid, [pid])
+        self.db["seen"].update_one({"_id": uid}, {"$set": {"expires_at": datetime.utcnow() - timedelta(seconds=1)}})
+        self.assertIsNone(load_seen(self.db, uid))
+
+        # the next write starts a fresh set with a new expiry
+        other = ObjectId()
+        self.assertEqual(record_seen(self.db, uid, [other]), 1)
+        f = load_seen(self.db, uid)
+        self.assertNotIn(pid, f)
+        self.assertIn(other, f)
+
+    def test_starts_over_when_full(self):
+        uid, old, new = ObjectId(), ObjectId(), ObjectId()
+        with mock.patch.object(seen, "SEEN_CAPACITY", 2):
+            record_seen(self.db, uid, [old, ObjectId()])
+            self.assertEqual(record_seen(self.db, uid, [new]), 1)
+        f = load_seen(self.db, uid)
+        self.assertNotIn(old, f)
+        self.assertIn(new, f)
+
+
+class SeenViewTests(MongoTestCase):
+    def test_record_and_reset(self):
+        uid = self.make_user()
+        pid = self.make_user()
+        path = f"/api/seen/{uid}"
+        token = {"HTTP_X_SESSION_TOKEN": sessions.issue_token(uid)}
+
+        self.assertEqual(self.client.post(path, {"ids": [str(pid)]}, content_type="application/json").status_code, 401)
+        response = self.client.post(path, {"ids": [str(pid), "junk"]}, content_type="application/json", **token)
+        self.assertEqual(response.json(), {"recorded": 1, "seen": 1})
+        self.assertEqual(
+            self.client.post(path, {"ids": str(pid)}, content_type="application/json", **token).status_code, 400
+        )
+        self.assertIn(pid, load_seen(self.db, uid))
+
+        self.assertEqual(self.client.delete(path, **token).status_code, 200)
+        self.assertIsNone(load_seen(self.db, uid))
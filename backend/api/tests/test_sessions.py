@@ -0,0 +1,110 @@
+from datetime import datetime
+from unittest import mock
+
+from bson import ObjectId
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from api import sessions
+from api.views import LoginView
+
+from .base import MongoTestCase
+
+
+# ----------------------------
+# Session tokens
+# ----------------------------
+class TokenTests(SimpleTestCase):
+    uid = ObjectId()
+
+    def test_round_trip(self):
+        claims = sessions.decode_token(sessions.issue_token(self.uid, generation=3))
+        self.assertEqual(claims["uid"], str(self.uid))
+        self.assertEqual(claims["gen"], 3)
+
+    def test_forged_signature(self):
+        token = sessions.issue_token(self.uid)
+        payload, _, sig = token.rpartition(".")
+        self.assertIsNone(sessions.decode_token(f"{payload}.{'0' * len(sig)}"))
+
+    def test_tampered_payload(self):
+        token = sessions.issue_token(self.uid, generation=0)
+        self.assertIsNone(sessions.decode_token(token.replace(".0.", ".1.", 1)))
+
+    def test_expired(self):
+        token = sessions.issue_token(self.uid, now=1000)
+        self.assertIsNotNone(sessions.decode_token(token, now=1001))
+        self.assertIsNone(sessions.decode_token(token, now=10**10))
+
+    def test_other_secret_key(self):
+        token = sessions.issue_token(self.uid)
+        with override_settings(SECRET_KEY="another-key"):
+            self.assertIsNone(sessions.decode_token(token))
+
+    def test_malformed(self):
+        for token in (None, "", "v1", "v1.x.y", "v2.a.b.c.d.e", str(ObjectId())):
+            self.assertIsNone(sessions.decode_token(token))
+
+
+class VerifySessionTests(MongoTestCase):
+    def test_valid_token(self):
+        uid = self.make_user()
+        token = sessions.issue_token(uid)
+        self.assertTrue(sessions.verify_session(self.db["users"], uid, token))
+
+    def test_token_for_another_user(self):
+        uid, other = self.make_user(), self.make_user()
+        token = sessions.issue_token(other)
+        self.assertFalse(sessions.verify_session(self.db["users"], uid, token))
+
+    def test_bump_revokes_earlier_tokens(self):
+        users = self.db["users"]
+        uid = self.make_user()
+        old = sessions.issue_token(uid, generation=0)
+        self.assertTrue(sessions.verify_session(users, uid, old))
+
+        sessions.bump_generation(users, uid)
+        self.assertFalse(sessions.verify_session(users, uid, old))
+        self.assertTrue(sessions.verify_session(users, uid, sessions.issue_token(uid, generation=1)))
+
+    def test_bump_elsewhere_is_seen_by_fresh_checks(self):
+        users = self.db["users"]
+        uid = self.make_user()
+        token = sessions.issue_token(uid)
+        self.assertTrue(sessions.verify_session(users, uid, token))
+
+        # another worker revoked it: this one's cache still says generation 0
+        users.update_one({"_id": uid}, {"$inc": {"token_generation": 1}})
+        self.assertTrue(sessions.verify_session(users, uid, token))
+        self.assertFalse(sessions.verify_session(users, uid, token, fresh=True))
+
+    def test_tombstoned_user(self):
+        users = self.db["users"]
+        uid = self.make_user()
+        token = sessions.issue_token(uid)
+        self.assertTrue(sessions.verify_session(users, uid, token))
+
+        users.update_one({"_id": uid}, {"$set": {"deleted_at": datetime.utcnow()}})
+        self.assertFalse(sessions.verify_session(users, uid, token, fresh=True))
+
+    def test_legacy_token(self):
+        users = self.db["users"]
+        uid = self.make_user(session_token="3f0c6c1e-legacy")
+        self.assertTrue(sessions.verify_session(users, uid, "3f0c6c1e-legacy"))
+        self.assertFalse(sessions.verify_session(users, uid, "something-else"))
+
+        sessions.bump_generation(users, uid)
+        self.assertFalse(sessions.verify_session(users, uid, "3f0c6c1e-legacy"))
+
+    def test_login_retires_legacy_token(self):
+        users = self.db["users"]
+        uid = self.make_user(username="ada", password_hash="x", session_token="3f0c6c1e-legacy")
+        request = APIRequestFactory().post("/api/login", {"username": "ada", "password": "pw"}, format="json")
+        with mock.patch("api.views.verify_password", return_value=(True, False)), \
+                mock.patch("api.views.touch_active"):
+            response = LoginView.as_view()(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(sessions.verify_session(users, uid, response.data["token"]))
+        self.assertFalse(sessions.verify_session(users, uid, "3f0c6c1e-legacy"))
+        self.assertNotIn("session_token", users.find_one({"_id": uid}))
@@ -0,0 +1,68 @@
+from django.test import override_settings
+
+from api import mongomigrate
+from api.checks import mongo_visibility_check
+from api.visibility import backfill_visibility, visibility_drift, visible_to
+
+from .base import MongoTestCase
+
+EVERYONE = ["Man", "Woman", "Non-binary", "Other"]
+
+
+class VisibleToTests(MongoTestCase):
+    def test_derived_from_preference(self):
+        for preference, expected in (
+            (None, EVERYONE),
+            ("", EVERYONE),
+            ("Any", EVERYONE),
+            ([], EVERYONE),
+            ("Woman", ["Woman"]),
+            (["Woman", "Man", "Woman", "Alien"], ["Man", "Woman"]),
+        ):
+            with self.subTest(preference=preference):
+                self.assertEqual(visible_to(preference), expected)
+
+    def feed_ids(self, viewer):
+        items = self.client.get("/api/allprofiles", headers={"X-User-Id": str(viewer)}).json()["items"]
+        return {p["_id"] for p in items}
+
+    def test_feed_filters_by_viewer_gender(self):
+        viewer = self.make_user(gender="Man", visible_to=EVERYONE)
+        open_to_all = self.make_user(preference=[], visible_to=EVERYONE)
+        women_only = self.make_user(preference=["Woman"], visible_to=["Woman"])
+        self.assertEqual(self.feed_ids(viewer), {str(open_to_all)})
+
+        anonymous = {p["_id"] for p in self.client.get("/api/allprofiles").json()["items"]}
+        self.assertEqual(anonymous, {str(viewer), str(open_to_all), str(women_only)})
+
+    def test_backfill(self):
+        legacy = self.make_user(preference="Woman")
+        drifted = self.make_user(preference=["Man"], visible_to=EVERYONE)
+        self.assertEqual(len(list(visibility_drift(self.db["users"]))), 2)
+
+        self.assertEqual(backfill_visibility(self.db["users"], batch_size=1), 2)
+        self.assertEqual(list(visibility_drift(self.db["users"])), [])
+        self.assertEqual(self.db["users"].find_one({"_id": legacy})["visible_to"], ["Woman"])
+        self.assertEqual(self.db["users"].find_one({"_id": drifted})["visible_to"], ["Man"])
+
+
+class VisibilityMigrationTests(MongoTestCase):
+    def test_check_until_migrated(self):
+        viewer = self.make_user(gender="Woman", visible_to=EVERYONE)
+        old = self.make_user(preference=["Woman"])
+        self.make_user(deleted_at=1)  # tombstones never get it back
+
+        with override_settings(MONGO_INDEX_CHECK="strict"):
+            [error] = mongo_visibility_check(None)
+            self.assertEqual(error.id, "api.E003")
+        with override_settings(MONGO_INDEX_CHECK="off"):
+            self.assertEqual(mongo_visibility_check(None), [])
+
+        migration = mongomigrate.discover()["0002_visible_to"]
+        totals = mongomigrate.run(self.db, "0002_visible_to", migration, batch_size=1)
+        self.assertEqual(totals["changed"], 1)
+
+        with override_settings(MONGO_INDEX_CHECK="strict"):
+            self.assertEqual(mongo_visibility_check(None), [])
+        items = self.client.get("/api/allprofiles", headers={"X-User-Id": str(viewer)}).json()["items"]
+        self.assertEqual([p["_id"] for p in items], [str(old)])
@@ -0,0 +1,42 @@
+"""
+A small in-process TTL cache.
+
+Per-worker memory of recent facts that may be a little stale: the token
+generation of recently seen users (api/sessions.py) and who was marked
+active recently (api/activity.py). Entries expire after `ttl` seconds;
+past `max_size` the oldest entry is dropped.
+"""
+import threading
+import time
+
+
+class TTLCache:
+    """Tiny thread-safe TTL cache of key -> value."""
+
+    def __init__(self, ttl, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            value, expires_at = hit
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._data) >= self.max_size and key not in self._data:
+                # dicts keep insertion order: drop the oldest entry
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (value, time.monotonic() + self.ttl)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
@@ -1,7 +1,11 @@
 # api/urls.py
+from django.conf import settings
 from django.urls import path
 from .views import SignUpView, LoginView, ProfilesListView, ProfileView,CloudinaryDeleteView,ProfilessavedListView,LikesView,WriteLatterView,InboxView
 from .views import DeleteLetterView,MarkLetterReadView,health, ResetPasswordView,VerifySessionView,LikedByView,RandomProfileView
+from .views import LogoutView, MongoPoolStatsView, BootstrapView, UnreadCountView, SeenView, ProfileCacheStatsView
+from .views import ThumbnailView, PasswordHashingStatsView
+from . import async_views
 urlpatterns = [
     path("signup", SignUpView.as_view()),
     path("login", LoginView.as_view()),
@@ -10,14 +14,32 @@ urlpatterns = [
     path("profilessaved/<str:user_id>", ProfilessavedListView.as_view()),
     path("writelatter/<str:user_id>/<str:profile_id>",WriteLatterView.as_view()),
     path("inbox/<str:user_id>",InboxView.as_view()),
+    path("inbox/<str:user_id>/unread-count", UnreadCountView.as_view()),
     path("profile/<str:user_id>", ProfileView.as_view()),
     path("likes/<str:user_id>", LikesView.as_view()),                     
     path("likes/<str:user_id>/<str:profile_id>", LikesView.as_view()),
     path("letters/<str:letter_id>", DeleteLetterView.as_view()),
     path("letters/<str:letter_id>/read", MarkLetterReadView.as_view()),  
     path("health", health.as_view()),   
+    path("metrics/mongo", MongoPoolStatsView.as_view()),
+    path("metrics/cache", ProfileCacheStatsView.as_view()),
+    path("metrics/passwords", PasswordHashingStatsView.as_view()),
     path("reset-password", ResetPasswordView.as_view()), 
     path("verify-session", VerifySessionView.as_view()),
+    path("bootstrap", BootstrapView.as_view()),
+    path("logout", LogoutView.as_view()),
     path("likedby/<str:user_id>", LikedByView.as_view()),
     path("randomprofile", RandomProfileView.as_view()),
+    path("seen/<str:user_id>", SeenView.as_view()),
+    path("thumbs/<str:user_id>/<int:size>", ThumbnailView.as_view()),
 ]
+
+if settings.SERVE_ASYNC_VIEWS:
+    # async twins of the I/O-bound endpoints, ASGI process only (config/asgi.py)
+    urlpatterns += [
+        path("async/allprofiles", async_views.profiles_list),
+        path("async/likes/<str:user_id>", async_views.likes),
+        path("async/likes/<str:user_id>/<str:profile_id>", async_views.likes),
+        path("async/inbox/<str:user_id>", async_views.inbox),
+        path("async/verify-session", async_views.verify_session),
+    ]
@@ -1,21 +1,61 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from uuid import uuid4
 
+from pymongo import ReturnDocument
 from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
-from django.contrib.auth.hashers import make_password, check_password
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseRedirect
+from django.utils.crypto import constant_time_compare
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-import cloudinary
 
-from . import dbcommands
-from .mongo import get_db
+from . import accounts, cloudinary_queue, likes
+from .accounts import LIVE_PROFILE
+from .activity import touch_active
+from .conditional import (
+    PROFILE_CACHE_CONTROL,
+    THUMB_CACHE_CONTROL,
+    latest,
+    make_etag,
+    not_modified,
+    with_validators,
+)
+from .cursors import after, decode_cursor, encode_cursor
+from .images import add_image_variants, web_image_url
+from .letters import bump_unread, inbox_page, unread_count
+from .mongo import get_db, pool_stats
+from .passwords import HashingBusy, hash_password, hashing_stats, rehash_later, verify_password
+from .profilecache import profile_cache
+from .randomkey import new_random_key, pick_random, sample_random
+from .seen import load_seen, record_seen, reset_seen
+from .sessions import bump_generation, issue_token, verify_session, verify_session_doc
+from .visibility import preference_fields, visibility_filter
 
 
 # ----------------------------
 # Helpers
 # ----------------------------
+# Fan-out pool for run_concurrently(); pymongo clients are thread-safe.
+_query_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="mongo-query")
+
+
+def run_concurrently(*calls):
+    """
+    Runs independent zero-argument callables (typically Mongo queries) on
+    a shared thread pool and returns their results in order. Each call
+    runs in a copy of the caller's context, so per-request command
+    counting still sees the queries.
+    """
+    futures = [
+        _query_pool.submit(contextvars.copy_context().run, call)
+        for call in calls
+    ]
+    return [f.result() for f in futures]
+
+
 def oid(x):
     if isinstance(x, ObjectId):
         return x
@@ -24,21 +64,16 @@ def oid(x):
     return None
 
 
-def serialize_mongo(doc):
-    if doc is None:
-        return None
+def hashing_busy():
+    """503 for a sign-in that found the password hashing pool full."""
+    resp = Response({"error": "Too many sign-ins right now, please try again"}, status=503)
+    resp["Retry-After"] = "2"
+    return resp
+
 
-    out = {}
-    for k, v in doc.items():
-        if isinstance(v, ObjectId):
-            out[k] = str(v)
-        elif isinstance(v, datetime):
-            if v.tzinfo is None:
-                v = v.replace(tzinfo=timezone.utc)
-            out[k] = v.isoformat()
-        else:
-            out[k] = v
-    return out
+# Requests that change something check the session against the stored
+# token generation, not the per-worker cache (api/sessions.py).
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
 
 
 def require_session(request, users, claimed_user_id):
@@ -50,53 +85,174 @@ def require_session(request, users, claimed_user_id):
     if not token:
         return None, Response({"error": "Missing session token"}, status=401)
 
-    user = users.find_one({"_id": uid}, {"session_token": 1})
-    if not user or user.get("session_token") != token:
+    if not verify_session(users, uid, token, fresh=request.method not in SAFE_METHODS):
         return None, Response({"error": "Invalid or expired session"}, status=401)
 
+    touch_active(uid)
     return uid, None
 
 
-# Canonical preference values; "Any" is gone as an explicit value —
-# an empty list now means "visible to everyone" instead.
-PREFERENCE_CANON = {"Woman", "Man", "Non-binary", "Other"}
+def require_metrics_access(request):
+    """
+    None if the request may read /api/metrics/*, else a 404 Response: the
+    numbers describe worker internals, so outside DEBUG they need
+    settings.METRICS_TOKEN in X-Metrics-Token.
+    """
+    token = request.headers.get("X-Metrics-Token") or ""
+    if settings.METRICS_TOKEN:
+        if constant_time_compare(token, settings.METRICS_TOKEN):
+            return None
+    elif settings.DEBUG:
+        return None
+    return Response({"error": "Not found"}, status=404)
+
+
+def require_caller(request, users, claimed_user_id, fields=()):
+    """
+    Authenticates the caller and loads their user document in ONE query.
+
+    `fields` is the union of caller fields the view needs; the session is
+    checked against the same document. The result is kept on the request,
+    so later calls for a subset of the already loaded fields are free.
+    Returns (doc, None) or (None, error Response); doc always has _id.
+    """
+    uid = oid(claimed_user_id)
+    if not uid:
+        return None, Response({"error": "Invalid user id"}, status=400)
+
+    token = request.headers.get("X-Session-Token")
+    if not token:
+        return None, Response({"error": "Missing session token"}, status=401)
+
+    cached = getattr(request, "_caller", None)
+    if cached and cached[0] == uid and set(fields) <= cached[1]:
+        return cached[2], None
+
+    projection = {f: 1 for f in fields}
+    projection.update({"token_generation": 1, "session_token": 1})
+    doc = users.find_one({"_id": uid}, projection)
+    if not verify_session_doc(doc, uid, token):
+        return None, Response({"error": "Invalid or expired session"}, status=401)
+
+    doc.pop("token_generation", None)
+    doc.pop("session_token", None)
+    request._caller = (uid, set(fields), doc)
+    touch_active(uid)
+    return doc, None
 
 
-def parse_preference(raw):
+def parse_multi(params, name):
     """
-    Normalizes incoming preference data into a clean list of canonical
-    strings, deduplicated, in the order they were sent.
+    Reads a multi-value filter from the query string.
+
+    Accepts repeated keys (?city=a&city=b), axios-style brackets
+    (?city[]=a) and comma-separated values (?city=a,b), deduplicated
+    in the order they were sent.
+    """
+    values = []
+    for raw in params.getlist(name) + params.getlist(name + "[]"):
+        for v in str(raw).split(","):
+            v = v.strip()
+            if v and v not in values:
+                values.append(v)
+    return values
+
+
+def parse_int(raw):
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return None
 
-    Accepts:
-      - a list of strings (the new multi-select format)
-      - a single string (legacy format, e.g. "Woman", "", "Any", "any")
-      - None / missing
 
-    "" and "any"/"Any" (legacy single-value "anyone" markers) both resolve
-    to an empty list, matching the new "empty list = anyone" convention.
-    Anything not in PREFERENCE_CANON is silently dropped rather than
-    raising, so a stray/garbled value never blocks the request.
+def parse_limit(raw, default=24, maximum=60):
+    """Page size from a query param, clamped to 1..maximum."""
+    limit = parse_int(raw)
+    if limit is None:
+        limit = default
+    return max(1, min(limit, maximum))
+
+
+def is_truthy(raw):
+    return str(raw or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+# Multi-select filters the homepage offers; each one is an exact match
+# on a scalar field of the user document.
+FEED_FILTER_FIELDS = ("city", "orientation", "looking_for", "gender", "romantic_orientation")
+
+
+def build_feed_filters(params):
+    """
+    Turns the feed's filter query params into a Mongo query fragment.
+
+    Empty sets are ignored (= "any"), a single value becomes a plain
+    equality and several values become $in, so the planner can use the
+    feed compound indexes declared in api/indexes.py. age_min / age_max
+    are inclusive and, like the client-side filter they replace, let
+    profiles without an age through.
     """
-    if raw is None:
-        return []
+    q = {}
+    for field in FEED_FILTER_FIELDS:
+        values = parse_multi(params, field)
+        if len(values) == 1:
+            q[field] = values[0]
+        elif values:
+            q[field] = {"$in": values}
+
+    age = {}
+    age_min = parse_int(params.get("age_min"))
+    age_max = parse_int(params.get("age_max"))
+    if age_min is not None:
+        age["$gte"] = age_min
+    if age_max is not None:
+        age["$lte"] = age_max
+    if age:
+        # under $and so a cursor's $or (apply_feed_position) can't replace it
+        q["$and"] = [{"$or": [{"age": age}, {"age": None}]}]
+
+    return q
+
+
+# Private / heavy fields never sent with a public profile. "liked" is
+# the legacy likes array, kept out until migrate_likes --unset-arrays.
+PUBLIC_PROFILE_PROJECTION = {
+    "password_hash": 0,
+    "session_token": 0,
+    "token_generation": 0,
+    "liked": 0,
+    "likes_given": 0,
+    "likes_received": 0,
+    "likes_updated_at": 0,
+    "unread_letters": 0,
+    "rand": 0,
+    "visible_to": 0,
+}
+
 
-    if isinstance(raw, str):
-        val = raw.strip()
-        if not val or val.lower() == "any":
-            return []
-        raw = [val]
+def cached_profiles(users, ids):
+    """{_id: public profile} for ids, read through the profile cache."""
+    return profile_cache().get_many(
+        ids, lambda missing: users.find({"_id": {"$in": missing}, **LIVE_PROFILE}, PUBLIC_PROFILE_PROJECTION)
+    )
 
-    if not isinstance(raw, list):
-        return []
 
-    cleaned = []
-    for v in raw:
-        if not isinstance(v, str):
-            continue
-        v = v.strip()
-        if v in PREFERENCE_CANON and v not in cleaned:
-            cleaned.append(v)
-    return cleaned
+# Fields that change whenever the public representation of a profile
+# does: its validators are built from them.
+PROFILE_VERSION_FIELDS = {"updated_at": 1, "last_active_at": 1}
+
+
+def profile_etag(doc):
+    return make_etag("profile", doc["_id"], doc.get("updated_at"), doc.get("last_active_at"))
+
+
+def latest_profile_change(docs):
+    return latest(*[d.get(f) for d in docs for f in PROFILE_VERSION_FIELDS])
+
+
+def saved_page_etag(docs, next_cursor, has_more):
+    parts = [f'{d["_id"]}@{d.get("updated_at")}@{d.get("last_active_at")}' for d in docs]
+    return make_etag("saved", next_cursor, has_more, *parts)
 
 
 PROFILE_ALLOWED_FIELDS = {
@@ -117,6 +273,64 @@ PROFILE_ALLOWED_FIELDS = {
 }
 
 
+# ----------------------------
+# Sparse fieldsets (?fields=)
+# ----------------------------
+# Named presets; "full" is every public field (PUBLIC_PROFILE_PROJECTION).
+# "card" is what the feed / random cards render, without email,
+# image_public_id, preference and timestamps.
+PROFILE_FIELDSETS = {
+    "card": (
+        "username", "name", "age", "gender", "city", "orientation",
+        "romantic_orientation", "looking_for", "info", "contact", "image_url",
+    ),
+}
+SELECTABLE_PROFILE_FIELDS = PROFILE_ALLOWED_FIELDS | {"created_at", "updated_at", "last_active_at"}
+
+
+def _fieldset(names):
+    fields = []
+    for name in names:
+        for f in PROFILE_FIELDSETS.get(name, (name,)):
+            if f in SELECTABLE_PROFILE_FIELDS and f not in fields:
+                fields.append(f)
+    return fields
+
+
+def profile_projection(params, default="full"):
+    """
+    Mongo projection for ?fields=: a preset name, a comma-separated list
+    of fields, or both (fields=card,email). Unknown / private names are
+    ignored; nothing usable falls back to the `default` preset.
+    """
+    names = parse_multi(params, "fields")
+    fields = _fieldset(names)
+    if "full" in names or (not fields and default == "full"):
+        return PUBLIC_PROFILE_PROJECTION
+    return {f: 1 for f in (fields or PROFILE_FIELDSETS[default])}
+
+
+def with_fields(projection, *fields):
+    """An inclusion projection extended with fields the server itself needs."""
+    if projection is PUBLIC_PROFILE_PROJECTION:
+        return projection
+    return {**projection, **{f: 1 for f in fields if f != "_id"}}
+
+
+def added_fields(requested, projection):
+    """Fields with_fields() put in `projection` that `requested` doesn't include."""
+    if projection is PUBLIC_PROFILE_PROJECTION or requested is PUBLIC_PROFILE_PROJECTION:
+        return ()
+    return tuple(f for f in projection if f not in requested and f != "_id")
+
+
+def pick_fields(doc, projection):
+    """Applies an inclusion projection to an already loaded document."""
+    if projection is PUBLIC_PROFILE_PROJECTION:
+        return doc
+    return {k: v for k, v in doc.items() if k == "_id" or k in projection}
+
+
 # ----------------------------
 # Auth
 # ----------------------------
@@ -140,23 +354,27 @@ class SignUpView(APIView):
         except Exception:
             return Response({"error": "age must be a number"}, status=400)
 
-        preference = parse_preference(data.get("preference"))
         romantic_orientation = (data.get("romantic_orientation") or "").strip()
         email = (data.get("email") or "").strip().lower()
 
+        try:
+            password_hash = hash_password(password)
+        except HashingBusy:
+            return hashing_busy()
+
         now = datetime.utcnow()
-        token = str(uuid4())
 
         user_doc = {
             "username": username,
-            "password_hash": make_password(password),
-            "session_token": token,
+            "password_hash": password_hash,
+            "token_generation": 0,
             "created_at": now,
             "updated_at": now,
+            "last_active_at": now,
 
             "name": (data.get("name") or "").strip() or None,
             "age": age,
-            "preference": preference,
+            **preference_fields(data.get("preference")),
 
             "orientation": (data.get("orientation") or "").strip() or None,
             "romantic_orientation": romantic_orientation,
@@ -170,10 +388,19 @@ class SignUpView(APIView):
             "contact": data.get("contact"),
             "email": email,
 
-            "liked": [],
+            "rand": new_random_key(),
+            # counted from the start (api/letters.py)
+            "unread_letters": 0,
         }
 
-        user_id = users.insert_one(user_doc).inserted_id
+        try:
+            user_id = users.insert_one(user_doc).inserted_id
+        except DuplicateKeyError:
+            # lost a race with a concurrent signup (username_unique index)
+            return Response({"error": "username already exists"}, status=400)
+        profile_cache().invalidate(user_id)
+
+        token = issue_token(user_id, generation=0)
         return Response(
             {"message": "Signup successful", "token": token, "user_id": str(user_id)},
             status=status.HTTP_201_CREATED,
@@ -192,18 +419,30 @@ class LoginView(APIView):
         if not username or not password:
             return Response({"error": "username and password are required"}, status=400)
 
-        user = users.find_one({"username": username})
+        user = users.find_one(
+            {"username": username}, {"password_hash": 1, "token_generation": 1, "session_token": 1}
+        )
         if not user:
             return Response({"error": "Invalid username or password"}, status=401)
 
-        if not check_password(password, user.get("password_hash", "")):
+        try:
+            valid, needs_rehash = verify_password(password, user.get("password_hash", ""))
+        except HashingBusy:
+            return hashing_busy()
+        if not valid:
             return Response({"error": "Invalid username or password"}, status=401)
-
-        token = str(uuid4())
-        users.update_one(
-            {"_id": user["_id"]},
-            {"$set": {"session_token": token, "updated_at": datetime.utcnow()}},
-        )
+        if needs_rehash:
+            # hasher settings changed since this hash was made
+            rehash_later(users, user["_id"], password, user["password_hash"])
+
+        # Signed tokens need no write: every device gets its own token,
+        # all valid until the user's token_generation is bumped. A legacy
+        # uuid token still stored on the user is retired now, so old
+        # sessions phase out as their users sign in again.
+        if user.get("session_token"):
+            users.update_one({"_id": user["_id"]}, {"$unset": {"session_token": ""}})
+        token = issue_token(user["_id"], generation=user.get("token_generation") or 0)
+        touch_active(user["_id"])
 
         return Response(
             {"message": "Login successful", "token": token, "user_id": str(user["_id"])},
@@ -227,7 +466,7 @@ class ResetPasswordView(APIView):
         if len(new_password) < 6:
             return Response({"error": "Password must be at least 6 characters"}, status=400)
 
-        user = users.find_one({"username": username})
+        user = users.find_one({"username": username}, {"email": 1})
         if not user:
             return Response({"message": "If the user exists, password was updated"}, status=200)
 
@@ -236,19 +475,44 @@ class ResetPasswordView(APIView):
         if stored_email and email != stored_email:
             return Response({"error": "Email does not match our records"}, status=403)
 
-        token = str(uuid4())
+        try:
+            password_hash = hash_password(new_password)
+        except HashingBusy:
+            return hashing_busy()
+
         users.update_one(
             {"_id": user["_id"]},
             {"$set": {
-                "password_hash": make_password(new_password),
-                "session_token": token,
+                "password_hash": password_hash,
                 "updated_at": datetime.utcnow()
             }},
         )
+        # sign out every device that logged in with the old password
+        bump_generation(users, user["_id"])
 
         return Response({"message": "Password updated"}, status=status.HTTP_200_OK)
 
 
+class LogoutView(APIView):
+    """
+    POST /api/logout
+
+    Signs the caller out on every device by bumping their token
+    generation; tokens issued before it stop validating.
+    """
+
+    def post(self, request):
+        db = get_db()
+        users = db["users"]
+
+        uid, err = require_session(request, users, request.headers.get("X-User-Id"))
+        if err:
+            return err
+
+        bump_generation(users, uid)
+        return Response({"ok": True}, status=200)
+
+
 class PingView(APIView):
     def get(self, request):
         return Response({"message": "pong"}, status=status.HTTP_200_OK)
@@ -258,18 +522,22 @@ class PingView(APIView):
 # Profiles list (feed) - now from users
 # ----------------------------
 class ProfilesListView(APIView):
+    """
+    GET /api/allprofiles
+
+    Keyset-paginated feed: pass back `next_cursor` as `cursor`. `fields`
+    is a preset (card, the default, or full) and/or a list of fields. `sort` is
+    one of oldest (default), newest, recently_active, age_asc, age_desc.
+    Optional filters: city, orientation, looking_for, gender,
+    romantic_orientation (each multi-value) and age_min / age_max. Filtering happens in the query,
+    so every page holds up to `limit` matching profiles. exclude_seen=1
+    skips profiles the viewer was already shown (see api/seen.py).
+    """
+
     def get(self, request):
         db = get_db()
         users = db["users"]
 
-        try:
-            limit = int(request.query_params.get("limit", 24))
-        except Exception:
-            limit = 24
-        limit = max(1, min(limit, 60))
-
-        cursor = request.query_params.get("cursor")
-
         viewer_id = request.headers.get("X-User-Id") or request.query_params.get("viewer_id")
         viewer_oid = oid(viewer_id) if viewer_id else None
 
@@ -278,89 +546,241 @@ class ProfilesListView(APIView):
             viewer_doc = users.find_one({"_id": viewer_oid}, {"gender": 1})
             viewer_gender = (viewer_doc.get("gender") if viewer_doc else None)
 
-        q = {}
+        seen = None
+        if viewer_oid and is_truthy(request.query_params.get("exclude_seen")):
+            seen = load_seen(db, viewer_oid)
 
-        if cursor:
-            c = oid(cursor)
-            if c:
-                q["_id"] = {"$gt": c}
+        return Response(feed_page(users, request.query_params, viewer_oid, viewer_gender, seen), status=200)
 
-        if viewer_oid:
-            q["_id"] = q.get("_id", {})
-            if isinstance(q["_id"], dict):
-                q["_id"]["$ne"] = viewer_oid
-            else:
-                q["_id"] = {"$ne": viewer_oid}
-
-        if viewer_gender in {"Woman", "Man", "Non-binary", "Other"}:
-            # {"preference": viewer_gender} matches BOTH a legacy scalar
-            # string equal to viewer_gender AND a new array that contains
-            # viewer_gender — Mongo does this automatically.
-            q["$or"] = [
-                {"preference": viewer_gender},
-                {"preference": []},
-                {"preference": ""},
-                {"preference": "Any"},
-                {"preference": None},
-                {"preference": {"$exists": False}},
-            ]
-
-        projection = {
-            "password_hash": 0,
-            "session_token": 0,
-            "liked": 0,
-        }
 
-        docs = list(users.find(q, projection).sort("_id", 1).limit(limit + 1))
+# ?sort= name -> (sort field, descending). _id sorts page on the plain
+# _id cursor; the others on a (field, _id) compound cursor. Every one is
+# backed by an index in api/indexes.py, alone and behind visible_to.
+FEED_SORTS = {
+    "oldest": ("_id", False),
+    "newest": ("_id", True),
+    "recently_active": ("last_active_at", True),
+    "age_asc": ("age", False),
+    "age_desc": ("age", True),
+}
+DEFAULT_FEED_SORT = "oldest"
+FEED_SEEN_SCAN_ROUNDS = 5
 
-        has_more = len(docs) > limit
-        docs = docs[:limit]
-        next_cursor = str(docs[-1]["_id"]) if (has_more and docs) else None
 
-        return Response(
-            {
-                "items": [serialize_mongo(d) for d in docs],
-                "next_cursor": next_cursor,
-                "has_more": has_more,
-            },
-            status=200,
+def feed_sort(params):
+    """(field, descending) for the ?sort= param; unknown names get the default."""
+    return FEED_SORTS.get(params.get("sort") or DEFAULT_FEED_SORT, FEED_SORTS[DEFAULT_FEED_SORT])
+
+
+def feed_sort_spec(field, descending):
+    order = -1 if descending else 1
+    if field == "_id":
+        return [("_id", order)]
+    return [(field, order), ("_id", order)]
+
+
+def feed_position(field, doc):
+    """Keyset position of a feed document under the given sort field."""
+    return doc["_id"] if field == "_id" else (doc.get(field), doc["_id"])
+
+
+def encode_feed_cursor(field, position):
+    return str(position) if field == "_id" else encode_cursor(*position)
+
+
+def decode_feed_cursor(field, cursor):
+    """The position in a next_cursor, or None (first page) if it's missing or bad."""
+    if not cursor:
+        return None
+    return oid(cursor) if field == "_id" else decode_cursor(cursor, 2)
+
+
+def apply_feed_position(q, field, descending, position):
+    """Narrows q to the documents strictly after `position`."""
+    if field == "_id":
+        q.setdefault("_id", {})["$lt" if descending else "$gt"] = position
+    else:
+        # last_active_at / age can be missing on old profiles
+        q.update(after(field, "_id", position, descending, nullable=True))
+
+
+def take_unseen(batch, seen, docs, limit):
+    """
+    Appends batch's profiles not in `seen` to docs, up to limit. Returns
+    the last document scanned (the position to continue from).
+    """
+    last_scanned = None
+    for d in batch:
+        last_scanned = d
+        if d["_id"] not in seen:
+            docs.append(d)
+            if len(docs) == limit:
+                break
+    return last_scanned
+
+
+def unseen_result(docs, batch, batch_size, last_scanned, field):
+    """(docs, next_cursor, has_more) once the unseen scan has stopped."""
+    # more may follow unless the last batch ran dry and was fully consumed
+    has_more = bool(batch) and (len(batch) == batch_size or last_scanned is not batch[-1])
+    next_cursor = None
+    if has_more and last_scanned is not None:
+        next_cursor = encode_feed_cursor(field, feed_position(field, last_scanned))
+    return docs, next_cursor, has_more
+
+
+def _unseen_page(users, q, limit, seen, field, descending, projection):
+    """
+    Feed page that skips profiles in the viewer's seen set. Scans in
+    batches of 2 * limit for at most FEED_SEEN_SCAN_ROUNDS rounds, so a
+    viewer who has seen nearly everything gets a short page (with a
+    cursor to keep going) rather than an unbounded scan. The cursor is
+    the last document scanned, not the last one returned. The async feed
+    runs the same loop on take_unseen / unseen_result.
+    """
+    docs = []
+    last_scanned = None
+    batch_size = limit * 2
+    for _ in range(FEED_SEEN_SCAN_ROUNDS):
+        if last_scanned is not None:
+            apply_feed_position(q, field, descending, feed_position(field, last_scanned))
+        batch = list(
+            users.find(q, projection)
+            .sort(feed_sort_spec(field, descending))
+            .limit(batch_size)
         )
+        last_scanned = take_unseen(batch, seen, docs, limit) or last_scanned
+        if len(docs) == limit or len(batch) < batch_size:
+            break
+    return unseen_result(docs, batch, batch_size, last_scanned, field)
+
+
+def feed_query(params, viewer_oid=None, viewer_gender=None):
+    """
+    The query side of a feed page for the given query params (limit,
+    sort, cursor, fields and the build_feed_filters filters): returns
+    (query, projection, sort field, descending, limit, hidden), hidden
+    being the fields loaded only to build the cursor (for feed_payload
+    to drop). Shared by feed_page and the async feed.
+    """
+    limit = parse_limit(params.get("limit"))
+    field, descending = feed_sort(params)
+    # the sort key is needed to build the cursor
+    requested = profile_projection(params, default="card")
+    projection = with_fields(requested, field)
+
+    q = build_feed_filters(params)
+    q.update(LIVE_PROFILE)
+
+    position = decode_feed_cursor(field, params.get("cursor"))
+    if position is not None:
+        apply_feed_position(q, field, descending, position)
+
+    if viewer_oid:
+        q.setdefault("_id", {})["$ne"] = viewer_oid
+
+    visibility = visibility_filter(viewer_gender)
+    if visibility:
+        q.update(visibility)
+
+    return q, projection, field, descending, limit, added_fields(requested, projection)
+
+
+def feed_result(docs, limit, field):
+    """(docs, next_cursor, has_more) from the up to limit + 1 documents read."""
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = encode_feed_cursor(field, feed_position(field, docs[-1])) if (has_more and docs) else None
+    return docs, next_cursor, has_more
+
+
+def feed_payload(docs, next_cursor, has_more, hidden=(), thumbed=None):
+    """
+    The feed response body; `hidden` fields are removed from each profile.
+    `thumbed` as for add_image_variants (the async feed looks it up itself).
+    """
+    for d in docs:
+        for f in hidden:
+            d.pop(f, None)
+    return {
+        "items": add_image_variants(docs, thumbed=thumbed),
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    }
+
+
+def feed_page(users, params, viewer_oid=None, viewer_gender=None, seen=None):
+    """
+    One page of the feed for the given query params, as the {"items",
+    "next_cursor", "has_more"} payload. Shared by ProfilesListView and
+    BootstrapView. With a `seen` filter (exclude_seen=1), profiles
+    already shown to the viewer are skipped. Profiles carry the `fields`
+    fieldset, card by default.
+    """
+    q, projection, field, descending, limit, hidden = feed_query(params, viewer_oid, viewer_gender)
+
+    if seen is None:
+        docs = list(
+            users.find(q, projection)
+            .sort(feed_sort_spec(field, descending))
+            .limit(limit + 1)
+        )
+        docs, next_cursor, has_more = feed_result(docs, limit, field)
+    else:
+        docs, next_cursor, has_more = _unseen_page(users, q, limit, seen, field, descending, projection)
+
+    return feed_payload(docs, next_cursor, has_more, hidden)
 
 
 # ----------------------------
-# Saved profiles (liked) - from users.liked
+# Saved profiles (liked) - from the likes edges
 # ----------------------------
 class ProfilessavedListView(APIView):
+    """
+    GET /api/profilessaved/<user_id>
+
+    The user's saved profiles in save order (oldest first), `limit` per
+    page with `next_cursor` / `has_more`. Optional filters, the same ones
+    SavedPage offers: city, orientation, looking_for, gender,
+    romantic_orientation, age_min / age_max, and matches_only=1 (only
+    people who saved the user back).
+    """
+
     def get(self, request, user_id):
         db = get_db()
-        users = db["users"]
+        params = request.query_params
 
         uid = oid(user_id)
         if not uid:
-            return Response({"items": []}, status=200)
-
-        me = users.find_one({"_id": uid}, {"liked": 1})
-        liked_raw = (me or {}).get("liked", [])
-
-        liked_ids = []
-        for x in liked_raw:
-            if isinstance(x, ObjectId):
-                liked_ids.append(x)
-            else:
-                o = oid(x)
-                if o:
-                    liked_ids.append(o)
-
-        if not liked_ids:
-            return Response({"items": []}, status=200)
-
-        docs = list(
-            users.find(
-                {"_id": {"$in": liked_ids}},
-                {"password_hash": 0, "session_token": 0, "liked": 0},
-            )
+            return Response({"items": [], "next_cursor": None, "has_more": False}, status=200)
+
+        docs, next_cursor, has_more = likes.saved_page(
+            db,
+            uid,
+            limit=parse_limit(params.get("limit")),
+            cursor=params.get("cursor"),
+            profile_filter=build_feed_filters(params),
+            matches_only=is_truthy(params.get("matches_only")),
+            projection=PUBLIC_PROFILE_PROJECTION,
+            load=lambda ids: cached_profiles(db["users"], ids),
+        )
+        # validators describe the page actually sent (which may be cached),
+        # so a 304 and the 200 it stands for always agree
+        etag = saved_page_etag(docs, next_cursor, has_more)
+        last_modified = latest_profile_change(docs)
+        resp = not_modified(request, etag, last_modified)
+        if resp is not None:
+            return resp
+
+        response = Response(
+            {
+                "items": add_image_variants(docs),
+                "next_cursor": next_cursor,
+                "has_more": has_more,
+            },
+            status=200,
         )
-        return Response({"items": [serialize_mongo(d) for d in docs]}, status=200)
+        return with_validators(response, etag, last_modified)
 
 
 # ----------------------------
@@ -375,11 +795,21 @@ class ProfileView(APIView):
         if not uid:
             return Response({"error": "Invalid user id"}, status=400)
 
-        doc = users.find_one({"_id": uid}, {"password_hash": 0, "session_token": 0, "liked": 0})
+        doc = cached_profiles(users, [uid]).get(uid)
         if not doc:
             return Response({"error": "Profile not found"}, status=404)
 
-        return Response(serialize_mongo(doc), status=200)
+        # validators describe the body actually sent (which may be cached),
+        # for the 304 as well as the 200
+        etag = profile_etag(doc)
+        last_modified = latest_profile_change([doc])
+        resp = not_modified(request, etag, last_modified, PROFILE_CACHE_CONTROL)
+        if resp is not None:
+            return resp
+
+        return with_validators(
+            Response(add_image_variants([doc])[0], status=200), etag, last_modified, PROFILE_CACHE_CONTROL
+        )
 
     def put(self, request, user_id):
         db = get_db()
@@ -399,7 +829,8 @@ class ProfileView(APIView):
                 return Response({"error": "Age must be a number"}, status=400)
 
         if "preference" in update_fields:
-            update_fields["preference"] = parse_preference(update_fields["preference"])
+            # visible_to is derived from preference and always written with it
+            update_fields.update(preference_fields(update_fields["preference"]))
 
         if "romantic_orientation" in update_fields and update_fields["romantic_orientation"] is not None:
             update_fields["romantic_orientation"] = str(update_fields["romantic_orientation"]).strip()
@@ -409,11 +840,82 @@ class ProfileView(APIView):
 
         update_fields["updated_at"] = datetime.utcnow()
         try:
-            users.update_one({"_id": uid}, {"$set": update_fields})
+            doc = users.find_one_and_update(
+                {"_id": uid},
+                {"$set": update_fields},
+                projection=PUBLIC_PROFILE_PROJECTION,
+                return_document=ReturnDocument.AFTER,
+            )
         except DuplicateKeyError:
             return Response({"error": "Username already exists"}, status=409)
-        doc = users.find_one({"_id": uid}, {"password_hash": 0, "session_token": 0, "liked": 0})
-        return Response(serialize_mongo(doc), status=200)
+        if not doc:
+            return Response({"error": "Profile not found"}, status=404)
+        profile_cache().invalidate(uid)
+        if "image_url" in update_fields:
+            # local thumbnails were made from the old image
+            db["image_thumbs"].delete_many({"user_id": uid})
+        return Response(add_image_variants([doc])[0], status=200)
+
+    def delete(self, request, user_id):
+        """
+        Deletes the caller's account. The profile disappears at once; its
+        likes, letters, thumbnails and photo are removed in the background
+        (api/accounts.py), so this answers 202 with the job's progress.
+        """
+        db = get_db()
+        users = db["users"]
+
+        uid, err = require_session(request, users, user_id)
+        if err:
+            return err
+
+        job = accounts.tombstone(db, uid)
+        if not job:
+            return Response({"error": "Profile not found"}, status=404)
+        profile_cache().invalidate(uid)
+        accounts.schedule(uid)
+
+        return Response(
+            {"ok": True, "deletion": job.get("state"), "step": job.get("step")},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class ThumbnailView(APIView):
+    """
+    GET /api/thumbs/<user_id>/<size>
+
+    A square thumbnail made by `manage.py build_thumbnails` for a photo
+    that is not on Cloudinary. Without one for the current image_url,
+    redirects to the original (profiles only link here once thumbnails
+    exist, see api/images.py), as long as that is a plain http(s) URL.
+    """
+
+    def get(self, request, user_id, size):
+        db = get_db()
+        uid = oid(user_id)
+        if not uid:
+            return Response({"error": "Invalid user id"}, status=400)
+
+        user = db["users"].find_one({"_id": uid, **LIVE_PROFILE}, {"image_url": 1})
+        if not user or not user.get("image_url"):
+            return Response({"error": "Image not found"}, status=404)
+
+        thumb = db["image_thumbs"].find_one(
+            {"_id": f"{uid}:{size}", "source_url": user["image_url"]},
+            {"data": 1, "content_type": 1, "created_at": 1},
+        )
+        if thumb:
+            etag = make_etag("thumb", uid, size, thumb.get("created_at"))
+            resp = not_modified(request, etag, cache_control=THUMB_CACHE_CONTROL)
+            if resp is not None:
+                return resp
+            response = HttpResponse(bytes(thumb["data"]), content_type=thumb.get("content_type") or "image/webp")
+            return with_validators(response, etag, thumb.get("created_at"), THUMB_CACHE_CONTROL)
+
+        if not web_image_url(user["image_url"]):
+            return Response({"error": "Image not found"}, status=404)
+        return HttpResponseRedirect(user["image_url"])
 
 
 class CloudinaryDeleteView(APIView):
@@ -422,11 +924,9 @@ class CloudinaryDeleteView(APIView):
         if not public_id:
             return Response({"error": "public_id is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            result = cloudinary.uploader.destroy(public_id)
-            return Response({"result": result.get("result", "unknown")}, status=status.HTTP_200_OK)
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        # deleted later, in batches, by manage.py drain_cloudinary_deletions
+        cloudinary_queue.enqueue(get_db(), public_id)
+        return Response({"result": "queued"}, status=status.HTTP_202_ACCEPTED)
 
 
 # ----------------------------
@@ -435,25 +935,26 @@ class CloudinaryDeleteView(APIView):
 class LikesView(APIView):
     def get(self, request, user_id, profile_id=None):
         db = get_db()
-        users = db["users"]
 
         uid = oid(user_id)
         if not uid:
             return Response({"liked": []}, status=status.HTTP_200_OK)
 
-        me = users.find_one({"_id": uid}, {"liked": 1})
-        liked_raw = (me or {}).get("liked", [])
-
-        liked = []
-        for x in liked_raw:
-            if isinstance(x, ObjectId):
-                liked.append(str(x))
-            else:
-                o = oid(x)
-                if o:
-                    liked.append(str(o))
-
-        return Response({"liked": liked}, status=status.HTTP_200_OK)
+        # Read the version before the edges: a like landing in between
+        # then costs one extra 200 later, never a stale 304.
+        version = db["users"].find_one({"_id": uid}, {"likes_given": 1, "likes_updated_at": 1}) or {}
+        etag = None
+        if version.get("likes_given") is not None:
+            etag = make_etag("liked", uid, version["likes_given"], version.get("likes_updated_at"))
+            resp = not_modified(request, etag, version.get("likes_updated_at"))
+            if resp is not None:
+                return resp
+
+        liked = [str(x) for x in likes.liked_ids(db, uid)]
+        response = Response({"liked": liked}, status=status.HTTP_200_OK)
+        if etag:
+            with_validators(response, etag, version.get("likes_updated_at"))
+        return response
 
     def post(self, request, user_id, profile_id):
         db = get_db()
@@ -469,15 +970,10 @@ class LikesView(APIView):
         if uid == pid:
             return Response({"error": "Cannot like yourself"}, status=status.HTTP_400_BAD_REQUEST)
 
-        res = users.update_one(
-            {"_id": uid},
-            {"$addToSet": {"liked": pid}, "$set": {"updated_at": datetime.utcnow()}},
-        )
-        if res.matched_count == 0:
-            return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
-
-        other = users.find_one({"_id": pid}, {"liked": 1})
-        is_match = bool(other and uid in (other.get("liked") or []))
+        liked = likes.add_like(db, uid, pid)
+        if liked is None:
+            return Response({"error": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        _, is_match = liked
 
         return Response({"ok": True, "match": is_match}, status=status.HTTP_200_OK)
 
@@ -493,12 +989,7 @@ class LikesView(APIView):
         if not pid:
             return Response({"error": "Invalid id"}, status=status.HTTP_400_BAD_REQUEST)
 
-        res = users.update_one(
-            {"_id": uid},
-            {"$pull": {"liked": pid}, "$set": {"updated_at": datetime.utcnow()}},
-        )
-        if res.matched_count == 0:
-            return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+        likes.remove_like(db, uid, pid)
 
         return Response({"ok": True}, status=status.HTTP_200_OK)
 
@@ -523,7 +1014,7 @@ class WriteLatterView(APIView):
         if sender == receiver:
             return Response({"error": "You can't send a letter to yourself"}, status=400)
 
-        if not users.find_one({"_id": receiver}, {"_id": 1}):
+        if not users.find_one({"_id": receiver, **LIVE_PROFILE}, {"_id": 1}):
             return Response({"error": "Receiver not found"}, status=404)
 
         letter = (request.data.get("letter") or "").strip()
@@ -532,10 +1023,6 @@ class WriteLatterView(APIView):
         if len(letter) > 2000:
             return Response({"error": "Letter is too long (max 2000)"}, status=400)
 
-        existing = letters.find_one({"sender_id": sender, "receiver_id": receiver})
-        if existing:
-            return Response({"error": "You already sent a letter to this user"}, status=409)
-
         doc = {
             "sender_id": sender,
             "receiver_id": receiver,
@@ -543,22 +1030,44 @@ class WriteLatterView(APIView):
             "created_at": datetime.utcnow(),
             "read_at": None,
         }
-        inserted_id = letters.insert_one(doc).inserted_id
+        # One letter per (sender, receiver) is enforced by the
+        # sender_receiver_unique index (api/indexes.py), built by the
+        # procfile's release step; outside DEBUG the startup index check
+        # refuses to serve without it.
+        try:
+            inserted_id = letters.insert_one(doc).inserted_id
+        except DuplicateKeyError:
+            return Response({"error": "You already sent a letter to this user"}, status=409)
+        bump_unread(db, receiver, 1)
 
         return Response({"ok": True, "letter_id": str(inserted_id)}, status=status.HTTP_201_CREATED)
 
 
 class InboxView(APIView):
+    """
+    GET /api/inbox/<user_id>
+
+    The caller's letters, newest first, `limit` per page (default 50,
+    max 200) with `next_cursor` / `has_more`; ?unread_only=1 skips read
+    letters. Each letter gets its sender's name.
+    """
+
     def get(self, request, user_id):
         db = get_db()
-        letters = db["letters"]
         users = db["users"]
+        params = request.query_params
 
         uid, err = require_session(request, users, user_id)
         if err:
             return err
 
-        docs = list(letters.find({"receiver_id": uid}).sort("created_at", -1).limit(200))
+        docs, next_cursor, has_more = inbox_page(
+            db,
+            uid,
+            parse_limit(params.get("limit"), default=50, maximum=200),
+            cursor=params.get("cursor"),
+            unread_only=is_truthy(params.get("unread_only")),
+        )
 
         sender_ids = []
         for d in docs:
@@ -567,22 +1076,32 @@ class InboxView(APIView):
                 sender_ids.append(sid)
 
         sender_map = {}
-        if sender_ids:
-            sender_profiles = users.find(
-                {"_id": {"$in": list(set(sender_ids))}},
-                {"username": 1, "name": 1}
-            )
-            for sp in sender_profiles:
-                sender_map[str(sp["_id"])] = sp.get("username") or sp.get("name") or "Unknown"
+        for sp in cached_profiles(users, sender_ids).values():
+            sender_map[str(sp["_id"])] = sp.get("username") or sp.get("name") or "Unknown"
 
-        out = []
         for d in docs:
-            item = serialize_mongo(d)
-            sid = item.get("sender_id")
-            item["sender_username"] = sender_map.get(str(sid), "Unknown")
-            out.append(item)
+            d["sender_username"] = sender_map.get(str(d.get("sender_id")), "Unknown")
+
+        return Response({"items": docs, "next_cursor": next_cursor, "has_more": has_more}, status=200)
 
-        return Response({"items": out}, status=200)
+
+class UnreadCountView(APIView):
+    """
+    GET /api/inbox/<user_id>/unread-count
+
+    {"unread": n} from the maintained counter; the session check and the
+    counter come from the same single query.
+    """
+
+    def get(self, request, user_id):
+        db = get_db()
+        users = db["users"]
+
+        me, err = require_caller(request, users, user_id, fields=("unread_letters",))
+        if err:
+            return err
+
+        return Response({"unread": unread_count(db, me["_id"], me)}, status=200)
 
 
 class MarkLetterReadView(APIView):
@@ -600,20 +1119,28 @@ class MarkLetterReadView(APIView):
         if not lid:
             return Response({"error": "Invalid letter id"}, status=400)
 
-        doc = letters.find_one({"_id": lid})
-        if not doc:
-            return Response({"error": "Letter not found"}, status=404)
-
-        if doc.get("receiver_id") != uid:
-            return Response({"error": "Not allowed"}, status=403)
-
+        # One conditional round trip, scoped to the receiver (someone
+        # else's letter looks exactly like a missing one). $ifNull keeps
+        # the first read time; the BEFORE image tells us whether this
+        # call is what turned the letter from unread to read.
         now = datetime.now(timezone.utc)
-        letters.update_one(
-            {"_id": lid},
-            {"$set": {"read_at": now}}
+        before = letters.find_one_and_update(
+            {"_id": lid, "receiver_id": uid},
+            [{"$set": {"read_at": {"$ifNull": ["$read_at", now]}}}],
+            projection={"read_at": 1},
+            return_document=ReturnDocument.BEFORE,
         )
+        if not before:
+            return Response({"error": "Letter not found"}, status=404)
+
+        read_at = before.get("read_at")
+        if read_at is None:
+            bump_unread(db, uid, -1)
+            read_at = now
+        elif read_at.tzinfo is None:
+            read_at = read_at.replace(tzinfo=timezone.utc)
 
-        return Response({"ok": True, "read_at": now.isoformat()}, status=200)
+        return Response({"ok": True, "read_at": read_at.isoformat()}, status=200)
 
 
 class DeleteLetterView(APIView):
@@ -631,14 +1158,12 @@ class DeleteLetterView(APIView):
         if not lid:
             return Response({"error": "Invalid letter id"}, status=400)
 
-        doc = letters.find_one({"_id": lid})
+        doc = letters.find_one_and_delete({"_id": lid, "receiver_id": uid}, projection={"read_at": 1})
         if not doc:
             return Response({"error": "Letter not found"}, status=404)
 
-        if doc.get("receiver_id") != uid:
-            return Response({"error": "Not allowed"}, status=403)
-
-        letters.delete_one({"_id": lid})
+        if doc.get("read_at") is None:
+            bump_unread(db, uid, -1)
         return Response({"ok": True}, status=200)
 
 
@@ -654,13 +1179,52 @@ class VerifySessionView(APIView):
         if not uid or not token:
             return Response({"valid": False}, status=401)
 
-        user = users.find_one({"_id": uid}, {"session_token": 1})
-        if not user or user.get("session_token") != token:
+        if not verify_session(users, uid, token):
             return Response({"valid": False}, status=401)
 
         return Response({"valid": True}, status=200)
 
 
+class BootstrapView(APIView):
+    """
+    GET /api/bootstrap
+
+    Everything the homepage needs on mount, in one round trip: checks the
+    session once (the same query also loads the caller's gender and
+    unread counter), then fetches the liked ids, the first feed page and
+    the liked-by ids concurrently. Accepts the feed's query params.
+    """
+
+    def get(self, request):
+        db = get_db()
+        users = db["users"]
+
+        me, err = require_caller(
+            request, users, request.headers.get("X-User-Id"), fields=("gender", "unread_letters")
+        )
+        if err:
+            return err
+        uid = me["_id"]
+
+        liked, feed, liked_by, unread = run_concurrently(
+            lambda: [str(x) for x in likes.liked_ids(db, uid)],
+            lambda: feed_page(users, request.query_params, uid, me.get("gender")),
+            lambda: [str(x) for x in likes.liked_by_ids(db, uid)],
+            lambda: unread_count(db, uid, me),
+        )
+
+        return Response(
+            {
+                "valid": True,
+                "liked": liked,
+                "feed": feed,
+                "liked_by": liked_by,
+                "unread_count": unread,
+            },
+            status=200,
+        )
+
+
 class health(APIView):
     authentication_classes = []
     permission_classes = []
@@ -669,26 +1233,98 @@ class health(APIView):
         return Response({"ok": True})
 
 
+class ProfileCacheStatsView(APIView):
+    """
+    GET /api/metrics/cache
+
+    Profile cache hits / misses / evictions of the worker that served
+    the request (see api/profilecache.py). Needs X-Metrics-Token
+    (require_metrics_access).
+    """
+
+    def get(self, request):
+        denied = require_metrics_access(request)
+        if denied:
+            return denied
+        return Response(profile_cache().stats(), status=200)
+
+
+class PasswordHashingStatsView(APIView):
+    """
+    GET /api/metrics/passwords
+
+    Password hashing pool of the worker that served the request: hashes
+    done / rejected / in flight, queue and hash time percentiles (ms).
+    Needs X-Metrics-Token (require_metrics_access).
+    """
+
+    def get(self, request):
+        denied = require_metrics_access(request)
+        if denied:
+            return denied
+        return Response(hashing_stats(), status=200)
+
+
+class MongoPoolStatsView(APIView):
+    """
+    GET /api/metrics/mongo
+
+    Connection pool numbers of the worker that served the request
+    (open / in-use connections, checkout waits and failures). Needs
+    X-Metrics-Token (require_metrics_access).
+    """
+
+    def get(self, request):
+        denied = require_metrics_access(request)
+        if denied:
+            return denied
+        return Response(pool_stats(), status=200)
+
+
 class LikedByView(APIView):
+    """
+    GET /api/likedby/<user_id>
+
+    Who liked the caller, newest like first, `limit` profiles per page
+    with `next_cursor` / `has_more`. `count` is the total, read from the
+    maintained likes_received counter. Lighter modes:
+      ?count_only=1 -> {"count"}
+      ?ids_only=1   -> {"count", "ids"} (every liker id, no profiles;
+                       enough for match badges)
+    Profiles carry the `fields` fieldset, card by default, cut from the
+    profile cache's full documents.
+    """
+
     def get(self, request, user_id):
         db = get_db()
         users = db["users"]
+        params = request.query_params
 
         uid, err = require_session(request, users, user_id)
         if err:
             return err
 
-        docs = list(
-            users.find(
-                {"liked": uid},
-                {"password_hash": 0, "session_token": 0, "liked": 0},
-            )
-        )
+        count = likes.liked_by_count(db, uid)
+
+        if is_truthy(params.get("count_only")):
+            return Response({"count": count}, status=200)
+
+        if is_truthy(params.get("ids_only")):
+            ids = [str(x) for x in likes.liked_by_ids(db, uid)]
+            return Response({"count": count, "ids": ids}, status=200)
+
+        limit = parse_limit(params.get("limit"))
+        liker_ids, next_cursor, has_more = likes.liked_by_page(db, uid, limit, params.get("cursor"))
+
+        by_id = cached_profiles(users, liker_ids)
+        projection = profile_projection(params, default="card")
 
         return Response(
             {
-                "count": len(docs),
-                "items": [serialize_mongo(d) for d in docs],
+                "count": count,
+                "items": add_image_variants([pick_fields(by_id[i], projection) for i in liker_ids if i in by_id]),
+                "next_cursor": next_cursor,
+                "has_more": has_more,
             },
             status=200,
         )
@@ -697,17 +1333,28 @@ class LikedByView(APIView):
 # ----------------------------
 # Random profile (single doc, DB-side random pick)
 # ----------------------------
+RANDOM_SEEN_ATTEMPTS = 8
+RANDOM_EXCLUDE_MAX = 50
+
+
 class RandomProfileView(APIView):
     """
     GET /api/randomprofile
 
-    Returns exactly ONE random profile using MongoDB's $sample aggregation
-    stage, so the cost stays roughly constant regardless of collection
-    size (no need to pull every id/profile to the client just to throw
-    away all but one).
+    Returns exactly ONE random profile with an indexed random-key pick
+    (see api/randomkey.py): a range query around a random point, O(log n)
+    whatever the visibility filter, instead of $match + $sample over the
+    whole eligible set. Falls back to $sample while profiles have no key.
 
     Honors the same viewer-exclusion + preference-visibility rules as
     ProfilesListView, so "random" still respects who's allowed to see whom.
+
+    Skips profiles in the viewer's seen set (exclude_seen=0 turns that
+    off) plus any ids passed in `exclude` that the client hasn't recorded
+    yet. Picks are retried a few times against the set; once nearly
+    everything has been seen, a repeat beats an empty answer.
+
+    `fields` selects the fieldset, card by default.
     """
 
     def get(self, request):
@@ -722,38 +1369,80 @@ class RandomProfileView(APIView):
             viewer_doc = users.find_one({"_id": viewer_oid}, {"gender": 1})
             viewer_gender = viewer_doc.get("gender") if viewer_doc else None
 
-        match_stage = {}
+        match_stage = dict(LIVE_PROFILE)
 
         if viewer_oid:
             match_stage["_id"] = {"$ne": viewer_oid}
 
-        if viewer_gender in {"Woman", "Man", "Non-binary", "Other"}:
-            # Same "empty/legacy preference = anyone" rule as the feed endpoint.
-            match_stage["$or"] = [
-                {"preference": viewer_gender},
-                {"preference": []},
-                {"preference": ""},
-                {"preference": "Any"},
-                {"preference": None},
-                {"preference": {"$exists": False}},
-            ]
-
-        pipeline = []
-        if match_stage:
-            pipeline.append({"$match": match_stage})
-
-        pipeline.append({"$sample": {"size": 1}})
-        pipeline.append({
-            "$project": {
-                "password_hash": 0,
-                "session_token": 0,
-                "liked": 0,
-            }
-        })
-
-        docs = list(users.aggregate(pipeline))
-
-        if not docs:
+        visibility = visibility_filter(viewer_gender)
+        if visibility:
+            # Same visible_to rule as the feed endpoint.
+            match_stage.update(visibility)
+
+        # ids the client has shown but not yet flushed to /api/seen
+        pending = [p for p in (oid(x) for x in parse_multi(request.query_params, "exclude")) if p]
+        if pending:
+            match_stage["_id"] = dict(match_stage.get("_id", {}), **{"$nin": pending[:RANDOM_EXCLUDE_MAX]})
+
+        seen = None
+        if viewer_oid and request.query_params.get("exclude_seen", "1") != "0":
+            seen = load_seen(db, viewer_oid)
+
+        projection = profile_projection(request.query_params, default="card")
+        doc = None
+        for _ in range(RANDOM_SEEN_ATTEMPTS if seen else 1):
+            doc = pick_random(users, match_stage, projection)
+            if doc is None or seen is None or doc["_id"] not in seen:
+                break
+        # seen everything nearby: the last pick is still better than nothing
+        if doc is None:
+            doc = sample_random(users, match_stage, projection)
+
+        if not doc:
             return Response({"error": "No profiles found"}, status=404)
 
-        return Response(serialize_mongo(docs[0]), status=200)
\ No newline at end of file
+        return Response(add_image_variants([doc])[0], status=200)
+
+
+# ----------------------------
+# Seen profiles (feed / random de-duplication)
+# ----------------------------
+SEEN_BATCH_MAX = 500
+
+
+class SeenView(APIView):
+    """
+    POST   /api/seen/<user_id>  {"ids": [...]}  records profiles as shown
+    DELETE /api/seen/<user_id>                  starts the set over
+
+    Clients batch views and send them together; the set itself is a
+    fixed-size Bloom filter (api/seen.py).
+    """
+
+    def post(self, request, user_id):
+        db = get_db()
+        uid, err = require_session(request, db["users"], user_id)
+        if err:
+            return err
+
+        raw = (request.data or {}).get("ids")
+        if not isinstance(raw, list):
+            return Response({"error": "ids must be a list"}, status=400)
+        if len(raw) > SEEN_BATCH_MAX:
+            return Response({"error": f"At most {SEEN_BATCH_MAX} ids per request"}, status=400)
+
+        ids = [p for p in (oid(x) for x in raw) if p]
+        if not ids:
+            return Response({"recorded": 0}, status=200)
+
+        count = record_seen(db, uid, ids)
+        return Response({"recorded": len(ids), "seen": count}, status=200)
+
+    def delete(self, request, user_id):
+        db = get_db()
+        uid, err = require_session(request, db["users"], user_id)
+        if err:
+            return err
+
+        reset_seen(db, uid)
+        return Response({"message": "Seen profiles reset"}, status=200)
@@ -0,0 +1,135 @@
+"""
+Who may see a profile.
+
+`preference` is what the user picked: a list of genders they want to be
+seen by, where an empty list means anyone. Older documents still hold
+the legacy scalars ("", "Any", "Woman", None or no field at all), which
+is why the feed used to match six $or branches.
+
+`visible_to` is derived from it and stored next to it on every write:
+always the explicit list of genders allowed to see the profile, with
+"anyone" expanded to every gender. Visibility for a viewer is then one
+equality on a multikey index, {"visible_to": viewer_gender}.
+Profiles from before it existed get it from the 0002_visible_to data
+migration (`manage.py migrate_mongo`, part of every release); until then
+they are invisible to signed-in viewers, so the mongo system check
+(api/checks.py) refuses to serve while any live profile lacks it.
+`manage.py backfill_visibility` rewrites it for every profile and
+`--check` reports documents where it disagrees with `preference`.
+"""
+from pymongo import UpdateOne
+
+from .profilecache import profile_cache
+
+PREFERENCE_CANON = {"Woman", "Man", "Non-binary", "Other"}
+
+# Fixed order, so stored lists compare equal regardless of input order.
+GENDER_ORDER = ("Man", "Woman", "Non-binary", "Other")
+
+
+def parse_preference(raw):
+    """
+    Normalizes incoming preference data into a clean list of canonical
+    strings, deduplicated, in the order they were sent.
+
+    Accepts:
+      - a list of strings (the new multi-select format)
+      - a single string (legacy format, e.g. "Woman", "", "Any", "any")
+      - None / missing
+
+    "" and "any"/"Any" (legacy single-value "anyone" markers) both resolve
+    to an empty list, matching the new "empty list = anyone" convention.
+    Anything not in PREFERENCE_CANON is silently dropped rather than
+    raising, so a stray/garbled value never blocks the request.
+    """
+    if raw is None:
+        return []
+
+    if isinstance(raw, str):
+        val = raw.strip()
+        if not val or val.lower() == "any":
+            return []
+        raw = [val]
+
+    if not isinstance(raw, list):
+        return []
+
+    cleaned = []
+    for v in raw:
+        if not isinstance(v, str):
+            continue
+        v = v.strip()
+        if v in PREFERENCE_CANON and v not in cleaned:
+            cleaned.append(v)
+    return cleaned
+
+
+def visible_to(preference):
+    """The stored `visible_to` list for a preference in any format."""
+    picked = set(parse_preference(preference))
+    return [g for g in GENDER_ORDER if not picked or g in picked]
+
+
+def visibility_filter(viewer_gender):
+    """
+    Query condition matching the profiles a viewer of this gender may
+    see, or None when the viewer's gender is unknown (no restriction).
+    """
+    if viewer_gender not in PREFERENCE_CANON:
+        return None
+    return {"visible_to": viewer_gender}
+
+
+def preference_fields(raw):
+    """{"preference", "visible_to"} to $set together on any write."""
+    preference = parse_preference(raw)
+    return {"preference": preference, "visible_to": visible_to(preference)}
+
+
+def backfill_visibility(users, batch_size=1000, only_missing=False, on_batch=None):
+    """
+    Rewrites `preference` (normalized) and `visible_to` for every profile,
+    or only those without `visible_to`, in _id-ordered batches. Changed
+    profiles are dropped from the profile cache, so cached copies don't
+    keep the old visibility until their TTL runs out.
+    Returns the number of documents changed.
+    """
+    base = {"visible_to": {"$exists": False}} if only_missing else {}
+    last = None
+    changed = 0
+    while True:
+        q = dict(base)
+        if last is not None:
+            q["_id"] = {"$gt": last}
+        docs = list(users.find(q, {"preference": 1, "visible_to": 1}).sort("_id", 1).limit(batch_size))
+        if not docs:
+            break
+
+        ops, ids = [], []
+        for d in docs:
+            fields = preference_fields(d.get("preference"))
+            if d.get("preference") != fields["preference"] or d.get("visible_to") != fields["visible_to"]:
+                ops.append(UpdateOne({"_id": d["_id"]}, {"$set": fields}))
+                ids.append(d["_id"])
+        if ops:
+            changed += users.bulk_write(ops, ordered=False).modified_count
+            profile_cache().invalidate(*ids)
+        last = docs[-1]["_id"]
+        if on_batch:
+            on_batch(last, changed)
+    return changed
+
+
+def visibility_drift(users, limit=None):
+    """
+    Profiles whose stored `visible_to` doesn't match their `preference`.
+    Yields (_id, stored visible_to, expected visible_to), up to `limit`.
+    """
+    found = 0
+    for d in users.find({}, {"preference": 1, "visible_to": 1}).sort("_id", 1):
+        expected = visible_to(d.get("preference"))
+        if d.get("visible_to") != expected:
+            yield d["_id"], d.get("visible_to"), expected
+            found += 1
+            if limit and found >= limit:
+                return
@@ -0,0 +1,53 @@
+"""
+Response size per fieldset: fields=full vs the card default.
+
+Fetches the same pages from a running server with each fieldset and
+prints bytes per response (raw and gzip, since that is what goes over
+the wire behind most proxies), e.g.
+
+    python bench/fieldsets.py --base-url http://127.0.0.1:8000 \
+        --user-id <id> --token <session token> --limit 60
+"""
+import argparse
+import gzip
+import json
+import urllib.request
+
+
+def fetch(url, headers):
+    req = urllib.request.Request(url, headers=headers)
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return resp.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--limit", type=int, default=60)
+    args = parser.parse_args()
+
+    headers = {"X-User-Id": args.user_id, "X-Session-Token": args.token}
+    base = args.base_url.rstrip("/")
+    routes = {
+        "allprofiles": f"{base}/api/allprofiles?limit={args.limit}",
+        "randomprofile": f"{base}/api/randomprofile?exclude_seen=0",
+        "likedby": f"{base}/api/likedby/{args.user_id}?limit={args.limit}",
+    }
+
+    results = {}
+    for name, url in routes.items():
+        row = {}
+        for fieldset in ("full", "card"):
+            body = fetch(f"{url}&fields={fieldset}", headers)
+            row[fieldset] = {"bytes": len(body), "gzip_bytes": len(gzip.compress(body))}
+        row["saved_pct"] = round(100 * (1 - row["card"]["bytes"] / row["full"]["bytes"]), 1) if row["full"]["bytes"] else 0
+        results[name] = row
+        print(f"{name:14} full {row['full']['bytes']:>8} B  card {row['card']['bytes']:>8} B  (-{row['saved_pct']}%)")
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
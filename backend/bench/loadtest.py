@@ -0,0 +1,438 @@
+"""
+Load test for every route in api/urls.py.
+
+Drives each route with a concurrent load generator against a database
+filled by bench/seed.py and reports, per route, throughput, p50/p95/p99
+latency and Mongo commands per request (the X-Mongo-Commands header).
+The result is JSON stamped with the git commit, so two runs can be
+compared with --compare.
+
+Against a running server (same SECRET_KEY as this checkout, since
+session tokens are signed locally, the same METRICS_TOKEN for the
+/api/metrics routes, and DB_NAME pointing at the seeded database):
+
+    python bench/seed.py --db acedating_bench --users 20000 --out bench/manifest.json
+    DB_NAME=acedating_bench gunicorn -c gunicorn.conf.py config.wsgi:application
+    python bench/loadtest.py --manifest bench/manifest.json --out bench/results-$(git rev-parse --short HEAD).json
+
+The /api/async/ routes only exist on the ASGI process (config/asgi.py);
+they are driven when --async-base-url points at one and skipped
+otherwise.
+
+In-process micro-benchmark on mongomock (no server, no MongoDB; the
+async routes are skipped, Mongo command counts are 0, and a few routes
+mongomock can't run report errors):
+
+    python bench/loadtest.py --mongomock --users 2000
+
+Compare with an earlier run (exit status 1 if any route's p99 got worse
+by more than --tolerance percent or it sends more Mongo commands):
+
+    python bench/loadtest.py --manifest bench/manifest.json --compare bench/results-abc1234.json
+
+Routes that log out, reset or delete a user only use the seeded
+burners, one per request, so the rest of the population stays valid.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from api.sessions import issue_token  # noqa: E402
+
+FEED_SORTS = ("oldest", "newest", "recently_active", "age_asc", "age_desc")
+CITIES = ("gush-dan", "jerusalem-area", "hasharon", "haifa-krayot")
+
+
+class Context:
+    """Seeded ids the route builders draw from, plus the one-use pools."""
+
+    def __init__(self, manifest, seed):
+        self.m = manifest
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = {}
+        # password resets get their own burners: a reset signs that user out
+        split = len(manifest["burners"]) * 2 // 3
+        self.pools = {
+            "burners": list(manifest["burners"][:split]),
+            # (username, email): reset-password checks the email on file
+            "burner_logins": list(zip(manifest["burner_usernames"], manifest["burner_emails"]))[split:],
+            "letters": list(manifest["letters"]),
+        }
+        self.n = 0
+
+    def user(self):
+        with self.lock:
+            return self.rng.choice(self.m["users"])
+
+    def pair(self):
+        with self.lock:
+            a, b = self.rng.sample(self.m["users"], 2)
+        return a, b
+
+    def username(self):
+        with self.lock:
+            return self.rng.choice(self.m["usernames"])
+
+    def take(self, pool):
+        with self.lock:
+            return self.pools[pool].pop() if self.pools[pool] else None
+
+    def seq(self):
+        with self.lock:
+            self.n += 1
+            return self.n
+
+    def auth(self, uid):
+        if uid not in self.tokens:
+            self.tokens[uid] = issue_token(uid, generation=0)
+        return {"X-User-Id": uid, "X-Session-Token": self.tokens[uid]}
+
+
+# Each builder returns (method, path, body, headers), or None once its
+# one-use pool is empty.
+def _feed_query(ctx):
+    with ctx.lock:
+        params = ["limit=24", f"sort={ctx.rng.choice(FEED_SORTS)}"]
+        if ctx.rng.random() < 0.3:
+            params.append(f"city={ctx.rng.choice(CITIES)}")
+        if ctx.rng.random() < 0.2:
+            params.append("age_min=25&age_max=40")
+    return "&".join(params)
+
+
+def _profile_delete(ctx):
+    uid = ctx.take("burners")
+    return uid and ("DELETE", f"/api/profile/{uid}", None, ctx.auth(uid))
+
+
+def _logout(ctx):
+    uid = ctx.take("burners")
+    return uid and ("POST", "/api/logout", {}, ctx.auth(uid))
+
+
+def _reset_password(ctx):
+    login = ctx.take("burner_logins")
+    return login and (
+        "POST",
+        "/api/reset-password",
+        {"username": login[0], "email": login[1], "new_password": "bench-password-2"},
+        {},
+    )
+
+
+def _letter_read(ctx):
+    letter = ctx.take("letters")
+    return letter and (
+        "POST", f"/api/letters/{letter['id']}/read", {"user_id": letter["receiver"]}, ctx.auth(letter["receiver"])
+    )
+
+
+def _letter_delete(ctx):
+    letter = ctx.take("letters")
+    return letter and (
+        "DELETE", f"/api/letters/{letter['id']}?user_id={letter['receiver']}", None, ctx.auth(letter["receiver"])
+    )
+
+
+def _signup(ctx):
+    return ("POST", "/api/signup", {
+        "username": f"loadtest-{os.getpid()}-{ctx.seq()}",
+        "password": "bench-password",
+        "age": 30,
+        "gender": "Woman",
+        "preference": ["Man", "Woman"],
+        "city": "gush-dan",
+    }, {})
+
+
+def _metrics(path):
+    """Builder for a /api/metrics route (same METRICS_TOKEN as the server)."""
+    return lambda ctx: ("GET", path, None, {"X-Metrics-Token": os.environ.get("METRICS_TOKEN", "")})
+
+
+def _with(fn):
+    """Builder for a route that acts as one random seeded user."""
+    def build(ctx):
+        uid = ctx.user()
+        return fn(ctx, uid)
+    return build
+
+
+def _with_pair(fn):
+    def build(ctx):
+        a, b = ctx.pair()
+        return fn(ctx, a, b)
+    return build
+
+
+# name -> (builder, accepted statuses, async route, one-use)
+ROUTES = {
+    "health": (lambda ctx: ("GET", "/api/health", None, {}), {200}, False, False),
+    "metrics_mongo": (_metrics("/api/metrics/mongo"), {200}, False, False),
+    "metrics_cache": (_metrics("/api/metrics/cache"), {200}, False, False),
+    "metrics_passwords": (_metrics("/api/metrics/passwords"), {200}, False, False),
+    "verify_session": (_with(lambda ctx, u: ("GET", "/api/verify-session", None, ctx.auth(u))), {200}, False, False),
+    "bootstrap": (_with(lambda ctx, u: ("GET", f"/api/bootstrap?{_feed_query(ctx)}", None, ctx.auth(u))), {200}, False, False),
+    "allprofiles": (_with(lambda ctx, u: ("GET", f"/api/allprofiles?{_feed_query(ctx)}", None, {"X-User-Id": u})), {200}, False, False),
+    "allprofiles_anonymous": (lambda ctx: ("GET", f"/api/allprofiles?{_feed_query(ctx)}", None, {}), {200}, False, False),
+    "randomprofile": (_with(lambda ctx, u: ("GET", "/api/randomprofile", None, {"X-User-Id": u})), {200, 404}, False, False),
+    "profile_get": (_with(lambda ctx, u: ("GET", f"/api/profile/{u}", None, {})), {200}, False, False),
+    "profile_put": (_with(lambda ctx, u: ("PUT", f"/api/profile/{u}", {"info": f"updated {time.time()}"}, ctx.auth(u))), {200}, False, False),
+    "thumbs": (_with(lambda ctx, u: ("GET", f"/api/thumbs/{u}/96", None, {})), {200, 302, 404}, False, False),
+    "profilessaved": (_with(lambda ctx, u: ("GET", f"/api/profilessaved/{u}?limit=24", None, ctx.auth(u))), {200}, False, False),
+    "likes_get": (_with(lambda ctx, u: ("GET", f"/api/likes/{u}", None, {})), {200}, False, False),
+    "like": (_with_pair(lambda ctx, a, b: ("POST", f"/api/likes/{a}/{b}", {}, ctx.auth(a))), {200}, False, False),
+    "unlike": (_with_pair(lambda ctx, a, b: ("DELETE", f"/api/likes/{a}/{b}", None, ctx.auth(a))), {200}, False, False),
+    "likedby": (_with(lambda ctx, u: ("GET", f"/api/likedby/{u}?limit=24", None, ctx.auth(u))), {200}, False, False),
+    "writelatter": (
+        _with_pair(lambda ctx, a, b: ("POST", f"/api/writelatter/{a}/{b}", {"letter": "hi from the load test"}, ctx.auth(a))),
+        {201, 409}, False, False,
+    ),
+    "inbox": (_with(lambda ctx, u: ("GET", f"/api/inbox/{u}?limit=50", None, ctx.auth(u))), {200}, False, False),
+    "unread_count": (_with(lambda ctx, u: ("GET", f"/api/inbox/{u}/unread-count", None, ctx.auth(u))), {200}, False, False),
+    "seen_post": (
+        _with_pair(lambda ctx, a, b: ("POST", f"/api/seen/{a}", {"ids": [b]}, ctx.auth(a))), {200}, False, False,
+    ),
+    "seen_delete": (_with(lambda ctx, u: ("DELETE", f"/api/seen/{u}", None, ctx.auth(u))), {200}, False, False),
+    "cloudinary_delete": (
+        lambda ctx: ("POST", "/api/cloudinary/delete", {"public_id": f"bench/loadtest-{ctx.seq()}"}, {}), {202}, False, False,
+    ),
+    "login": (
+        lambda ctx: ("POST", "/api/login", {"username": ctx.username(), "password": ctx.m["password"]}, {}),
+        {200}, False, False,
+    ),
+    "signup": (_signup, {201}, False, False),
+    "letter_read": (_letter_read, {200}, False, True),
+    "letter_delete": (_letter_delete, {200}, False, True),
+    "logout": (_logout, {200}, False, True),
+    "reset_password": (_reset_password, {200}, False, True),
+    "profile_delete": (_profile_delete, {202}, False, True),
+    "async_allprofiles": (_with(lambda ctx, u: ("GET", f"/api/async/allprofiles?{_feed_query(ctx)}", None, {"X-User-Id": u})), {200}, True, False),
+    "async_likes_get": (_with(lambda ctx, u: ("GET", f"/api/async/likes/{u}", None, {})), {200}, True, False),
+    "async_like": (_with_pair(lambda ctx, a, b: ("POST", f"/api/async/likes/{a}/{b}", {}, ctx.auth(a))), {200}, True, False),
+    "async_inbox": (_with(lambda ctx, u: ("GET", f"/api/async/inbox/{u}?limit=50", None, ctx.auth(u))), {200}, True, False),
+    "async_verify_session": (_with(lambda ctx, u: ("GET", "/api/async/verify-session", None, ctx.auth(u))), {200}, True, False),
+}
+
+
+# ----------------------------
+# Transports: (status, mongo commands) for one request
+# ----------------------------
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HTTPTransport:
+    def __init__(self, base_url):
+        self.base = base_url.rstrip("/")
+        self.opener = urllib.request.build_opener(_NoRedirect)
+
+    def __call__(self, method, path, body, headers):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(
+            self.base + path, data=data, method=method, headers={"Content-Type": "application/json", **headers}
+        )
+        try:
+            with self.opener.open(req, timeout=30) as resp:
+                resp.read()
+                return resp.status, resp.headers.get("X-Mongo-Commands")
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, e.headers.get("X-Mongo-Commands")
+        except urllib.error.URLError:
+            return None, None
+
+
+class InProcessTransport:
+    """Django's test client, one per thread, straight into the URLconf."""
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def __call__(self, method, path, body, headers):
+        from django.test import Client
+
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = self.local.client = Client(raise_request_exception=False)
+        data = json.dumps(body) if body is not None else ""
+        resp = client.generic(method, path, data, content_type="application/json", headers=headers)
+        return resp.status_code, resp.get("X-Mongo-Commands")
+
+
+# ----------------------------
+# Load generator
+# ----------------------------
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def drive(transport, ctx, name, requests, concurrency, warmup):
+    build, accepted, _, _ = ROUTES[name]
+
+    def one(_):
+        spec = build(ctx)
+        if not spec:
+            return None
+        start = time.perf_counter()
+        code, commands = transport(*spec)
+        return (time.perf_counter() - start) * 1000, code, commands
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(warmup)))
+        started = time.perf_counter()
+        results = [r for r in pool.map(one, range(requests)) if r is not None]
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(ms for ms, _, _ in results)
+    commands = [int(c) for _, _, c in results if c is not None]
+    statuses = {}
+    for _, code, _ in results:
+        statuses[str(code)] = statuses.get(str(code), 0) + 1
+    return {
+        "requests": len(results),
+        "skipped": requests - len(results),
+        "errors": sum(1 for _, code, _ in results if code not in accepted),
+        "statuses": statuses,
+        "rps": round(len(results) / elapsed, 1) if elapsed and results else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mongo_commands_per_request": round(sum(commands) / len(commands), 2) if commands else None,
+    }
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, tolerance):
+    """Prints per-route deltas; returns the names of regressed routes."""
+    regressed = []
+    print(f"{'route':24} {'p99 ms':>18} {'rps':>18} {'mongo cmds':>14}", file=sys.stderr)
+    for name, now in current["routes"].items():
+        before = baseline.get("routes", {}).get(name)
+        if not before:
+            continue
+        worse = before["p99_ms"] and now["p99_ms"] > before["p99_ms"] * (1 + tolerance / 100)
+        more_cmds = (now["mongo_commands_per_request"] or 0) > (before["mongo_commands_per_request"] or 0)
+        if worse or more_cmds:
+            regressed.append(name)
+        print(
+            f"{name:24} {before['p99_ms']:>8} -> {now['p99_ms']:<7} {before['rps']:>8} -> {now['rps']:<7} "
+            f"{before['mongo_commands_per_request']!s:>5} -> {now['mongo_commands_per_request']!s:<5}"
+            f"{'  REGRESSED' if name in regressed else ''}",
+            file=sys.stderr,
+        )
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--async-base-url", help="ASGI server for the /api/async/ routes (skipped without it).")
+    parser.add_argument("--manifest", help="Written by bench/seed.py (not needed with --mongomock).")
+    parser.add_argument("--mongomock", action="store_true", help="Seed mongomock and run the API in-process.")
+    parser.add_argument("--users", type=int, default=2000, help="Population for --mongomock.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per route.")
+    parser.add_argument("--one-use-requests", type=int, default=40, help="Requests per route that uses up burners/letters.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--only", nargs="*", choices=sorted(ROUTES), help="Run just these routes.")
+    parser.add_argument("--out", help="Write the JSON report here (default: stdout only).")
+    parser.add_argument("--compare", help="An earlier report to diff against.")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="Allowed p99 increase in percent for --compare.")
+    args = parser.parse_args()
+
+    if args.mongomock:
+        import mongomock
+
+        from api import mongo
+        from api.mongomock_compat import patch_mongomock
+        from bench.seed import seed
+
+        patch_mongomock()
+        client = mongomock.MongoClient()
+        mongo.use_client(client)
+        manifest = seed(mongo.get_db(), users=args.users, burners=max(200, args.one_use_requests * 3), seed=args.seed)
+        transport = InProcessTransport()
+    else:
+        if not args.manifest:
+            parser.error("--manifest is required unless --mongomock is given")
+        with open(args.manifest) as f:
+            manifest = json.load(f)
+        transport = HTTPTransport(args.base_url)
+    async_transport = HTTPTransport(args.async_base_url) if args.async_base_url and not args.mongomock else None
+
+    ctx = Context(manifest, args.seed)
+    names = args.only or list(ROUTES)
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "at": datetime.now(timezone.utc).isoformat(),
+            "mode": "mongomock" if args.mongomock else "http",
+            "base_url": None if args.mongomock else args.base_url,
+            "async_base_url": None if async_transport is None else args.async_base_url,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "population": manifest["counts"],
+        },
+        "routes": {},
+    }
+
+    for name in names:
+        _, _, is_async, one_use = ROUTES[name]
+        if is_async and async_transport is None:
+            continue
+        n = args.one_use_requests if one_use else args.requests
+        result = drive(
+            async_transport if is_async else transport, ctx, name, n, args.concurrency, 0 if one_use else args.warmup
+        )
+        report["routes"][name] = result
+        print(
+            f"{name:24} {result['rps']:>8} req/s  p50 {result['p50_ms']:>8} ms  p99 {result['p99_ms']:>8} ms  "
+            f"cmds {result['mongo_commands_per_request']!s:>5}  errors {result['errors']}",
+            file=sys.stderr,
+        )
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(report, json.load(f), args.tolerance)
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Feed latency during a login storm.
+
+Keeps a steady feed load on a running server, first alone and then while
+other threads hammer /api/login. Prints feed p50/p99 for both phases,
+login throughput (with 503s from a full hashing pool counted
+separately) and the server's /api/metrics/passwords, e.g.
+
+    # terminal 1
+    WEB_CONCURRENCY=2 GUNICORN_THREADS=4 gunicorn -c gunicorn.conf.py config.wsgi:application
+
+    # terminal 2
+    python bench/login_storm.py --base-url http://127.0.0.1:8000 \
+        --username <user> --password <password> --seconds 20 --logins 16
+
+With hashing offloaded, feed p99 should stay within noise of the
+baseline; run the same storm against a build before api/passwords.py to
+see the difference.
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def request(url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            resp.read()
+            code = resp.status
+    except urllib.error.HTTPError as e:
+        code = e.code
+    except urllib.error.URLError:
+        code = None
+    return (time.perf_counter() - start) * 1000, code
+
+
+def loop(fn, stop, out):
+    while not stop.is_set():
+        out.append(fn())
+
+
+def phase(base, args, with_logins):
+    stop = threading.Event()
+    feed, logins = [], []
+    feed_url = f"{base}/api/allprofiles?limit=24"
+    login = (f"{base}/api/login", {"username": args.username, "password": args.password})
+
+    threads = [threading.Thread(target=loop, args=(lambda: request(feed_url), stop, feed)) for _ in range(args.feed)]
+    if with_logins:
+        threads += [
+            threading.Thread(target=loop, args=(lambda: request(*login), stop, logins)) for _ in range(args.logins)
+        ]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    lat = sorted(ms for ms, code in feed if code == 200)
+    report = {
+        "feed_requests": len(feed),
+        "feed_errors": sum(1 for _, code in feed if code != 200),
+        "feed_p50_ms": round(percentile(lat, 50), 2),
+        "feed_p99_ms": round(percentile(lat, 99), 2),
+    }
+    if with_logins:
+        ok = sorted(ms for ms, code in logins if code == 200)
+        report.update({
+            "logins": len(logins),
+            "logins_per_s": round(len(ok) / args.seconds, 1),
+            "login_busy_503": sum(1 for _, code in logins if code == 503),
+            "login_errors": sum(1 for _, code in logins if code not in (200, 503)),
+            "login_p99_ms": round(percentile(ok, 99), 2),
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--seconds", type=float, default=20.0, help="Length of each phase.")
+    parser.add_argument("--feed", type=int, default=4, help="Concurrent feed clients.")
+    parser.add_argument("--logins", type=int, default=16, help="Concurrent login clients during the storm.")
+    args = parser.parse_args()
+
+    base = args.base_url.rstrip("/")
+    report = {
+        "baseline": phase(base, args, with_logins=False),
+        "storm": phase(base, args, with_logins=True),
+    }
+    with urllib.request.urlopen(f"{base}/api/metrics/passwords", timeout=10) as resp:
+        report["server_hashing"] = json.loads(resp.read())
+
+    b, s = report["baseline"]["feed_p99_ms"], report["storm"]["feed_p99_ms"]
+    print(f"feed p99: {b} ms alone, {s} ms during the storm ({s / b:.2f}x)" if b else "no feed samples")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
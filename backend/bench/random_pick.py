@@ -0,0 +1,95 @@
+"""
+Random pick benchmark: indexed random key vs $match + $sample.
+
+Seeds a scratch database on a local MongoDB with N synthetic profiles
+per size, builds the same indexes as production, and times both ways
+of picking one random profile under the feed's visible_to filter, e.g.
+
+    python bench/random_pick.py --uri mongodb://localhost:27017 --sizes 10000 100000 1000000
+
+The scratch database is dropped between sizes. Never point this at a
+production cluster.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from pymongo import ASCENDING, IndexModel, MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.randomkey import new_random_key, pick_random, sample_random  # noqa: E402
+from api.visibility import preference_fields, visibility_filter  # noqa: E402
+
+GENDERS = ["Woman", "Man", "Non-binary", "Other"]
+
+
+def seed(users, n, batch=10000):
+    users.drop()
+    for start in range(0, n, batch):
+        docs = []
+        for _ in range(min(batch, n - start)):
+            pref = random.choice([[], [], random.choice(GENDERS), random.sample(GENDERS, 2)])
+            docs.append({
+                "username": f"u{start + len(docs)}",
+                "gender": random.choice(GENDERS),
+                **preference_fields(pref),
+                "age": random.randint(18, 70),
+                "rand": new_random_key(),
+            })
+        users.insert_many(docs, ordered=False)
+    users.create_indexes([
+        IndexModel([("rand", ASCENDING)]),
+        IndexModel([("visible_to", ASCENDING), ("rand", ASCENDING)]),
+        IndexModel([("visible_to", ASCENDING), ("_id", ASCENDING)]),
+    ])
+
+
+def visibility(gender):
+    return visibility_filter(gender)
+
+
+def time_it(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+        "mean_ms": round(sum(samples) / len(samples), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="bench_random_pick")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri)
+    users = client[args.db]["users"]
+    report = {}
+
+    for n in args.sizes:
+        seed(users, n)
+        query = visibility(random.choice(GENDERS))
+        report[n] = {
+            "random_key": time_it(lambda: pick_random(users, query), args.rounds),
+            "match_sample": time_it(lambda: sample_random(users, query), args.rounds),
+        }
+        print(json.dumps({n: report[n]}), file=sys.stderr)
+
+    client.drop_database(args.db)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+JSON rendering micro-benchmark: serialize_mongo + DRF JSONRenderer vs
+api.renderers.MongoJSONRenderer, on synthetic feed / inbox payloads, e.g.
+
+    python bench/render_json.py --items 60 200 --rounds 2000
+
+No database or server needed. The "old" path is a copy of the
+serialize_mongo() pass the views used to run on every document.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.conf import settings  # noqa: E402
+
+settings.configure()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from api.renderers import MongoJSONRenderer, orjson  # noqa: E402
+
+GENDERS = ["Woman", "Man", "Non-binary", "Other"]
+
+
+def serialize_mongo(doc):
+    out = {}
+    for k, v in doc.items():
+        if isinstance(v, ObjectId):
+            out[k] = str(v)
+        elif isinstance(v, datetime):
+            if v.tzinfo is None:
+                v = v.replace(tzinfo=timezone.utc)
+            out[k] = v.isoformat()
+        else:
+            out[k] = v
+    return out
+
+
+def profile(now):
+    return {
+        "_id": ObjectId(),
+        "username": f"user{random.randint(0, 10**6)}",
+        "name": "Sam Example",
+        "age": random.randint(18, 70),
+        "gender": random.choice(GENDERS),
+        "preference": random.sample(GENDERS, random.randint(0, 2)),
+        "orientation": "Ace",
+        "romantic_orientation": "Aromantic",
+        "looking_for": "Friendship",
+        "city": "gush-dan",
+        "info": "Board games, long walks and quiet evenings. " * 4,
+        "contact": "@example",
+        "image_url": "https://res.cloudinary.com/demo/image/upload/v1/sample.jpg",
+        "image_public_id": "sample",
+        "created_at": now - timedelta(days=random.randint(0, 900)),
+        "updated_at": now - timedelta(days=random.randint(0, 30)),
+        "last_active_at": now - timedelta(minutes=random.randint(0, 10000)),
+    }
+
+
+def letter(now):
+    return {
+        "_id": ObjectId(),
+        "sender_id": ObjectId(),
+        "receiver_id": ObjectId(),
+        "letter": "Hi! I liked your profile. " * 6,
+        "created_at": now - timedelta(hours=random.randint(0, 2000)),
+        "read_at": None if random.random() < 0.5 else now,
+        "sender_username": "someone",
+    }
+
+
+def time_it(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "p50_us": round(samples[len(samples) // 2], 1),
+        "p95_us": round(samples[int(len(samples) * 0.95) - 1], 1),
+        "mean_us": round(sum(samples) / len(samples), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[60, 200])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    old_renderer, new_renderer = JSONRenderer(), MongoJSONRenderer()
+    now = datetime.utcnow()
+    print(f"encoder: {'orjson' if orjson else 'stdlib json (orjson not installed)'}")
+
+    for kind, make in (("feed", profile), ("inbox", letter)):
+        for n in args.items:
+            docs = [make(now) for _ in range(n)]
+            payload = {"items": docs, "next_cursor": "abc", "has_more": True}
+
+            def old():
+                return old_renderer.render(
+                    {"items": [serialize_mongo(d) for d in docs], "next_cursor": "abc", "has_more": True}
+                )
+
+            def new():
+                return new_renderer.render(payload)
+
+            assert len(old()) > 0 and len(new()) > 0
+            a, b = time_it(old, args.rounds), time_it(new, args.rounds)
+            speedup = a["p50_us"] / b["p50_us"] if b["p50_us"] else float("inf")
+            print(f"{kind:5} x{n:<4} old {a}  new {b}  p50 speedup x{speedup:.1f}")
+
+
+if __name__ == "__main__":
+    main()
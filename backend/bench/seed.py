@@ -0,0 +1,210 @@
+"""
+Synthetic population for load tests and benchmarks.
+
+Fills a scratch database with N users: gender, preference, city and age
+follow skewed distributions close to a real user base (most preferences
+name one gender, a few big cities, ages bunched in the late twenties).
+It also creates a liked graph with a popularity skew and letters (about
+half of them read), with the maintained counters (likes_given,
+likes_received, unread_letters) set to match. The same --seed gives the
+same population.
+
+Also creates `burners`: extra users that the load test may log out,
+reset or delete without affecting the rest of the run. Writes a
+manifest (user / burner / letter ids and the shared password) for
+bench/loadtest.py, e.g.
+
+    python bench/seed.py --uri mongodb://localhost:27017 --db acedating_bench \
+        --users 20000 --out bench/manifest.json
+
+The database is dropped first. Never point this at a production cluster.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from bson import ObjectId  # noqa: E402
+from django.contrib.auth.hashers import make_password  # noqa: E402
+
+from api.visibility import preference_fields  # noqa: E402
+
+GENDERS = (("Woman", 45), ("Man", 42), ("Non-binary", 9), ("Other", 4))
+CITIES = (
+    ("gush-dan", 34), ("jerusalem-area", 14), ("hasharon", 12), ("shfela", 10), ("haifa-krayot", 10),
+    ("north-galilee-golan", 6), ("south-coast", 5), ("negev-beer-sheva", 5), ("eilat-arava", 1),
+    ("other-israel", 3),
+)
+ORIENTATIONS = (("Ace", 40), ("Aro", 10), ("Aroace", 25), ("Demi", 15), ("Grey-asexual", 10))
+LOOKING_FOR = (("Friendship", 35), ("Monogamy-romance", 35), ("Qpr", 20), ("Polyamory-romance", 10))
+ROMANTIC = (
+    ("Aromantic", 20), ("Demiromantic", 15), ("Grey-romantic", 10), ("Heteroromantic", 15),
+    ("Homoromantic", 10), ("Biromantic", 10), ("Panromantic", 10), ("Queerromantic", 4),
+    ("Questioning", 4), ("Other", 2),
+)
+DEFAULT_PASSWORD = "bench-password"
+
+
+def pick(rng, weighted):
+    values, weights = zip(*weighted)
+    return rng.choices(values, weights)[0]
+
+
+def preference(rng):
+    r = rng.random()
+    if r < 0.35:
+        return []  # anyone
+    if r < 0.85:
+        return [pick(rng, GENDERS)]
+    return rng.sample([g for g, _ in GENDERS], 2)
+
+
+def user_doc(rng, i, now, password_hash, burner=False):
+    gender = pick(rng, GENDERS)
+    username = f"{'burner' if burner else 'user'}{i}"
+    created = now - timedelta(days=rng.uniform(0, 365))
+    has_image = rng.random() < 0.85
+    return {
+        "_id": ObjectId(),
+        "username": username,
+        "password_hash": password_hash,
+        "token_generation": 0,
+        "created_at": created,
+        "updated_at": created,
+        "last_active_at": now - timedelta(minutes=rng.expovariate(1 / (60 * 24 * 3))),
+        "name": f"Bench {i}",
+        "age": max(18, min(70, int(rng.triangular(18, 65, 27)))),
+        **preference_fields(preference(rng)),
+        "gender": gender,
+        "city": pick(rng, CITIES),
+        "orientation": pick(rng, ORIENTATIONS),
+        "romantic_orientation": pick(rng, ROMANTIC),
+        "looking_for": pick(rng, LOOKING_FOR),
+        "info": "x" * rng.randint(20, 400),
+        "contact": f"@bench{i}",
+        "email": f"{username}@example.invalid",
+        "image_url": f"https://res.cloudinary.com/bench/image/upload/v1700000000/bench/u{i}.jpg" if has_image else None,
+        "image_public_id": f"bench/u{i}" if has_image else None,
+        "rand": rng.random(),
+        "likes_given": 0,
+        "likes_received": 0,
+        "likes_updated_at": created,
+        "unread_letters": 0,
+    }
+
+
+def _insert(coll, docs, batch=5000):
+    for start in range(0, len(docs), batch):
+        coll.insert_many(docs[start:start + batch], ordered=False)
+
+
+def seed(db, users=5000, likes=20, letters=3, burners=200, seed=1, password=DEFAULT_PASSWORD, manifest_size=2000):
+    """
+    Drops and fills db. `likes` / `letters` are per-user means. Returns
+    the manifest dict bench/loadtest.py reads.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    password_hash = make_password(password)  # one hash for everyone: seeding shouldn't take hours
+
+    for name in ("users", "likes", "letters", "seen", "image_thumbs", "cloudinary_deletions", "account_deletions"):
+        db[name].drop()
+
+    people = [user_doc(rng, i, now, password_hash) for i in range(users)]
+    by_id = {u["_id"]: u for u in people}
+    ids = list(by_id)
+
+    # popularity skew: a few profiles collect most of the likes
+    popularity = list(itertools.accumulate(rng.paretovariate(1.2) for _ in ids))
+    edges = []
+    for u in people:
+        k = min(len(ids) - 1, int(rng.expovariate(1 / likes))) if likes else 0
+        targets = set(rng.choices(ids, cum_weights=popularity, k=k))
+        targets.discard(u["_id"])
+        for t in targets:
+            at = now - timedelta(minutes=rng.uniform(0, 60 * 24 * 90))
+            edges.append({"liker": u["_id"], "likee": t, "created_at": at})
+            u["likes_given"] += 1
+            by_id[t]["likes_received"] += 1
+            u["likes_updated_at"] = max(u["likes_updated_at"], at)
+
+    mail = []
+    for u in people:
+        k = min(len(ids), int(rng.expovariate(1 / letters))) if letters else 0
+        receivers = set(rng.sample(ids, k))
+        receivers.discard(u["_id"])
+        for r in receivers:
+            at = now - timedelta(minutes=rng.uniform(0, 60 * 24 * 60))
+            read = rng.random() < 0.5
+            mail.append({
+                "_id": ObjectId(),
+                "sender_id": u["_id"],
+                "receiver_id": r,
+                "letter": "hello " * rng.randint(5, 80),
+                "created_at": at,
+                "read_at": at + timedelta(hours=1) if read else None,
+            })
+            if not read:
+                by_id[r]["unread_letters"] += 1
+
+    spare = [user_doc(rng, i, now, password_hash, burner=True) for i in range(burners)]
+
+    _insert(db["users"], people + spare)
+    _insert(db["likes"], edges)
+    _insert(db["letters"], mail)
+
+    return {
+        "db": db.name,
+        "seed": seed,
+        "password": password,
+        "counts": {"users": users, "burners": burners, "likes": len(edges), "letters": len(mail)},
+        "users": [str(i) for i in rng.sample(ids, min(manifest_size, len(ids)))],
+        "burners": [str(u["_id"]) for u in spare],
+        "burner_usernames": [u["username"] for u in spare],
+        "burner_emails": [u["email"] for u in spare],
+        "usernames": [by_id[i]["username"] for i in ids[:manifest_size]],
+        "letters": [
+            {"id": str(m["_id"]), "receiver": str(m["receiver_id"])}
+            for m in rng.sample(mail, min(manifest_size, len(mail)))
+        ],
+    }
+
+
+def main():
+    from pymongo import MongoClient
+
+    from api.indexes import ensure_indexes
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="acedating_bench")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--likes", type=float, default=20, help="Mean likes given per user.")
+    parser.add_argument("--letters", type=float, default=3, help="Mean letters sent per user.")
+    parser.add_argument("--burners", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default="bench/manifest.json")
+    args = parser.parse_args()
+
+    db = MongoClient(args.uri)[args.db]
+    manifest = seed(db, args.users, args.likes, args.letters, args.burners, args.seed)
+    ensure_indexes(db)
+
+    with open(args.out, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(json.dumps(manifest["counts"]))
+    print(f"manifest written to {args.out}; run the server with DB_NAME={args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Sync vs async stack benchmark.
+
+Drives the same endpoints through the DRF (sync) views and their
+/api/async/ twins on a running server and prints throughput and
+latency percentiles for each, e.g.
+
+    # terminal 1: same worker count for a fair per-worker comparison
+    WEB_CONCURRENCY=1 gunicorn -c gunicorn.conf.py config.wsgi:application
+    # or: WEB_CONCURRENCY=1 gunicorn -c gunicorn.conf.py -k uvicorn_worker.UvicornWorker config.asgi:application
+
+    # terminal 2
+    python bench/sync_vs_async.py --base-url http://127.0.0.1:8000 \
+        --user-id <id> --token <session token> --concurrency 32 --requests 500
+
+The /api/async/ routes only exist on the ASGI server, so run
+`--only sync` against the WSGI one. The sync paths under an ASGI server
+still go through a thread pool, so the interesting comparison is
+"sync paths on WSGI" vs "async paths on ASGI".
+"""
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def endpoints(user_id):
+    return {
+        "allprofiles": ("/api/allprofiles", "/api/async/allprofiles"),
+        "likes": (f"/api/likes/{user_id}", f"/api/async/likes/{user_id}"),
+        "inbox": (f"/api/inbox/{user_id}", f"/api/async/inbox/{user_id}"),
+        "verify-session": ("/api/verify-session", "/api/async/verify-session"),
+    }
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def hit(url, headers):
+    req = urllib.request.Request(url, headers=headers)
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            resp.read()
+            ok = resp.status < 400
+    except urllib.error.URLError:
+        ok = False
+    return (time.perf_counter() - start) * 1000, ok
+
+
+def run(url, headers, concurrency, requests):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: hit(url, headers), range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(ms for ms, _ in results)
+    return {
+        "requests": requests,
+        "errors": sum(1 for _, ok in results if not ok),
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--only", choices=["sync", "async"], help="run just one of the stacks")
+    args = parser.parse_args()
+
+    headers = {"X-User-Id": args.user_id, "X-Session-Token": args.token}
+    report = {}
+    for name, (sync_path, async_path) in endpoints(args.user_id).items():
+        report[name] = {}
+        for stack, path in (("sync", sync_path), ("async", async_path)):
+            if args.only and args.only != stack:
+                continue
+            report[name][stack] = run(args.base_url + path, headers, args.concurrency, args.requests)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
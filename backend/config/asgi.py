@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# mounts /api/async/* (api/urls.py); the WSGI process never serves them
+os.environ.setdefault('SERVE_ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
@@ -3,6 +3,7 @@
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 from corsheaders.defaults import default_headers
 
@@ -12,9 +13,15 @@ from corsheaders.defaults import default_headers
 BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(BASE_DIR / ".env")
 
-SECRET_KEY = os.getenv("SECRET_KEY", "dev-only-change-me")
+_DEV_SECRET_KEY = "dev-only-change-me"
+SECRET_KEY = os.getenv("SECRET_KEY", _DEV_SECRET_KEY)
 DEBUG = os.getenv("DEBUG", "False") == "True"
 
+# Session tokens are HMAC-signed with SECRET_KEY (api/sessions.py): with
+# the public development key anyone could forge a token for any user.
+if not DEBUG and SECRET_KEY == _DEV_SECRET_KEY:
+    raise ImproperlyConfigured("Set SECRET_KEY (or DEBUG=True for local development)")
+
 # IMPORTANT for APIs: avoid slash-redirect surprises on POST/OPTIONS
 APPEND_SLASH = False
 
@@ -59,6 +66,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+
+    "api.middleware.MongoCommandCountMiddleware",
 ]
 
 # -------------------------------------------------
@@ -100,6 +109,131 @@ DATABASES = {
 
 
 
+# -------------------------------------------------
+# Mongo
+# -------------------------------------------------
+# Read once at startup; api/mongo.py builds one pooled client per
+# process from this. Atlas caps connections per cluster, so keep
+# (gunicorn workers x MAX_POOL_SIZE) below that cap.
+MONGO = {
+    # support both env naming styles
+    "URI": os.getenv("MONGO_URI") or os.getenv("MONGODB_URI") or "mongodb://localhost:27017",
+    "DB_NAME": os.getenv("DB_NAME") or os.getenv("MONGODB_DB") or "ace_dating_db",
+    "MAX_POOL_SIZE": int(os.getenv("MONGO_MAX_POOL_SIZE", 20)),
+    "MIN_POOL_SIZE": int(os.getenv("MONGO_MIN_POOL_SIZE", 1)),
+    "MAX_IDLE_TIME_MS": int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 60000)),
+    "WAIT_QUEUE_TIMEOUT_MS": int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000)),
+    "SERVER_SELECTION_TIMEOUT_MS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)),
+    # pymongo skips (with a warning) any compressor whose package is missing
+    "COMPRESSORS": os.getenv("MONGO_COMPRESSORS", "zstd,snappy"),
+    "RETRY_READS": os.getenv("MONGO_RETRY_READS", "True") == "True",
+    "RETRY_WRITES": os.getenv("MONGO_RETRY_WRITES", "True") == "True",
+    "APP_NAME": os.getenv("MONGO_APP_NAME", "acedating-api"),
+}
+
+# -------------------------------------------------
+# Profile cache (api/profilecache.py)
+# -------------------------------------------------
+# BACKEND: "local" (per-worker LRU, default) | "django" (the CACHES alias
+# below, shared by all workers) | "none". TTL in seconds bounds how stale
+# a profile can get on a worker that missed an invalidation.
+PROFILE_CACHE = {
+    "BACKEND": os.getenv("PROFILE_CACHE_BACKEND", "local"),
+    "TTL": int(os.getenv("PROFILE_CACHE_TTL", 60)),
+    "MAX_ENTRIES": int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", 5000)),
+    "ALIAS": "profiles",
+}
+
+# For PROFILE_CACHE_BACKEND=django: a key/value server on a local socket,
+# e.g. PROFILE_CACHE_LOCATION=unix:///run/redis/redis.sock (needs the
+# `redis` package; memcached via PyMemcacheCache works the same way).
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "profiles": {
+        "BACKEND": os.getenv("PROFILE_CACHE_DJANGO_BACKEND", "django.core.cache.backends.redis.RedisCache"),
+        "LOCATION": os.getenv("PROFILE_CACHE_LOCATION", "unix:///run/redis/redis.sock"),
+        "KEY_PREFIX": "acedating",
+    },
+}
+
+# Startup check for the indexes in api/indexes.py: "off" | "warn" |
+# "strict" (drift fails `manage.py check` and gunicorn refuses to start,
+# see gunicorn.conf.py). Strict by default outside DEBUG: unique indexes
+# such as letters.sender_receiver_unique are what enforce the API's
+# rules, so serving without them is not an option. The procfile's
+# `release` step builds them before every deploy.
+MONGO_INDEX_CHECK = os.getenv("MONGO_INDEX_CHECK", "off" if DEBUG else "strict").lower()
+
+# -------------------------------------------------
+# Session tokens (api/sessions.py)
+# -------------------------------------------------
+# Lifetime of a signed session token, in seconds (default 30 days)
+SESSION_TOKEN_MAX_AGE = int(os.getenv("SESSION_TOKEN_MAX_AGE", 60 * 60 * 24 * 30))
+# How long a worker trusts its cached token_generation before re-reading
+# it; this is the worst-case delay for a logout / password reset to reach
+# other workers.
+SESSION_GENERATION_CACHE_TTL = int(os.getenv("SESSION_GENERATION_CACHE_TTL", 30))
+
+# /api/metrics/* (per-worker pool, cache and hashing numbers) answer only
+# requests with this value in X-Metrics-Token; unset, they are served in
+# DEBUG only and 404 otherwise.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Mount the /api/async/ views (api/async_views.py). config/asgi.py turns
+# this on for the ASGI process; they need its single long-lived event
+# loop, so the WSGI process leaves them out.
+SERVE_ASYNC_VIEWS = os.getenv("SERVE_ASYNC_VIEWS", "False") == "True"
+
+# Days a viewer's "already seen" set lives before feed / random start
+# showing them everyone again.
+SEEN_TTL_DAYS = int(os.getenv("SEEN_TTL_DAYS", 30))
+
+# Public origin of this API, used for absolute URLs in responses (local
+# thumbnails in image_variants); empty = site-relative "/api/..." URLs.
+PUBLIC_API_BASE = os.getenv("PUBLIC_API_BASE", "")
+
+# Hosts `manage.py build_thumbnails` may download user-supplied image URLs
+# from (comma-separated, https only). Photos elsewhere get no local
+# thumbnails; profiles keep showing the original image_url.
+IMAGE_HOSTS = [
+    h.strip().lower() for h in os.getenv("IMAGE_HOSTS", "res.cloudinary.com").split(",") if h.strip()
+]
+
+# Seconds between two last_active_at writes for the same user
+# (sort=recently_active on the feed).
+LAST_ACTIVE_RESOLUTION = int(os.getenv("LAST_ACTIVE_RESOLUTION", 300))
+
+# -------------------------------------------------
+# Password hashing (api/passwords.py, api/hashers.py)
+# -------------------------------------------------
+# ALGORITHM picks the hasher new hashes use: "pbkdf2" | "argon2" (needs
+# argon2-cffi) | "scrypt". Changing it, or raising a cost below, rehashes
+# each user's password on their next successful login. WORKERS hashing
+# processes per web worker; at most MAX_PENDING hashes in flight per web
+# worker, a login waiting longer than QUEUE_TIMEOUT seconds gets a 503.
+PASSWORD_HASHING = {
+    "ALGORITHM": os.getenv("PASSWORD_HASHER", "pbkdf2").lower(),
+    "WORKERS": int(os.getenv("PASSWORD_HASH_WORKERS", 1)),
+    "MAX_PENDING": int(os.getenv("PASSWORD_HASH_MAX_PENDING", 4)),
+    "QUEUE_TIMEOUT": float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", 5)),
+    # 0 = Django's default for the installed version
+    "PBKDF2_ITERATIONS": int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", 0)),
+    "ARGON2_TIME_COST": int(os.getenv("PASSWORD_ARGON2_TIME_COST", 2)),
+    "ARGON2_MEMORY_COST": int(os.getenv("PASSWORD_ARGON2_MEMORY_COST", 102400)),
+    "ARGON2_PARALLELISM": int(os.getenv("PASSWORD_ARGON2_PARALLELISM", 8)),
+    "SCRYPT_WORK_FACTOR": int(os.getenv("PASSWORD_SCRYPT_WORK_FACTOR", 2**14)),
+}
+
+_PASSWORD_HASHERS = {
+    "pbkdf2": "api.hashers.ConfiguredPBKDF2PasswordHasher",
+    "argon2": "api.hashers.ConfiguredArgon2PasswordHasher",
+    "scrypt": "api.hashers.ConfiguredScryptPasswordHasher",
+}
+# preferred first; the others still verify existing hashes
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHING["ALGORITHM"]]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHING["ALGORITHM"]
+]
+
 # -------------------------------------------------
 # Password validation
 # -------------------------------------------------
@@ -136,8 +270,9 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # DRF
 # -------------------------------------------------
 REST_FRAMEWORK = {
+    # encodes ObjectId / datetime while rendering (api/renderers.py)
     "DEFAULT_RENDERER_CLASSES": (
-        "rest_framework.renderers.JSONRenderer",
+        "api.renderers.MongoJSONRenderer",
     )
 }
 
@@ -170,6 +305,9 @@ CORS_ALLOW_HEADERS = list(default_headers) + [
     "authorization",
 ]
 
+# Let the browser read the per-request Mongo command count
+CORS_EXPOSE_HEADERS = ["x-mongo-commands"]
+
 # -------------------------------------------------
 # CSRF 
 # -------------------------------------------------
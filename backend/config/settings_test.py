@@ -0,0 +1,16 @@
+# backend/config/settings_test.py
+#
+# Settings for the test suite (pytest.ini points pytest-django here).
+# The tests run against mongomock (api/tests.py), never a real cluster.
+
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-only-not-secret")
+# cheap hashes; set in the environment so the hashing pool processes see it too
+os.environ.setdefault("PASSWORD_PBKDF2_ITERATIONS", "1000")
+
+from .settings import *  # noqa: E402,F401,F403
+
+MONGO = {**MONGO, "URI": "mongodb://localhost:27017", "DB_NAME": "acedating_test"}  # noqa: F405
+MONGO_INDEX_CHECK = "off"
+PROFILE_CACHE = {**PROFILE_CACHE, "BACKEND": "local"}  # noqa: F405
@@ -0,0 +1,45 @@
+# gunicorn.conf.py — picked up by the procfile (`-c gunicorn.conf.py`)
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+# Threads per worker (gthread when > 1): a request waiting on the password
+# hashing pool (api/passwords.py) then doesn't hold up the whole worker.
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+
+def on_starting(server):
+    # Refuse to serve without the Mongo indexes the API relies on (unique
+    # letters / likes / usernames): MONGO_INDEX_CHECK, strict outside
+    # DEBUG, turns drift into a SystemCheckError that stops the master.
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    from api import mongo
+
+    try:
+        call_command("check", tags=["mongo"])
+    finally:
+        # workers build their own client after the fork
+        mongo.close()
+
+
+def post_fork(server, worker):
+    # Each worker builds its own Mongo client after the fork (never share
+    # a MongoClient across fork) and pings once so the first request
+    # doesn't pay for the TLS handshake to Atlas.
+    from api import mongo
+
+    try:
+        mongo.connect(ping=True)
+    except Exception as e:
+        server.log.warning("Mongo warm-up failed in worker %s: %s", worker.pid, e)
+
+
+def worker_exit(server, worker):
+    from api import mongo, passwords
+
+    passwords.shutdown()
+    mongo.close()
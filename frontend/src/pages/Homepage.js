@@ -6,12 +6,20 @@ import TopBar from "./TopBar";
 
 import { useNavigate } from "react-router-dom";
 import { S, ensureHomepageStyles, PLACEHOLDER_AVATAR_URL } from "./homepageStyles";
+import { lightboxSrc, variantImgProps } from "./imageVariants";
 
 const API_BASE = process.env.REACT_APP_API_BASE || "http://127.0.0.1:8000";
 const PAGE_SIZE = 24;
 const ORIENTATION_OPTIONS = ["Ace", "Aro", "Aroace", "Demi", "Grey-asexual"];
 const LOOKING_FOR_OPTIONS = ["Friendship", "Monogamy-romance", "Qpr", "Polyamory-romance"];
 const GENDER_OPTIONS = ["Man", "Woman", "Non-binary", "Other"];
+const SORT_OPTIONS = [
+  { value: "oldest", label: "Members since longest" },
+  { value: "newest", label: "Newest members" },
+  { value: "recently_active", label: "Recently active" },
+  { value: "age_asc", label: "Age: youngest first" },
+  { value: "age_desc", label: "Age: oldest first" },
+];
 const CITY_OPTIONS = [
   { value: "gush-dan", label: "Gush Dan (Tel Aviv / Ramat Gan / Holon / Bat Yam...)" },
   { value: "jerusalem-area", label: "Jerusalem area" },
@@ -313,7 +321,7 @@ function MultiSelect({ label, options, valueSet, onChangeSet, placeholder = "Any
 function ProfileCard({ p, isFav, onToggleFav, onOpenImage, onWriteMessage }) {
   const [imgOk, setImgOk] = useState(true);
   const fallback = `${PLACEHOLDER_AVATAR_URL}&seed=${encodeURIComponent(p.username || "Ace")}`;
-  const imgSrc = imgOk && p.image_url ? p.image_url : fallback;
+  const cardImg = imgOk && p.image_url ? variantImgProps(p, "card", API_BASE) : { src: fallback };
 
   return (
     <div style={S.card} className="__hp_card__ hp-card">
@@ -322,7 +330,7 @@ function ProfileCard({ p, isFav, onToggleFav, onOpenImage, onWriteMessage }) {
         <div style={S.avatar} className="hp-avatar">
           <button
             type="button"
-            onClick={() => onOpenImage(imgSrc)}
+            onClick={() => onOpenImage(imgOk && p.image_url ? lightboxSrc(p, API_BASE) : fallback)}
             style={{
               all: "unset",
               cursor: "pointer",
@@ -332,7 +340,7 @@ function ProfileCard({ p, isFav, onToggleFav, onOpenImage, onWriteMessage }) {
             }}
             title="Open image"
           >
-            <img src={imgSrc} alt="profile" style={S.avatarImg} onError={() => setImgOk(false)} />
+            <img {...cardImg} alt="profile" style={S.avatarImg} onError={() => setImgOk(false)} />
           </button>
         </div>
 
@@ -409,7 +417,10 @@ export default function Homepage() {
   }, []);
 
   // ---- Real session verification (not just "is something in localStorage") ----
+  // One /api/bootstrap call verifies the session and brings the liked ids
+  // and the first feed page with it (no verify → likes → feed waterfall).
   const [sessionChecked, setSessionChecked] = useState(false);
+  const bootstrapped = useRef(false);
 
   useEffect(() => {
     const token = localStorage.getItem("token");
@@ -422,10 +433,20 @@ export default function Homepage() {
 
     (async () => {
       try {
-        const res = await axios.get(`${API_BASE}/api/verify-session`, {
+        const res = await axios.get(`${API_BASE}/api/bootstrap`, {
+          params: { limit: PAGE_SIZE },
           headers: { "X-User-Id": userId, "X-Session-Token": token },
         });
         if (!res.data?.valid) throw new Error("invalid session");
+
+        const liked = Array.isArray(res.data?.liked) ? res.data.liked : [];
+        const feed = res.data?.feed || {};
+        setLikedIds(new Set(liked.map(String)));
+        setProfiles(Array.isArray(feed.items) ? feed.items : []);
+        setCursor(feed.next_cursor ?? null);
+        setHasMore(!!feed.has_more);
+        setInitialLoading(false);
+        bootstrapped.current = true;
         setSessionChecked(true);
       } catch (e) {
         localStorage.removeItem("token");
@@ -475,6 +496,8 @@ export default function Homepage() {
   // Age range
   const [ageMin, setAgeMin] = useState("");
   const [ageMax, setAgeMax] = useState("");
+  // Server-side order; the cursor only means something within one sort
+  const [sort, setSort] = useState("oldest");
 
   // Which profile (in the filtered list) is currently shown
   const [currentIndex, setCurrentIndex] = useState(0);
@@ -487,27 +510,32 @@ export default function Homepage() {
   // Favorites (local-only MVP)
   const [likedIds, setLikedIds] = useState(() => new Set());
 
-  useEffect(() => {
-    if (!myId || !sessionChecked) return;
-
-    (async () => {
-      try {
-        const res = await axios.get(`${API_BASE}/api/likes/${myId}`);
-        const liked = Array.isArray(res.data?.liked) ? res.data.liked : [];
-        setLikedIds(new Set(liked.map(String)));
-      } catch (e) {
-        console.error("Failed to load liked ids", e);
-        setLikedIds(new Set());
-      }
-    })();
-  }, [myId, sessionChecked]);
-
   useEffect(() => {
     localStorage.setItem("favorites", JSON.stringify(Array.from(likedIds)));
   }, [likedIds]);
 
+  // Bumped on every reset so a slow response for old filters can't
+  // overwrite the page for the current ones.
+  const fetchSeq = useRef(0);
+
+  // Server-side filters (keyword search stays client-side)
+  const filterParams = () => {
+    const params = {};
+    if (citySet.size) params.city = Array.from(citySet).join(",");
+    if (orientationSet.size) params.orientation = Array.from(orientationSet).join(",");
+    if (lookingForSet.size) params.looking_for = Array.from(lookingForSet).join(",");
+    if (genderSet.size) params.gender = Array.from(genderSet).join(",");
+    if (romanticOrientationSet.size) params.romantic_orientation = Array.from(romanticOrientationSet).join(",");
+    if (ageMin !== "") params.age_min = ageMin;
+    if (ageMax !== "") params.age_max = ageMax;
+    if (sort !== "oldest") params.sort = sort;
+    return params;
+  };
+
   const fetchPage = async (reset = false) => {
     if (!reset && (loadingMore || !hasMore)) return;
+    if (reset) fetchSeq.current += 1;
+    const seq = fetchSeq.current;
 
     try {
       if (reset) {
@@ -520,10 +548,11 @@ export default function Homepage() {
         setLoadingMore(true);
       }
 
-      const params = { limit: PAGE_SIZE };
+      const params = { limit: PAGE_SIZE, ...filterParams() };
       if (!reset && cursor) params.cursor = cursor;
 
       const res = await axios.get(`${API_BASE}/api/allprofiles`, { params, headers: { "X-User-Id": myId } });
+      if (seq !== fetchSeq.current) return;
 
       const items = Array.isArray(res.data?.items) ? res.data.items : [];
       const next = res.data?.next_cursor ?? null;
@@ -533,21 +562,31 @@ export default function Homepage() {
       setCursor(next);
       setHasMore(more);
     } catch (e) {
+      if (seq !== fetchSeq.current) return;
       console.error(e);
       if (reset) setProfiles([]);
       setHasMore(false);
     } finally {
-      setInitialLoading(false);
-      setLoadingMore(false);
+      if (seq === fetchSeq.current) {
+        setInitialLoading(false);
+        setLoadingMore(false);
+      }
     }
   };
 
-  // Initial load — wait until session is verified
+  // The first page comes with /api/bootstrap; reload from the first page
+  // whenever a server-side filter changes (debounced so typing an age
+  // doesn't fire a request per keystroke).
   useEffect(() => {
     if (!sessionChecked) return;
-    fetchPage(true);
+    if (bootstrapped.current) {
+      bootstrapped.current = false;
+      return;
+    }
+    const t = window.setTimeout(() => fetchPage(true), 250);
+    return () => window.clearTimeout(t);
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [sessionChecked]);
+  }, [sessionChecked, citySet, orientationSet, lookingForSet, genderSet, romanticOrientationSet, ageMin, ageMax, sort]);
 
   const filtered = useMemo(() => {
     const qq = normalizeText(q).trim();
@@ -587,7 +626,7 @@ export default function Homepage() {
   useEffect(() => {
     setCurrentIndex(0);
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [q, citySet, orientationSet, lookingForSet, genderSet, romanticOrientationSet, ageMin, ageMax]);
+  }, [q, citySet, orientationSet, lookingForSet, genderSet, romanticOrientationSet, ageMin, ageMax, sort]);
 
   // Prefetch more profiles as the user nears the end of the current filtered list
   useEffect(() => {
@@ -798,6 +837,19 @@ export default function Homepage() {
                     </div>
                   </div>
 
+                  <div style={S.searchWrap}>
+                    <div style={S.msLabel}>Sort by</div>
+                    <div style={S.searchRow}>
+                      <select style={S.searchInput} value={sort} onChange={(e) => setSort(e.target.value)}>
+                        {SORT_OPTIONS.map((o) => (
+                          <option key={o.value} value={o.value}>
+                            {o.label}
+                          </option>
+                        ))}
+                      </select>
+                    </div>
+                  </div>
+
                   <MultiSelect label="City / Area" options={cityOptions} valueSet={citySet} onChangeSet={setCitySet} placeholder="Any area" />
                   <MultiSelect label="Orientation" options={orientationOptions} valueSet={orientationSet} onChangeSet={setOrientationSet} placeholder="Any orientation" />
                   <MultiSelect label="Looking for" options={lookingForOptions} valueSet={lookingForSet} onChangeSet={setLookingForSet} placeholder="Any" />
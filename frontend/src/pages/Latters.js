@@ -18,6 +18,9 @@ export default function Inbox() {
   const [items, setItems] = useState([]);
   const [err, setErr] = useState("");
   const [loading, setLoading] = useState(true);
+  const [cursor, setCursor] = useState(null);
+  const [hasMore, setHasMore] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   // modal / open letter on click
   const [openLetter, setOpenLetter] = useState(null);
@@ -34,26 +37,33 @@ export default function Inbox() {
     return () => window.removeEventListener("keydown", onKey);
   }, []);
 
-  const load = async () => {
+  // Pages of 50, newest first; "Load older letters" follows next_cursor
+  const load = async (reset = true) => {
     if (!userId) return;
     setErr("");
-    setLoading(true);
+    if (reset) setLoading(true);
+    else setLoadingMore(true);
 
     try {
+      const params = { limit: 50 };
+      if (!reset && cursor) params.cursor = cursor;
+
       const res = await axios.get(`${API_BASE}/api/inbox/${userId}`, {
+        params,
         headers: { "X-User-Id": userId, "X-Session-Token": token }, // ✅ NEW — InboxView now requires a valid session
         timeout: 15000,
       });
       const arr = Array.isArray(res.data?.items) ? res.data.items : [];
 
-      // ensure newest first
-      arr.sort((a, b) => new Date(b.created_at || 0) - new Date(a.created_at || 0));
-      setItems(arr);
+      setItems((prev) => (reset ? arr : [...prev, ...arr]));
+      setCursor(res.data?.next_cursor ?? null);
+      setHasMore(!!res.data?.has_more);
     } catch (e) {
       setErr(e?.response?.data?.error || e.message || "Failed to load inbox");
-      setItems([]);
+      if (reset) setItems([]);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -228,7 +238,7 @@ export default function Inbox() {
             </div>
 
             <div style={{ display: "flex", gap: 10 }}>
-              <button type="button" style={S.secondaryBtn} onClick={load}>
+              <button type="button" style={S.secondaryBtn} onClick={() => load(true)}>
                 Refresh
               </button>
             </div>
@@ -330,6 +340,14 @@ export default function Inbox() {
                   );
                 })
               )}
+
+              {hasMore && (
+                <div style={{ ...T.row, cursor: "default", justifyContent: "center" }}>
+                  <button type="button" style={S.secondaryBtn} disabled={loadingMore} onClick={() => load(false)}>
+                    {loadingMore ? "Loading…" : "Load older letters"}
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </div>
@@ -331,6 +331,26 @@ export default function ProfilePage() {
     }
   };
 
+  const deleteAccount = async () => {
+    if (!PROFILE_URL) return;
+    if (!window.confirm("Delete your account? Your profile, likes and letters will be removed. This can't be undone.")) {
+      return;
+    }
+
+    setSaving(true);
+    setError("");
+    try {
+      // 202: the profile is hidden now, the rest is cleaned up server-side
+      await axios.delete(PROFILE_URL, { headers });
+      localStorage.removeItem("token");
+      localStorage.removeItem("user_id");
+      window.location.href = "/";
+    } catch (err) {
+      setError(err?.response?.data?.error || err.message || "Failed to delete account");
+      setSaving(false);
+    }
+  };
+
   return (
     <div style={S.page}>
       {/* ✅ NEW — mobile media-query overrides */}
@@ -358,9 +378,14 @@ export default function ProfilePage() {
             {!loading && (
               <div className="pp-headerrow-actions" style={{ display: "flex", gap: 8 }}>
                 {!edit ? (
-                  <button style={S.btn} onClick={() => setEdit(true)} type="button">
-                    Edit
-                  </button>
+                  <>
+                    <button style={S.btnGhost} onClick={deleteAccount} type="button" disabled={saving}>
+                      Delete account
+                    </button>
+                    <button style={S.btn} onClick={() => setEdit(true)} type="button">
+                      Edit
+                    </button>
+                  </>
                 ) : (
                   <>
                     <button style={S.btnGhost} onClick={cancelEdit} type="button" disabled={saving || uploadingAvatar}>
@@ -1,8 +1,9 @@
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useMemo, useRef, useState } from "react";
 import axios from "axios";
 import TopBar from "./TopBar";
 import { useNavigate } from "react-router-dom";
 import { S, ensureHomepageStyles, PLACEHOLDER_AVATAR_URL } from "./homepageStyles";
+import { lightboxSrc, variantImgProps } from "./imageVariants";
 
 const API_BASE = process.env.REACT_APP_API_BASE || "http://127.0.0.1:8000";
 
@@ -147,7 +148,7 @@ function ProfileCard({ p, isFav, onToggleFav, onOpenImage }) {
   const [imgOk, setImgOk] = useState(true);
 
   const fallback = `${PLACEHOLDER_AVATAR_URL}&seed=${encodeURIComponent(p.username || "Ace")}`;
-  const imgSrc = imgOk && p.image_url ? p.image_url : fallback;
+  const cardImg = imgOk && p.image_url ? variantImgProps(p, "card", API_BASE) : { src: fallback };
 
   return (
     <div
@@ -160,7 +161,7 @@ function ProfileCard({ p, isFav, onToggleFav, onOpenImage }) {
         <div style={S.avatar} className="rp-avatar">
           <button
             type="button"
-            onClick={() => onOpenImage(imgSrc)}
+            onClick={() => onOpenImage(imgOk && p.image_url ? lightboxSrc(p, API_BASE) : fallback)}
             style={{
               all: "unset",
               cursor: "pointer",
@@ -170,7 +171,7 @@ function ProfileCard({ p, isFav, onToggleFav, onOpenImage }) {
             }}
             title="Open image"
           >
-            <img src={imgSrc} alt="profile" style={S.avatarImg} onError={() => setImgOk(false)} />
+            <img {...cardImg} alt="profile" style={S.avatarImg} onError={() => setImgOk(false)} />
           </button>
         </div>
 
@@ -230,6 +231,8 @@ function ProfileCard({ p, isFav, onToggleFav, onOpenImage }) {
   );
 }
 
+const SEEN_BATCH_SIZE = 10;
+
 export default function RandomPage() {
   const navigate = useNavigate();
   const myId = useMemo(() => String(localStorage.getItem("user_id") || ""), []);
@@ -286,6 +289,45 @@ export default function RandomPage() {
     localStorage.setItem("favorites", JSON.stringify(Array.from(likedIds)));
   }, [likedIds]);
 
+  // Profiles shown here are recorded in the user's "seen" set so random
+  // doesn't repeat them. Views are sent in batches; until a batch is sent
+  // its ids ride along on each pick as `exclude`.
+  const pendingSeen = useRef([]);
+
+  const flushSeen = () => {
+    const ids = pendingSeen.current;
+    const token = localStorage.getItem("token");
+    if (!myId || !token || ids.length === 0) return;
+    pendingSeen.current = [];
+    axios
+      .post(
+        `${API_BASE}/api/seen/${myId}`,
+        { ids },
+        { headers: { "X-User-Id": myId, "X-Session-Token": token } }
+      )
+      .catch((e) => {
+        console.error("Failed to record seen profiles", e);
+        pendingSeen.current = ids.concat(pendingSeen.current).slice(0, SEEN_BATCH_SIZE * 5);
+      });
+  };
+
+  useEffect(() => {
+    if (!shown?._id) return;
+    const pid = String(shown._id);
+    if (!pendingSeen.current.includes(pid)) pendingSeen.current.push(pid);
+    if (pendingSeen.current.length >= SEEN_BATCH_SIZE) flushSeen();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [shown]);
+
+  useEffect(() => {
+    window.addEventListener("pagehide", flushSeen);
+    return () => {
+      window.removeEventListener("pagehide", flushSeen);
+      flushSeen();
+    };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [myId]);
+
   // ✅ CHANGED — fetches ONE random profile from the backend instead of
   // pulling a pool of ids/profiles and picking client-side. Used both for
   // the initial load and every "Show another" click.
@@ -297,6 +339,7 @@ export default function RandomPage() {
 
       const res = await axios.get(`${API_BASE}/api/randomprofile`, {
         headers: { "X-User-Id": myId },
+        params: pendingSeen.current.length ? { exclude: pendingSeen.current.join(",") } : {},
       });
 
       setShown(res.data || null);
@@ -3,6 +3,7 @@ import axios from "axios";
 import { useNavigate } from "react-router-dom";
 import TopBar from "./TopBar";
 import { S, ensureHomepageStyles, PLACEHOLDER_AVATAR_URL } from "./homepageStyles";
+import { lightboxSrc, variantImgProps } from "./imageVariants";
 
 const API_BASE = process.env.REACT_APP_API_BASE || "http://127.0.0.1:8000";
 
@@ -203,7 +204,7 @@ function ProfileCard({ p, isFav, isMatch, onToggleFav, onOpenImage }) {
   const [imgOk, setImgOk] = useState(true);
 
   const fallback = `${PLACEHOLDER_AVATAR_URL}&seed=${encodeURIComponent(p.username || "Ace")}`;
-  const imgSrc = imgOk && p.image_url ? p.image_url : fallback;
+  const cardImg = imgOk && p.image_url ? variantImgProps(p, "card", API_BASE) : { src: fallback };
 
   return (
     <div
@@ -216,7 +217,7 @@ function ProfileCard({ p, isFav, isMatch, onToggleFav, onOpenImage }) {
         <div style={S.avatar} className="sp-avatar">
           <button
             type="button"
-            onClick={() => onOpenImage(imgSrc)}
+            onClick={() => onOpenImage(imgOk && p.image_url ? lightboxSrc(p, API_BASE) : fallback)}
             style={{
               all: "unset",
               cursor: "pointer",
@@ -226,7 +227,7 @@ function ProfileCard({ p, isFav, isMatch, onToggleFav, onOpenImage }) {
             }}
             title="Open image"
           >
-            <img src={imgSrc} alt="profile" style={S.avatarImg} onError={() => setImgOk(false)} />
+            <img {...cardImg} alt="profile" style={S.avatarImg} onError={() => setImgOk(false)} />
           </button>
         </div>
 
@@ -382,11 +383,13 @@ export default function Savedpage() {
     }
     setMatchesLoading(true);
     try {
+      // ids only — the badge just needs the set, not the profiles
       const res = await axios.get(`${API_BASE}/api/likedby/${myId}`, {
+        params: { ids_only: 1 },
         headers: { "X-User-Id": myId, "X-Session-Token": token },
       });
-      const items = Array.isArray(res.data?.items) ? res.data.items : [];
-      setMatchIds(new Set(items.map((p) => String(p._id))));
+      const ids = Array.isArray(res.data?.ids) ? res.data.ids : [];
+      setMatchIds(new Set(ids.map(String)));
     } catch (e) {
       console.error("Failed to load who saved you", e);
       setMatchIds(new Set());
@@ -401,17 +404,31 @@ export default function Savedpage() {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [myId]);
 
-  const fetchSaved = async () => {
+  // Saved profiles come in pages, in the order they were saved
+  const [savedCursor, setSavedCursor] = useState(null);
+  const [savedHasMore, setSavedHasMore] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  const fetchSaved = async (reset = true) => {
     try {
-      setInitialLoading(true);
-      const res = await axios.get(`${API_BASE}/api/profilessaved/${myId}`);
+      if (reset) setInitialLoading(true);
+      else setLoadingMore(true);
+
+      const params = { limit: 48 };
+      if (!reset && savedCursor) params.cursor = savedCursor;
+
+      const res = await axios.get(`${API_BASE}/api/profilessaved/${myId}`, { params });
       const items = Array.isArray(res.data?.items) ? res.data.items : [];
-      setProfiles(items);
+      setProfiles((prev) => (reset ? items : [...prev, ...items]));
+      setSavedCursor(res.data?.next_cursor ?? null);
+      setSavedHasMore(!!res.data?.has_more);
     } catch (e) {
       console.error(e);
-      setProfiles([]);
+      if (reset) setProfiles([]);
+      setSavedHasMore(false);
     } finally {
       setInitialLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -697,6 +714,13 @@ export default function Savedpage() {
                   />
                 ))}
               </div>
+              {savedHasMore && (
+                <div style={{ display: "flex", justifyContent: "center", marginTop: 16 }}>
+                  <button type="button" style={S.secondaryBtn} disabled={loadingMore} onClick={() => fetchSaved(false)}>
+                    {loadingMore ? "Loading…" : "Load more saved profiles"}
+                  </button>
+                </div>
+              )}
             </>
           ) : (
             <div style={S.empty}>
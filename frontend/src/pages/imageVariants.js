@@ -0,0 +1,23 @@
+// Picks a server-computed image variant (profile.image_variants, see
+// backend/api/images.py) as <img> props. Local thumbnails come back as
+// site-relative "/api/..." URLs, so they get the API origin prepended.
+
+const absolute = (url, apiBase) => (url && url.startsWith("/") ? `${apiBase}${url}` : url);
+
+export function variantImgProps(p, name, apiBase) {
+  const v = p?.image_variants?.[name];
+  if (!v?.src) return { src: p?.image_url || "" };
+  const srcSet = (v.srcset || "")
+    .split(", ")
+    .filter(Boolean)
+    .map((entry) => absolute(entry, apiBase))
+    .join(", ");
+  return srcSet
+    ? { src: absolute(v.src, apiBase), srcSet, sizes: v.sizes }
+    : { src: absolute(v.src, apiBase) };
+}
+
+// Full-size image for the lightbox: the largest sensible variant, else the original.
+export function lightboxSrc(p, apiBase) {
+  return absolute(p?.image_variants?.lightbox?.src, apiBase) || p?.image_url || "";
+}